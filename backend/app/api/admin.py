@@ -0,0 +1,70 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.models.user import User
+from app.schemas.alerts import LowStockAlertResponse, ThresholdUpdate
+from app.schemas.slow_query import SlowQueryResponse
+from app.core.deps import get_current_active_admin, user_cache
+from app.core.security import token_cache
+from app.core.slow_queries import slow_query_log
+from app.services.alerts import low_stock_detector
+from app.services.broadcast import stock_broadcaster
+
+router = APIRouter()
+
+@router.get("/caches")
+def read_cache_stats(current_user: User = Depends(get_current_active_admin)):
+    """
+    Size and hit/miss counters of the in-process caches, and open stock
+    streams. Only Admins.
+    """
+    return {
+        "users": user_cache.stats(),
+        "tokens": token_cache.stats(),
+        "streams": stock_broadcaster.stats(),
+    }
+
+@router.get("/alerts", response_model=List[LowStockAlertResponse])
+def read_low_stock_alerts(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Sweets at or below their low-stock threshold, emptiest first. Only Admins.
+    """
+    return [alert._asdict() for alert in low_stock_detector.alerts(db)]
+
+@router.put("/alerts/thresholds", response_model=List[LowStockAlertResponse])
+def update_stock_threshold(
+    threshold_in: ThresholdUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Set or remove the low-stock threshold of a sweet or a category, and
+    return the resulting alerts. Only Admins.
+    """
+    low_stock_detector.set_threshold(
+        db, threshold_in.threshold, sweet_id=threshold_in.sweet_id, category=threshold_in.category
+    )
+    return [alert._asdict() for alert in low_stock_detector.alerts(db)]
+
+@router.get("/slow-queries", response_model=List[SlowQueryResponse])
+def read_slow_queries(
+    limit: int = Query(20, ge=1, le=500),
+    order_by: str = Query("total_ms", pattern="^(total_ms|max_ms|mean_ms|count)$"),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Statements slower than SLOW_QUERY_MS in this process, grouped by
+    fingerprint, worst first, with their query plans. Only Admins.
+    """
+    return slow_query_log.worst(limit, order_by)
+
+@router.delete("/slow-queries", status_code=204)
+def clear_slow_queries(current_user: User = Depends(get_current_active_admin)):
+    """
+    Forget the recorded slow queries, e.g. after adding an index. Only Admins.
+    """
+    slow_query_log.clear()
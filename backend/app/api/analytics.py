@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.models.user import User
+from app.schemas.analytics import CategoryRevenue, TopSeller
+from app.schemas.sweet import SweetResponse
+from app.core.dates import as_utc
+from app.core.deps import get_current_active_admin
+from app.services import rollups
+
+# Dashboards over the rollup tables. Every query reads pre-aggregated buckets,
+# so its cost depends on the requested range, not on the order history.
+
+router = APIRouter()
+
+GRANULARITY = Query("day", pattern="^(hour|day)$")
+
+def _range(start: Optional[datetime], end: Optional[datetime], granularity: str):
+    start, end = as_utc(start), as_utc(end)
+    end = end or datetime.utcnow()
+    start = start or end - (timedelta(days=1) if granularity == "hour" else timedelta(days=30))
+    if start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="start must be before end")
+    return start, end
+
+@router.get("/revenue", response_model=List[CategoryRevenue])
+def read_category_revenue(
+    granularity: str = GRANULARITY,
+    start: Optional[datetime] = Query(None, description="Defaults to 1 day (hourly) or 30 days (daily) before end"),
+    end: Optional[datetime] = Query(None, description="Defaults to now (UTC)"),
+    category: Optional[str] = Query(None, description="Exact category match"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Units sold, revenue and units restocked per category per hour or day. Only Admins.
+    """
+    start, end = _range(start, end, granularity)
+    return rollups.category_revenue(db, granularity, start, end, category)
+
+@router.get("/top-sellers", response_model=List[TopSeller])
+def read_top_sellers(
+    granularity: str = GRANULARITY,
+    start: Optional[datetime] = Query(None, description="Defaults to 1 day (hourly) or 30 days (daily) before end"),
+    end: Optional[datetime] = Query(None, description="Defaults to now (UTC)"),
+    limit: int = Query(10, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Best-selling sweets by units over a time range. Only Admins.
+    """
+    start, end = _range(start, end, granularity)
+    return [row._asdict() for row in rollups.top_sellers(db, granularity, start, end, limit)]
+
+@router.get("/low-stock", response_model=List[SweetResponse])
+def read_low_stock(
+    threshold: int = Query(5, ge=0, description="Report sweets with at most this many units"),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Sweets running out, emptiest first. Only Admins.
+    """
+    return rollups.low_stock(db, threshold, limit)
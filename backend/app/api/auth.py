@@ -1,16 +1,30 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.auth import UserCreate, UserResponse, UserLogin, Token
-from app.core.security import get_password_hash, verify_password, create_access_token
+from app.core.security import get_password_hash_async, verify_password_async, create_access_token
 
 router = APIRouter()
 
+# The handlers are async so that bcrypt can be awaited on the hashing pool.
+# Database calls still use the sync session and are pushed to the threadpool
+# so a locked SQLite file never blocks the event loop.
+
+def _get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
+def _save_user(db: Session, user: User) -> User:
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
     # Check if user already exists
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await run_in_threadpool(_get_user_by_email, db, user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -21,29 +35,31 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
     new_user = User(
         name=user_in.name,
         email=user_in.email,
-        password_hash=get_password_hash(user_in.password),
+        password_hash=await get_password_hash_async(user_in.password),
         role="USER" # Default role
     )
-    db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
-    return new_user
+    return await run_in_threadpool(_save_user, db, new_user)
 
 @router.post("/token", response_model=Token)
-def login(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login(login_data: UserLogin, db: Session = Depends(get_db)):
     # Find user by email (mapped from username field)
-    user = db.query(User).filter(User.email == login_data.username).first()
+    user = await run_in_threadpool(_get_user_by_email, db, login_data.username)
     
-    if not user or not verify_password(login_data.password, user.password_hash):
+    if not user or not await verify_password_async(login_data.password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Create Access Token
+    return issue_token(user)
+
+def issue_token(user: User) -> dict:
+    """
+    Create the access token response for an authenticated user.
+    """
     access_token = create_access_token(
-        data={"sub": str(user.id), "role": user.role, "name": user.name}
+        data={"sub": str(user.id), "role": user.role, "name": user.name, "email": user.email}
     )
     
     return {
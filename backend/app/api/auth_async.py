@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.async_session import get_async_db
+from app.models.user import User
+from app.schemas.auth import UserCreate, UserResponse, UserLogin, Token
+from app.core.security import get_password_hash_async, verify_password_async
+from app.api.auth import issue_token
+
+# Async-engine versions of the routes in app.api.auth, mounted instead of
+# them when DB_ASYNC is enabled.
+
+router = APIRouter()
+
+async def _get_user_by_email(db: AsyncSession, email: str):
+    return (await db.execute(select(User).where(User.email == email))).scalar_one_or_none()
+
+@router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    if await _get_user_by_email(db, user_in.email):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered",
+        )
+
+    new_user = User(
+        name=user_in.name,
+        email=user_in.email,
+        password_hash=await get_password_hash_async(user_in.password),
+        role="USER" # Default role
+    )
+    db.add(new_user)
+    await db.commit()
+    await db.refresh(new_user)
+    return new_user
+
+@router.post("/token", response_model=Token)
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await _get_user_by_email(db, login_data.username)
+
+    if not user or not await verify_password_async(login_data.password, user.password_hash):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect email or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return issue_token(user)
@@ -0,0 +1,57 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.orm import Session
+from app.db.session import get_db
+from app.models.user import User
+from app.schemas.order import OrderResponse, SweetSalesResponse
+from app.core.deps import get_token_user, get_current_active_admin
+from app.core.pagination import encode_cursor, decode_cursor, encode_time_cursor, decode_time_cursor
+from app.services import orders
+
+router = APIRouter()
+
+@router.get("/", response_model=List[OrderResponse])
+def read_my_orders(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous X-Next-Cursor header"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_token_user)
+):
+    """
+    The current user's orders, newest first. Authenticated users.
+    """
+    try:
+        before_id = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    page = orders.user_orders(db, current_user.id, before_id, limit)
+    if len(page) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(page[-1].id)
+    return page
+
+@router.get("/sales/{sweet_id}", response_model=SweetSalesResponse)
+def read_sweet_sales(
+    sweet_id: int,
+    response: Response,
+    start: Optional[datetime] = Query(None, description="Include sales at or after this time (UTC)"),
+    end: Optional[datetime] = Query(None, description="Include sales before this time (UTC)"),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous X-Next-Cursor header"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Units, revenue and individual sales of one sweet in a time range. Only Admins.
+    """
+    try:
+        before = decode_time_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    units, revenue, sales = orders.sweet_sales(db, sweet_id, start, end, before, limit)
+    if len(sales) == limit:
+        response.headers["X-Next-Cursor"] = encode_time_cursor(sales[-1].created_at, sales[-1].id)
+    return {"sweet_id": sweet_id, "units": units, "revenue": revenue, "sales": sales}
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from app.models.user import User
+from app.core.deps import get_stream_user
+from app.services.broadcast import TooManyClients, stock_broadcaster, stream_messages
+
+# Mounted under /api/sweets ahead of the sweets router, whose /{sweet_id}
+# route would otherwise capture /stream.
+
+router = APIRouter()
+
+@router.get("/stream")
+async def stream_stock(current_user: User = Depends(get_stream_user)):
+    """
+    Live stock levels as Server-Sent Events. Authenticated users.
+
+    Events: `stock` (sweet_id, quantity, reason, updated_at) after every
+    create, update, purchase or restock; `removed` (sweet_id) after a delete;
+    `reload` when many sweets changed at once; and `dropped` just before the
+    server closes a stream that fell too far behind. After `reload`, `dropped`
+    or a reconnect, refetch the catalog.
+    """
+    try:
+        client = stock_broadcaster.connect()
+    except TooManyClients:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many open streams")
+
+    async def body():
+        try:
+            async for message in stream_messages(client):
+                yield message
+        finally:
+            stock_broadcaster.disconnect(client)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,22 @@
+import io
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.models.sweet import Sweet
 from app.models.user import User
-from app.schemas.sweet import SweetCreate, SweetUpdate, SweetResponse
-from app.core.deps import get_current_user, get_current_active_admin
+from app.schemas.sweet import SweetCreate, SweetUpdate, SweetResponse, SweetImportResponse
+from app.core.config import settings
+from app.core.deps import get_current_user, get_token_user, get_current_active_admin
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.metrics import span
+from app.core.http_cache import is_not_modified, caching_headers, not_modified
+from app.services import bulk, orders, rollups, search
+from app.services.catalog import SWEET_COLUMNS, catalog_cache, render_list, render_rows, sweet_etag
+from app.services.events import CatalogReloaded, StockChanged, SweetRemoved, event_bus, publish_levels
+from app.services.write_behind import purchase_buffer
 
 router = APIRouter()
 
@@ -27,59 +38,171 @@ def create_sweet(
     db.add(sweet)
     db.commit()
     db.refresh(sweet)
+    catalog_cache.store(sweet)
+    event_bus.publish(StockChanged.from_sweet(sweet, "create"))
     return sweet
 
 @router.get("/", response_model=List[SweetResponse])
 def read_sweets(
-    skip: int = 0,
-    limit: int = 100,
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous X-Next-Cursor header"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_token_user)
 ):
     """
     Retrieve all sweets. Authenticated users.
+
+    Pages are ordered by id. When a full page is returned, the X-Next-Cursor
+    header carries a cursor for the next one; passing it back as `cursor`
+    seeks straight to that position (and ignores `skip`), so deep pages cost
+    the same as the first one and stay stable while sweets are added or removed.
+
+    Responses carry a catalog ETag; a matching If-None-Match gets a 304.
     """
-    sweets = db.query(Sweet).offset(skip).limit(limit).all()
-    return sweets
+    # Taken before reading, so a concurrent write can only make it look older
+    etag = catalog_cache.etag(db)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    after_id = None
+    if cursor:
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+    # Served from the in-memory catalog when it is available
+    records = catalog_cache.page(db, skip=skip, limit=limit, after_id=after_id)
+    if records is not None:
+        sweets = records
+    else:
+        query = select(*SWEET_COLUMNS).order_by(Sweet.id)
+        if after_id is not None:
+            query = query.where(Sweet.id > after_id)
+        else:
+            query = query.offset(skip)
+        sweets = db.execute(query.limit(limit)).all()
+
+    headers = caching_headers(etag)
+    if sweets and len(sweets) == limit:
+        headers["X-Next-Cursor"] = encode_cursor(sweets[-1].id)
+    with span("serialize"):
+        body = render_list(records) if records is not None else render_rows(sweets)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @router.get("/search", response_model=List[SweetResponse])
 def search_sweets(
+    request: Request,
     q: Optional[str] = Query(None, description="Search by name (partial)"),
     category: Optional[str] = Query(None, description="Exact category match"),
     price_min: Optional[float] = Query(None, description="Minimum price"),
     price_max: Optional[float] = Query(None, description="Maximum price"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_token_user)
 ):
     """
-    Search sweets with filters. Authenticated users.
+    Search sweets with filters, best name matches first. Authenticated users.
     """
-    query = db.query(Sweet)
-    
-    if q:
-        query = query.filter(Sweet.name.ilike(f"%{q}%"))
-    if category:
-        query = query.filter(Sweet.category == category)
-    if price_min is not None:
-        query = query.filter(Sweet.price >= price_min)
-    if price_max is not None:
-        query = query.filter(Sweet.price <= price_max)
-        
-    sweets = query.all()
-    return sweets
+    etag = catalog_cache.etag(db)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+
+    rows = search.search_sweets(
+        db,
+        q=q,
+        category=category,
+        price_min=price_min,
+        price_max=price_max,
+        skip=skip,
+        limit=limit,
+    )
+    with span("serialize"):
+        body = render_rows(rows)
+    return Response(content=body, media_type="application/json", headers=caching_headers(etag))
+
+_NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+_EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def _upload_format(file: UploadFile) -> str:
+    filename = (file.filename or "").lower()
+    if filename.endswith((".ndjson", ".jsonl")) or file.content_type in _NDJSON_TYPES:
+        return "ndjson"
+    return "csv"
+
+@router.post("/import", response_model=SweetImportResponse, status_code=status.HTTP_200_OK)
+def import_sweets(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Create or update sweets from a CSV or NDJSON file, matched by name. Only Admins.
+
+    CSV files need a header row with name, category, price and quantity.
+    Valid rows are imported even if others fail; failures are reported by line.
+    """
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        result = bulk.import_sweets(db, stream, format or _upload_format(file), settings.BULK_CHUNK_SIZE)
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded")
+    finally:
+        # Chunks are committed as they go, so even a failed import may have
+        # changed the catalog
+        catalog_cache.invalidate()
+        purchase_buffer.forget()
+        event_bus.publish(CatalogReloaded())
+    return {
+        "msg": "Import finished",
+        "created": result.created,
+        "updated": result.updated,
+        "failed": result.failed,
+        "errors": result.errors,
+    }
+
+@router.get("/export")
+def export_sweets(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Download the whole catalog as CSV or NDJSON. Only Admins.
+    """
+    return StreamingResponse(
+        bulk.export_sweets(db, format, settings.BULK_CHUNK_SIZE),
+        media_type=_EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="sweets.{format}"'},
+    )
 
 @router.get("/{sweet_id}", response_model=SweetResponse)
 def read_sweet(
     sweet_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: User = Depends(get_token_user)
 ):
     """
     Get a specific sweet by ID. Authenticated users.
     """
-    sweet = db.query(Sweet).filter(Sweet.id == sweet_id).first()
+    cached, record = catalog_cache.get(db, sweet_id)
+    sweet = record if cached else db.query(Sweet).filter(Sweet.id == sweet_id).first()
     if not sweet:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sweet not found")
+
+    etag = sweet_etag(sweet.id, sweet.updated_at)
+    if is_not_modified(request, etag):
+        return not_modified(etag)
+    if cached:
+        return Response(content=record.json, media_type="application/json", headers=caching_headers(etag))
+    response.headers.update(caching_headers(etag))
     return sweet
 
 @router.put("/{sweet_id}", response_model=SweetResponse)
@@ -103,6 +226,9 @@ def update_sweet(
     db.add(sweet)
     db.commit()
     db.refresh(sweet)
+    catalog_cache.store(sweet)
+    purchase_buffer.forget([sweet_id])
+    event_bus.publish(StockChanged.from_sweet(sweet, "update"))
     return sweet
 
 @router.delete("/{sweet_id}", status_code=status.HTTP_200_OK)
@@ -120,30 +246,123 @@ def delete_sweet(
         
     db.delete(sweet)
     db.commit()
+    catalog_cache.remove(sweet_id)
+    purchase_buffer.forget([sweet_id])
+    event_bus.publish(SweetRemoved(sweet_id))
     return {"msg": "Sweet deleted successfully"}
 
-from app.schemas.inventory import RestockRequest
+from app.schemas.inventory import (
+    RestockRequest, BulkRestockRequest, BulkRestockResponse, PurchaseRequest, CheckoutRequest, CheckoutResponse
+)
+from app.services import inventory
+
+@router.post("/checkout", response_model=CheckoutResponse, status_code=status.HTTP_200_OK)
+def checkout(
+    checkout_in: CheckoutRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Purchase a whole cart in one transaction, all or nothing. Authenticated users.
+    """
+    lines = {}
+    for item in checkout_in.items:
+        lines[item.sweet_id] = lines.get(item.sweet_id, 0) + item.quantity
+
+    try:
+        if purchase_buffer.enabled:
+            remaining = purchase_buffer.reserve_many(lines, current_user.id)
+        else:
+            levels = inventory.checkout(db, lines)
+            orders.record_orders(db, [orders.draft_order(db, current_user.id, lines)])
+            db.commit()
+            catalog_cache.update_stock(levels.values())
+            publish_levels(levels.values(), "purchase")
+            remaining = {sweet_id: level.quantity for sweet_id, level in levels.items()}
+    except inventory.SweetNotFound as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sweet not found: {', '.join(map(str, exc.args))}"
+        )
+    except inventory.OutOfStock as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Out of stock: {', '.join(map(str, exc.args))}"
+        )
+
+    return {
+        "msg": "Checkout successful",
+        "items": [
+            {"sweet_id": sweet_id, "quantity": quantity, "remaining_quantity": remaining[sweet_id]}
+            for sweet_id, quantity in lines.items()
+        ],
+    }
+
+@router.post("/restock", response_model=BulkRestockResponse, status_code=status.HTTP_200_OK)
+def restock_sweets(
+    restock_in: BulkRestockRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    """
+    Restock many sweets in one transaction, all or nothing. Only Admins.
+    """
+    lines = {}
+    for item in restock_in.items:
+        lines[item.sweet_id] = lines.get(item.sweet_id, 0) + item.amount
+
+    try:
+        levels = inventory.restock(db, lines)
+    except inventory.SweetNotFound as exc:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Sweet not found: {', '.join(map(str, exc.args))}"
+        )
+
+    rollups.record_restock(db, lines)
+    db.commit()
+    catalog_cache.update_stock(levels.values())
+    purchase_buffer.forget(levels)
+    publish_levels(levels.values(), "restock")
+    return {
+        "msg": "Restock successful",
+        "items": [
+            {"sweet_id": sweet_id, "amount": amount, "new_quantity": levels[sweet_id].quantity}
+            for sweet_id, amount in lines.items()
+        ],
+    }
 
 @router.post("/{sweet_id}/purchase", status_code=status.HTTP_200_OK)
 def purchase_sweet(
     sweet_id: int,
+    purchase_in: Optional[PurchaseRequest] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
-    Purchase one unit of a sweet. Authenticated users.
+    Purchase units of a sweet (one unless a quantity is given). Authenticated users.
     """
-    sweet = db.query(Sweet).filter(Sweet.id == sweet_id).first()
-    if not sweet:
+    quantity = purchase_in.quantity if purchase_in else 1
+    try:
+        if purchase_buffer.enabled:
+            remaining = purchase_buffer.reserve(sweet_id, quantity, current_user.id)
+            return {"msg": "Purchase successful", "remaining_quantity": remaining}
+        level = inventory.purchase(db, sweet_id, quantity)
+    except inventory.SweetNotFound:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sweet not found")
-    
-    if sweet.quantity <= 0:
+    except inventory.OutOfStock:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Out of stock")
-        
-    sweet.quantity -= 1
-    db.add(sweet)
+
+    orders.record_orders(db, [orders.draft_order(db, current_user.id, {sweet_id: quantity})])
     db.commit()
-    return {"msg": "Purchase successful", "remaining_quantity": sweet.quantity}
+    catalog_cache.update_stock([level])
+    publish_levels([level], "purchase")
+    return {"msg": "Purchase successful", "remaining_quantity": level.quantity}
 
 @router.post("/{sweet_id}/restock", status_code=status.HTTP_200_OK)
 def restock_sweet(
@@ -155,11 +374,15 @@ def restock_sweet(
     """
     Restock sweet quantity. Only Admins.
     """
-    sweet = db.query(Sweet).filter(Sweet.id == sweet_id).first()
-    if not sweet:
+    try:
+        level = inventory.restock(db, {sweet_id: restock_in.amount})[sweet_id]
+    except inventory.SweetNotFound:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Sweet not found")
-        
-    sweet.quantity += restock_in.amount
-    db.add(sweet)
+
+    rollups.record_restock(db, {sweet_id: restock_in.amount})
     db.commit()
-    return {"msg": "Restock successful", "new_quantity": sweet.quantity}
+    catalog_cache.update_stock([level])
+    purchase_buffer.forget([sweet_id])
+    publish_levels([level], "restock")
+    return {"msg": "Restock successful", "new_quantity": level.quantity}
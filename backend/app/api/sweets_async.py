@@ -0,0 +1,179 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, status, Query, Request, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from app.db.async_session import get_async_db
+from app.db.session import get_db
+from app.models.user import User
+from app.schemas.sweet import SweetCreate, SweetUpdate, SweetResponse, SweetImportResponse
+from app.core.config import settings
+from app.schemas.inventory import (
+    RestockRequest, BulkRestockRequest, BulkRestockResponse, PurchaseRequest, CheckoutRequest, CheckoutResponse
+)
+from app.core.deps import (
+    get_current_user_async, get_token_user_async, get_current_active_admin, get_current_active_admin_async
+)
+from app.api import sweets
+from app.services import bulk
+from app.services.write_behind import purchase_buffer
+
+# Async versions of the routes in app.api.sweets, mounted instead of them when
+# DB_ASYNC is enabled. Each handler runs the sync implementation through
+# AsyncSession.run_sync: the route logic lives in one place, while every
+# database round trip is awaited on the async driver instead of occupying a
+# threadpool slot. run_sync runs the handler itself on the event loop, so work
+# that is not database round trips stays on threads: the import is a sync
+# route, and write-behind reservations go through _reserve.
+
+router = APIRouter()
+
+async def _call(db: AsyncSession, handler, **kwargs):
+    return await db.run_sync(lambda session: handler(db=session, **kwargs))
+
+async def _reserve(db: AsyncSession, handler, **kwargs):
+    # Write-behind reservations wait on the buffer's locks and seed counters
+    # through its own sync sessions. The handler only calls rollback() on the
+    # session it gets, a no-op while no transaction has begun.
+    return await run_in_threadpool(handler, db=db.sync_session, **kwargs)
+
+@router.post("/", response_model=SweetResponse, status_code=status.HTTP_201_CREATED)
+async def create_sweet(
+    sweet_in: SweetCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_admin_async)
+):
+    return await _call(db, sweets.create_sweet, sweet_in=sweet_in, current_user=current_user)
+
+@router.get("/", response_model=List[SweetResponse])
+async def read_sweets(
+    request: Request,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous X-Next-Cursor header"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_token_user_async)
+):
+    return await _call(
+        db, sweets.read_sweets, request=request,
+        skip=skip, limit=limit, cursor=cursor, current_user=current_user,
+    )
+
+@router.get("/search", response_model=List[SweetResponse])
+async def search_sweets(
+    request: Request,
+    q: Optional[str] = Query(None, description="Search by name (partial)"),
+    category: Optional[str] = Query(None, description="Exact category match"),
+    price_min: Optional[float] = Query(None, description="Minimum price"),
+    price_max: Optional[float] = Query(None, description="Maximum price"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_token_user_async)
+):
+    return await _call(
+        db, sweets.search_sweets, request=request, q=q,
+        category=category, price_min=price_min, price_max=price_max,
+        skip=skip, limit=limit, current_user=current_user,
+    )
+
+@router.post("/import", response_model=SweetImportResponse, status_code=status.HTTP_200_OK)
+def import_sweets(
+    file: UploadFile = File(...),
+    format: Optional[str] = Query(None, pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_admin)
+):
+    # Parsing and validating every row is CPU work: keep it on a threadpool thread
+    return sweets.import_sweets(file=file, format=format, db=db, current_user=current_user)
+
+@router.get("/export")
+async def export_sweets(
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_admin_async)
+):
+    # One awaited query per batch, so the event loop is free between them
+    async def body():
+        if format == "csv":
+            yield bulk.format_rows([], format, header=True)
+        after_id = 0
+        while True:
+            rows = await db.run_sync(bulk.fetch_batch, after_id, settings.BULK_CHUNK_SIZE)
+            if not rows:
+                return
+            yield bulk.format_rows(rows, format)
+            after_id = rows[-1][0]
+
+    return StreamingResponse(
+        body(),
+        media_type=sweets._EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="sweets.{format}"'},
+    )
+
+@router.get("/{sweet_id}", response_model=SweetResponse)
+async def read_sweet(
+    sweet_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_token_user_async)
+):
+    return await _call(
+        db, sweets.read_sweet, sweet_id=sweet_id, request=request,
+        response=response, current_user=current_user,
+    )
+
+@router.put("/{sweet_id}", response_model=SweetResponse)
+async def update_sweet(
+    sweet_id: int,
+    sweet_in: SweetUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_admin_async)
+):
+    return await _call(db, sweets.update_sweet, sweet_id=sweet_id, sweet_in=sweet_in, current_user=current_user)
+
+@router.delete("/{sweet_id}", status_code=status.HTTP_200_OK)
+async def delete_sweet(
+    sweet_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_admin_async)
+):
+    return await _call(db, sweets.delete_sweet, sweet_id=sweet_id, current_user=current_user)
+
+@router.post("/checkout", response_model=CheckoutResponse, status_code=status.HTTP_200_OK)
+async def checkout(
+    checkout_in: CheckoutRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    call = _reserve if purchase_buffer.enabled else _call
+    return await call(db, sweets.checkout, checkout_in=checkout_in, current_user=current_user)
+
+@router.post("/restock", response_model=BulkRestockResponse, status_code=status.HTTP_200_OK)
+async def restock_sweets(
+    restock_in: BulkRestockRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_admin_async)
+):
+    return await _call(db, sweets.restock_sweets, restock_in=restock_in, current_user=current_user)
+
+@router.post("/{sweet_id}/purchase", status_code=status.HTTP_200_OK)
+async def purchase_sweet(
+    sweet_id: int,
+    purchase_in: Optional[PurchaseRequest] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    call = _reserve if purchase_buffer.enabled else _call
+    return await call(db, sweets.purchase_sweet, sweet_id=sweet_id, purchase_in=purchase_in, current_user=current_user)
+
+@router.post("/{sweet_id}/restock", status_code=status.HTTP_200_OK)
+async def restock_sweet(
+    sweet_id: int,
+    restock_in: RestockRequest,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: User = Depends(get_current_active_admin_async)
+):
+    return await _call(db, sweets.restock_sweet, sweet_id=sweet_id, restock_in=restock_in, current_user=current_user)
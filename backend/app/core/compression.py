@@ -0,0 +1,175 @@
+import zlib
+from typing import Callable, Optional
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: pip install brotli
+    brotli = None
+
+# Bodies at least this large are compressed in a worker thread, as GZip does
+_THREAD_MINIMUM_SIZE = 128 * 1024
+
+# Already compressed, or streamed (event streams must reach the client as
+# they are written); "type/*" covers a whole type
+EXCLUDED_CONTENT_TYPES = (
+    "application/gzip", "application/x-gzip", "application/zip", "application/grpc",
+    "audio/*", "font/woff", "font/woff2", "image/avif", "image/gif", "image/jpeg",
+    "image/png", "image/webp", "text/event-stream", "video/*",
+)
+
+
+def _accepts(accept_encoding: str, coding: str) -> bool:
+    """
+    Whether an Accept-Encoding value allows `coding` (a zero q-value refuses it).
+    """
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        if name.strip() != coding:
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                return float(q[2:]) > 0
+            except ValueError:
+                return False
+        return True
+    return False
+
+
+def _excluded(content_type: str) -> bool:
+    media_type = content_type.partition(";")[0].strip().lower()
+    return media_type in EXCLUDED_CONTENT_TYPES or media_type.partition("/")[0] + "/*" in EXCLUDED_CONTENT_TYPES
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        # wbits 16 + MAX_WBITS writes the gzip header and trailer
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Streamed chunks are flushed so each one reaches the client promptly
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class BrotliEncoder:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        data = self._compressor.process(data)
+        return data + (self._compressor.finish() if final else self._compressor.flush())
+
+
+class CompressingResponder:
+    """
+    Sends one response through an encoder: the start message is held back
+    until the first body shows whether the response is worth compressing.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, coding: str, make_encoder: Callable):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.coding = coding
+        self.make_encoder = make_encoder
+        self.encoder = None
+        self.initial: Optional[Message] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def _compress(self, body: bytes, final: bool) -> bytes:
+        if len(body) >= _THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self.encoder.compress, body, final)
+        return self.encoder.compress(body, final)
+
+    async def _send_initial(self) -> None:
+        if self.initial is not None:
+            initial, self.initial = self.initial, None
+            await self.send(initial)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message.setdefault("headers", []))
+            self.passthrough = (
+                "content-encoding" in headers
+                or message["status"] == 206
+                or _excluded(headers.get("content-type", ""))
+            )
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.initial = message
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            # e.g. a pathsend in place of the body, or trailers after it
+            await self._send_initial()
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        final = not message.get("more_body", False)
+        if self.encoder is None:
+            if final and len(body) < self.minimum_size:
+                self.passthrough = True
+                await self._send_initial()
+                await self.send(message)
+                return
+            self.encoder = self.make_encoder()
+            body = await self._compress(body, final)
+            headers = MutableHeaders(raw=self.initial["headers"])
+            headers.add_vary_header("Accept-Encoding")
+            headers["Content-Encoding"] = self.coding
+            if final and not self.initial.get("trailers", False):
+                headers["Content-Length"] = str(len(body))
+            elif "content-length" in headers:
+                del headers["Content-Length"]
+            await self._send_initial()
+        else:
+            body = await self._compress(body, final)
+        await self.send({**message, "body": body})
+
+
+class CompressionMiddleware:
+    """
+    Compress responses of at least `minimum_size` bytes: with Brotli when it
+    is installed, enabled and accepted by the client, else with gzip.
+
+    Smaller bodies, already-encoded and partial responses, and the
+    EXCLUDED_CONTENT_TYPES (including text/event-stream, so live streams
+    are never buffered) pass through untouched. Written against the plain
+    ASGI interface, so it does not depend on Starlette's GZip internals.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: Optional[int] = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        # None disables Brotli even when the package is installed
+        self.brotli_quality = brotli_quality if brotli is not None else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if self.brotli_quality is not None and _accepts(accept_encoding, "br"):
+            quality = self.brotli_quality
+            responder = CompressingResponder(self.app, self.minimum_size, "br", lambda: BrotliEncoder(quality))
+        elif _accepts(accept_encoding, "gzip"):
+            level = self.gzip_level
+            responder = CompressingResponder(self.app, self.minimum_size, "gzip", lambda: GzipEncoder(level))
+        else:
+            await self.app(scope, receive, send)
+            return
+        await responder(scope, receive, send)
@@ -13,9 +13,110 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "CHANGE_THIS_TO_A_STRING_SECRET_IN_PRODUCTION"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+
+    # Authenticated-user cache
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60.0
+    # When enabled, read-only routes build the user from the token claims
+    # (sub, role, name, email) instead of looking it up. Role changes then
+    # only take effect once the token expires.
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+    # Password hashing
+    # bcrypt cost factor (log2 of the work rounds) for newly created hashes.
+    BCRYPT_ROUNDS: int = 12
+    # Size of the process pool running bcrypt off the event loop.
+    # None sizes it to the CPU count, 0 hashes in the threadpool instead.
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+
+    # Verified-token cache: bearer token -> decoded payload, until "exp"
+    TOKEN_CACHE_SIZE: int = 10000
     
+    # Catalog snapshot served by the list/detail routes
+    CATALOG_CACHE_ENABLED: bool = True
+    # Larger catalogs are not held in memory and are read from the database
+    CATALOG_CACHE_MAX_ROWS: int = 100000
+    # Cache-Control sent with catalog ETags. The default makes browsers
+    # revalidate every time (cheap 304s). Something like
+    # "public, max-age=0, s-maxage=5" lets a CDN absorb repeat traffic, at the
+    # cost of serving the catalog to anyone who reaches the CDN.
+    CATALOG_CACHE_CONTROL: str = "private, no-cache"
+    # Rows validated and written per transaction by the bulk import, and
+    # rows read per query by the streaming export
+    BULK_CHUNK_SIZE: int = 1000
+
+    # Sweets at or below this quantity raise a low-stock alert, unless a
+    # per-sweet or per-category threshold overrides it
+    LOW_STOCK_THRESHOLD: int = 5
+
+    # Live stock stream (Server-Sent Events)
+    SSE_MAX_CLIENTS: int = 10000
+    # Messages buffered per client; a client that falls further behind is dropped
+    SSE_QUEUE_SIZE: int = 100
+    SSE_HEARTBEAT_SECONDS: float = 15.0
+    # Reconnect delay suggested to browsers
+    SSE_RETRY_MS: int = 3000
+
+    # Request metrics: Server-Timing headers and GET /metrics (Prometheus)
+    METRICS_ENABLED: bool = True
+    # Requests running more SQL statements than this are logged as likely
+    # N+1 patterns and counted in http_request_query_budget_exceeded_total
+    QUERY_BUDGET: int = 20
+
+    # Statements taking at least SLOW_QUERY_MS are logged and ranked at
+    # GET /api/admin/slow-queries (None disables the timing). The first of
+    # each fingerprint also has its EXPLAIN plan captured.
+    SLOW_QUERY_MS: Optional[float] = 100.0
+    SLOW_QUERY_EXPLAIN: bool = True
+    SLOW_QUERY_MAX_FINGERPRINTS: int = 500
+
+    # Admin-triggered sampling profiler (/api/admin/profile). Idle unless
+    # started; a profile runs for at most PROFILE_MAX_SECONDS.
+    PROFILING_ENABLED: bool = True
+    PROFILE_MAX_SECONDS: float = 300.0
+
+    # Response compression. Bodies smaller than COMPRESSION_MIN_SIZE bytes,
+    # and event streams, are sent as they are. Brotli is preferred when the
+    # brotli package is installed and the client accepts it.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024
+    # zlib level 1-9; 6 gets most of the ratio of 9 for a fraction of the CPU
+    GZIP_LEVEL: int = 6
+    # Brotli quality 0-11, or None to only use gzip. Qualities above ~5 are
+    # meant for static assets, not per-request compression.
+    BROTLI_QUALITY: Optional[int] = 4
+
+    # Write-behind purchases: purchases and checkouts are reserved against
+    # in-memory stock counters and journaled, then written to the database in
+    # coalesced batches every WRITE_BEHIND_FLUSH_INTERVAL seconds. See
+    # app.services.write_behind for the durability guarantees.
+    PURCHASE_WRITE_BEHIND: bool = False
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 0.05
+    WRITE_BEHIND_JOURNAL: str = "./purchase_journal.log"
+    # fsync the journal on every purchase, so acknowledged purchases also
+    # survive a power loss (at the cost of one disk sync per purchase)
+    WRITE_BEHIND_FSYNC: bool = False
+
     # Database
     SQLALCHEMY_DATABASE_URL: str = "sqlite:///./sweet_shop.db"
+    # Engine profile: "default" keeps driver defaults; "production" enables
+    # WAL and the pragmas below (SQLite) and a pool sized per worker.
+    DB_PROFILE: str = "default"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KB: int = 64 * 1024
+    # Connections the whole deployment may hold. The production profile
+    # splits them evenly across the WEB_CONCURRENCY worker processes.
+    DB_MAX_CONNECTIONS: int = 40
+    WEB_CONCURRENCY: int = 1
+    # With WEB_CONCURRENCY > 1, how often each worker reads the sweet change
+    # log to bring its catalog cache, alerts and streams up to date. This is
+    # how stale another worker's reads can be after a write.
+    CACHE_SYNC_INTERVAL: float = 0.25
+    # Serve the auth and sweets routes with async handlers on an async engine
+    # (aiosqlite / asyncpg). The URL defaults to SQLALCHEMY_DATABASE_URL with
+    # the matching async driver.
+    DB_ASYNC: bool = False
+    SQLALCHEMY_ASYNC_DATABASE_URL: Optional[str] = None
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,12 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Convert a timezone-aware datetime to naive UTC, the form every DateTime
+    column here is stored in. Naive values are taken to be UTC already.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
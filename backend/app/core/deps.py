@@ -1,51 +1,186 @@
-from fastapi import Depends, HTTPException, status
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from jose import JWTError
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
 from app.db.session import get_db
+from app.db.async_session import get_async_db
 from app.models.user import User
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.security import decode_access_token
 
 # This scheme looks for the 'Authorization' header with 'Bearer <token>'
 # tokenUrl refers to the relative URL where the client can get a token
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+# For routes that also accept the token as a query parameter
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
+# Process-local cache of authenticated users, keyed by user id.
+# Holds plain attribute snapshots rather than ORM instances so entries never
+# get tied to (or expired by) a request's session.
+user_cache = TTLCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+_CACHED_FIELDS = ("id", "name", "email", "role")
+
+
+def invalidate_user(user_id: int) -> None:
     """
-    Dependency that validates the JWT token and retrieves the current user.
+    Drop a user from the cache, e.g. after their role was changed.
     """
-    credentials_exception = HTTPException(
+    user_cache.pop(user_id)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_flush(mapper, connection, target):
+    invalidate_user(target.id)
+    # Invalidate again on commit, in case another request re-cached the old
+    # row between our flush and commit.
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("stale_user_ids", set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    for user_id in session.info.pop("stale_user_ids", ()):
+        invalidate_user(user_id)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+
+def _decode_token(token: str) -> dict:
     try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
-    except JWTError:
-        raise credentials_exception
-    
-    user = db.query(User).filter(User.id == user_id).first()
+        payload = decode_access_token(token)
+        user_id = int(payload.get("sub"))
+    except (JWTError, TypeError, ValueError):
+        raise _credentials_exception()
+    payload["sub"] = user_id
+    return payload
+
+
+def _remember(user_id: int, user: Optional[User]) -> dict:
     if user is None:
-        raise credentials_exception
-        
+        raise _credentials_exception()
+    snapshot = {field: getattr(user, field) for field in _CACHED_FIELDS}
+    user_cache.set(user_id, snapshot)
+    return snapshot
+
+
+def _load_user(user_id: int, db: Session) -> User:
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        snapshot = _remember(user_id, db.query(User).filter(User.id == user_id).first())
+    # A transient instance: callers only read attributes from it.
+    return User(**snapshot)
+
+
+async def _load_user_async(user_id: int, db: AsyncSession) -> User:
+    snapshot = user_cache.get(user_id)
+    if snapshot is None:
+        snapshot = _remember(user_id, await db.get(User, user_id))
+    return User(**snapshot)
+
+
+def _user_from_claims(payload: dict) -> Optional[User]:
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and all(k in payload for k in ("role", "name", "email")):
+        return User(id=payload["sub"], name=payload["name"], email=payload["email"], role=payload["role"])
+    return None
+
+
+def _require_admin(user: User) -> User:
+    if user.role != "ADMIN":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="The user doesn't have enough privileges"
+        )
     return user
 
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Dependency that validates the JWT token and retrieves the current user.
+    """
+    payload = _decode_token(token)
+    return _load_user(payload["sub"], db)
+
+
+def get_token_user(
+    token: str = Depends(oauth2_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Dependency for read-only routes.
+
+    With AUTH_TRUST_TOKEN_CLAIMS enabled the user is built from the claims
+    embedded at login, without any database access. Otherwise it behaves
+    like `get_current_user`.
+    """
+    payload = _decode_token(token)
+    return _user_from_claims(payload) or _load_user(payload["sub"], db)
+
+
+def get_stream_user(
+    header_token: Optional[str] = Depends(oauth2_scheme_optional),
+    token: Optional[str] = Query(None, description="Bearer token, for clients such as EventSource that cannot send headers"),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Dependency for long-lived streams: like `get_token_user`, but the token
+    may also come from the `token` query parameter. Query strings can end up
+    in access logs, so prefer the header where the client allows it.
+
+    The session is closed before returning, so an open stream does not hold
+    a pooled connection.
+    """
+    if not (header_token or token):
+        raise _credentials_exception()
+    try:
+        return get_token_user(header_token or token, db)
+    finally:
+        db.close()
+
+
 def get_current_active_admin(
     current_user: User = Depends(get_current_user)
 ) -> User:
     """
     Dependency that ensures the authenticated user has ADMIN role.
     """
-    if current_user.role != "ADMIN":
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="The user doesn't have enough privileges"
-        )
-    return current_user
+    return _require_admin(current_user)
+
+
+# Async variants, used by the routers selected with DB_ASYNC
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    payload = _decode_token(token)
+    return await _load_user_async(payload["sub"], db)
+
+
+async def get_token_user_async(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+) -> User:
+    payload = _decode_token(token)
+    return _user_from_claims(payload) or await _load_user_async(payload["sub"], db)
+
+
+async def get_current_active_admin_async(
+    current_user: User = Depends(get_current_user_async)
+) -> User:
+    return _require_admin(current_user)
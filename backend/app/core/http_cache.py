@@ -0,0 +1,29 @@
+from typing import Dict
+from fastapi import Request, Response, status
+from app.core.config import settings
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison (RFC 9110 8.8.3.2): W/"x" and "x" are the same tag
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    True when the request's If-None-Match already names `etag`.
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return _opaque(etag) in {_opaque(tag) for tag in header.split(",")}
+
+
+def caching_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": settings.CATALOG_CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=caching_headers(etag))
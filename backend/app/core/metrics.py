@@ -0,0 +1,281 @@
+import bisect
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+# Route label of requests no route matched, so stray paths cannot create series
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestStats:
+    """
+    What one request spent: SQL statements and their time, and named spans.
+    """
+    __slots__ = ("queries", "db_seconds", "statements", "spans")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Counter = Counter()
+        self.spans: Dict[str, float] = defaultdict(float)
+
+
+# Stats of the request being handled. Sync routes and dependencies run in
+# threadpool threads with a copy of the request's context, so they see (and
+# update) the same object.
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def current() -> Optional[RequestStats]:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """
+    Add the time spent in the block to the current request's `name` span
+    (shown in its Server-Timing header). Does nothing outside a request.
+    """
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.spans[name] += time.perf_counter() - started
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context rather than the connection: a statement
+    # that fails never reaches after_cursor_execute, and its context goes
+    # away with it instead of leaving state on a pooled connection
+    if context is not None and _current.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    started = getattr(context, "_metrics_started", None)
+    if stats is None or started is None:
+        return
+    stats.db_seconds += time.perf_counter() - started
+    stats.queries += 1
+    stats.statements[statement] += 1
+
+
+def install(engine: Engine) -> None:
+    """
+    Count the statements `engine` runs, and their time, against the current
+    request. Safe to call more than once. For an AsyncEngine, pass its
+    `sync_engine`.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Tuple) -> str:
+    return ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram per label set, in the Prometheus sense.
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str], buckets: Sequence[float]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [count per bucket (+Inf last), sum]
+        self._series: Dict[Tuple, list] = {}
+
+    def observe(self, labels: Tuple, value: float) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def clear(self) -> None:
+        self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in sorted(self._series.items()):
+            base = _labels(self.labels, labels)
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base},le="{bound}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+class CounterMetric:
+    """
+    Monotonic counter per label set.
+    """
+
+    def __init__(self, name: str, help: str, labels: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._series: Dict[Tuple, float] = defaultdict(float)
+
+    def inc(self, labels: Tuple, amount: float = 1) -> None:
+        self._series[labels] += amount
+
+    def clear(self) -> None:
+        self._series.clear()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._series.items()):
+            lines.append(f"{self.name}{{{_labels(self.labels, labels)}}} {value}")
+        return lines
+
+
+class RequestMetrics:
+    """
+    Per-route request metrics of this process, rendered in the Prometheus
+    text format. With several workers each one keeps (and serves) its own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = Histogram(
+            "http_request_duration_seconds", "Time to handle a request.",
+            ("method", "route", "status"), LATENCY_BUCKETS,
+        )
+        self.queries = Histogram(
+            "http_request_db_queries", "SQL statements run by a request.",
+            ("method", "route"), QUERY_BUCKETS,
+        )
+        self.db_time = Histogram(
+            "http_request_db_seconds", "Time a request spent in SQL statements.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+        self.over_budget = CounterMetric(
+            "http_request_query_budget_exceeded_total",
+            "Requests that ran more SQL statements than QUERY_BUDGET (likely N+1 queries).",
+            ("method", "route"),
+        )
+
+    def observe(self, method: str, route: str, status: int, seconds: float, stats: RequestStats) -> None:
+        with self._lock:
+            self.latency.observe((method, route, str(status)), seconds)
+            self.queries.observe((method, route), stats.queries)
+            self.db_time.observe((method, route), stats.db_seconds)
+            if stats.queries > settings.QUERY_BUDGET:
+                self.over_budget.inc((method, route))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = (self.latency, self.queries, self.db_time, self.over_budget)
+            return "\n".join(line for metric in metrics for line in metric.render()) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            for metric in (self.latency, self.queries, self.db_time, self.over_budget):
+                metric.clear()
+
+
+def route_template(scope: Scope) -> str:
+    """
+    The matched route as a path template, e.g. /api/sweets/{sweet_id}, built
+    from the request path and its path parameters (routes of included
+    routers do not know their prefix).
+    """
+    if scope.get("route") is None:
+        return UNMATCHED_ROUTE
+    names = {str(value): name for name, value in scope.get("path_params", {}).items()}
+    return "/".join(
+        f"{{{names[segment]}}}" if segment in names else segment for segment in scope["path"].split("/")
+    )
+
+
+def server_timing(stats: RequestStats, seconds: float) -> str:
+    """
+    Server-Timing value: total time, SQL time and count, and named spans.
+    """
+    entries = [
+        f"app;dur={seconds * 1000:.2f}",
+        f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries"',
+    ]
+    entries += [f"{name};dur={value * 1000:.2f}" for name, value in stats.spans.items()]
+    return ", ".join(entries)
+
+
+class MetricsMiddleware:
+    """
+    Times every HTTP request, counts its SQL statements (see `install`),
+    adds a Server-Timing header and records the result in `request_metrics`
+    under the matched route's path template.
+
+    A request running more than QUERY_BUDGET statements is logged with its
+    most repeated statement, which for an N+1 pattern is the per-row query.
+    Server-Timing reflects the request up to its first response message, so
+    for streamed bodies it covers only the handler.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing(stats, time.perf_counter() - started))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            elapsed = time.perf_counter() - started
+            route = route_template(scope)
+            request_metrics.observe(scope["method"], route, status_code, elapsed, stats)
+            if stats.queries > settings.QUERY_BUDGET:
+                statement, repeats = stats.statements.most_common(1)[0]
+                logger.warning(
+                    "%s %s ran %d SQL statements (budget %d); most repeated (%dx): %s",
+                    scope["method"], route, stats.queries, settings.QUERY_BUDGET, repeats,
+                    " ".join(statement.split())[:200],
+                )
+
+
+request_metrics = RequestMetrics()
@@ -0,0 +1,55 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def _encode(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def _decode(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Invalid cursor") from exc
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid cursor")
+    return payload
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Build the opaque cursor pointing just after the row with `last_id`.
+    """
+    return _encode({"id": last_id})
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Return the id encoded in a cursor. Raises ValueError if it is malformed.
+    """
+    last_id = _decode(cursor).get("id")
+    if not isinstance(last_id, int):
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def encode_time_cursor(last_at: datetime, last_id: int) -> str:
+    """
+    Cursor for listings ordered by (timestamp, id).
+    """
+    return _encode({"at": last_at.isoformat(), "id": last_id})
+
+
+def decode_time_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Return the (timestamp, id) in a time cursor. Raises ValueError if it is malformed.
+    """
+    payload = _decode(cursor)
+    last_id = payload.get("id")
+    if not isinstance(last_id, int) or not isinstance(payload.get("at"), str):
+        raise ValueError("Invalid cursor")
+    return datetime.fromisoformat(payload["at"]), last_id
@@ -0,0 +1,198 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# A thread whose innermost Python frame is in one of these is waiting (on a
+# lock, a queue or the event loop's selector), not using CPU
+_IDLE_FILES = ("threading.py", "selectors.py", "queue.py")
+
+_PARAMETER = re.compile(r"\\\{\w+\\\}")
+
+
+def route_pattern(template: str) -> "re.Pattern":
+    """
+    Compile a path template like /api/sweets/{sweet_id} (the route labels
+    used in /metrics) to a regex matching the request paths it covers.
+    """
+    return re.compile(_PARAMETER.sub("[^/]+", re.escape(template.rstrip("/"))) + "/?")
+
+
+class SamplingProfiler:
+    """
+    Statistical CPU profiler: a background thread snapshots the Python stack
+    of every other thread every `interval` seconds (sys._current_frames) and
+    counts identical stacks. Nothing is traced, so the profiled code runs at
+    full speed; the cost is one short GIL hold per sample.
+
+    Without a route and with sample_rate 1 the whole process is sampled for
+    the window. Otherwise only a `sample_rate` fraction of the requests
+    matching `route` (all requests if None) is selected, and samples are
+    taken only while a selected request is in flight. Stacks are per process
+    and not per request, so with concurrent traffic other requests' stacks
+    can appear too. Idle threads are left out, and so is work handed to
+    other processes, such as the bcrypt pool.
+
+    The result is in the collapsed-stack format read by flamegraph.pl and
+    speedscope: one `outermost;...;innermost count` line per stack.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stacks: Counter = Counter()
+        self._labels: Dict[object, str] = {}
+        self._route: Optional["re.Pattern"] = None
+        self._request_mode = False
+        self._sample_rate = 1.0
+        self._active = 0
+        self._session: Optional[dict] = None
+        self.samples = 0
+        self.requests = 0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, interval: float = 0.01, route: Optional[str] = None,
+              sample_rate: float = 1.0) -> None:
+        """
+        Start sampling for at most `seconds`, discarding the previous profile.
+        Raises RuntimeError if a profile is already running.
+        """
+        with self._lock:
+            if self.running:
+                raise RuntimeError("A profile is already running")
+            self._stop.clear()
+            self._stacks.clear()
+            self._route = route_pattern(route) if route else None
+            self._request_mode = route is not None or sample_rate < 1
+            self._sample_rate = sample_rate
+            self._active = 0
+            self.samples = 0
+            self.requests = 0
+            now = datetime.utcnow()
+            self._session = {
+                "mode": "requests" if self._request_mode else "window",
+                "route": route,
+                "sample_rate": sample_rate,
+                "interval_ms": interval * 1000,
+                "started_at": now,
+                "ends_at": now + timedelta(seconds=seconds),
+            }
+            self._thread = threading.Thread(
+                target=self._run, args=(interval, time.monotonic() + seconds),
+                name="sampling-profiler", daemon=True,
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def selects(self, path: str) -> bool:
+        """
+        Whether a request to `path` should be profiled. Cheap when idle.
+        """
+        if not self._request_mode or not self.running:
+            return False
+        if self._route is not None and not self._route.fullmatch(path):
+            return False
+        return self._sample_rate >= 1 or random.random() < self._sample_rate
+
+    def enter(self) -> None:
+        with self._lock:
+            self._active += 1
+            self.requests += 1
+
+    def exit(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            path = filename = code.co_filename
+            # Shortest name relative to sys.path: app/services/catalog.py, sqlalchemy/orm/query.py
+            for root in sys.path:
+                if root and filename.startswith(root + os.sep) and len(filename) - len(root) - 1 < len(path):
+                    path = filename[len(root) + 1:]
+            name = getattr(code, "co_qualname", code.co_name)
+            label = self._labels[code] = f"{path}:{name}".replace(";", ":").replace(" ", "_")
+        return label
+
+    def _collapse(self, frame) -> Optional[str]:
+        if os.path.basename(frame.f_code.co_filename) in _IDLE_FILES:
+            return None
+        labels = []
+        while frame is not None:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ";".join(reversed(labels))
+
+    def _run(self, interval: float, deadline: float) -> None:
+        me = threading.get_ident()
+        while not self._stop.wait(interval) and time.monotonic() < deadline:
+            if self._request_mode and not self._active:
+                continue
+            stacks = [self._collapse(frame) for ident, frame in sys._current_frames().items() if ident != me]
+            with self._lock:
+                self.samples += 1
+                self._stacks.update(stack for stack in stacks if stack)
+        with self._lock:
+            self._session["ends_at"] = datetime.utcnow()
+
+    def status(self) -> Optional[dict]:
+        """
+        The current or last profile's parameters and progress, or None if
+        nothing has been profiled yet.
+        """
+        with self._lock:
+            if self._session is None:
+                return None
+            return {
+                **self._session,
+                "running": self.running,
+                "samples": self.samples,
+                "requests": self.requests if self._request_mode else None,
+                "stacks": len(self._stacks),
+            }
+
+    def collapsed(self) -> str:
+        """
+        The stacks sampled so far, one `frame;frame;... count` line each.
+        """
+        with self._lock:
+            return "".join(f"{stack} {count}\n" for stack, count in sorted(self._stacks.items()))
+
+
+profiler = SamplingProfiler()
+
+
+class ProfilingMiddleware:
+    """
+    Marks the requests `profiler` selects as in flight, so that in request
+    mode it samples only while they are being handled.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not profiler.selects(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        profiler.enter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            profiler.exit()
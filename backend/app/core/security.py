@@ -1,8 +1,23 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import jwt
 import bcrypt
+from starlette.concurrency import run_in_threadpool
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Tokens whose signature and claims were already verified, mapped to their
+# payload. Each entry lives exactly until the token's "exp" claim.
+token_cache = TTLCache(settings.TOKEN_CACHE_SIZE, settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     # bcrypt.checkpw requires bytes
@@ -11,11 +26,57 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         hashed_password.encode('utf-8')
     )
 
-def get_password_hash(password: str) -> str:
+def get_password_hash(password: str, rounds: Optional[int] = None) -> str:
     # bcrypt.hashpw returns bytes. We verify by decoding to utf-8 for storage.
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
+    hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
+# bcrypt is CPU bound and holds the GIL for most of its run, so the async
+# variants below hand it to a dedicated pool of worker processes. The pool is
+# created on first use and torn down on application shutdown.
+_password_pool: Optional[Executor] = None
+_password_pool_lock = threading.Lock()
+
+def _get_password_pool() -> Optional[Executor]:
+    global _password_pool
+    if settings.PASSWORD_HASH_WORKERS == 0:
+        return None
+    with _password_pool_lock:
+        if _password_pool is None:
+            try:
+                # spawn: forking a process that runs the server's threads is unsafe
+                _password_pool = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            except (OSError, NotImplementedError) as exc:
+                # Some serverless runtimes have no process support at all
+                logger.warning("Password hashing pool unavailable, using threads: %s", exc)
+                return None
+        return _password_pool
+
+def shutdown_password_pool() -> None:
+    global _password_pool
+    with _password_pool_lock:
+        if _password_pool is not None:
+            _password_pool.shutdown(wait=True)
+            _password_pool = None
+
+async def _run_password_job(func, *args):
+    pool = _get_password_pool()
+    with span("bcrypt"):
+        if pool is None:
+            return await run_in_threadpool(func, *args)
+        return await asyncio.get_running_loop().run_in_executor(pool, func, *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    # Pass the cost explicitly: pool workers load their own settings
+    return await _run_password_job(get_password_hash, password, settings.BCRYPT_ROUNDS)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     if expires_delta:
@@ -26,3 +87,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
+
+def decode_access_token(token: str) -> dict:
+    """
+    Verify a token and return a copy of its payload.
+
+    Repeat calls with the same token are answered from `token_cache` without
+    re-checking the signature. Raises JWTError for invalid or expired tokens.
+    """
+    payload = token_cache.get(token)
+    if payload is None:
+        with span("jwt"):
+            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        exp = payload.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        if ttl is None or ttl > 0:
+            token_cache.set(token, payload, ttl=ttl)
+    return dict(payload)
@@ -0,0 +1,203 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EXPLAIN_PREFIX = {"sqlite": "EXPLAIN QUERY PLAN ", "postgresql": "EXPLAIN "}
+# Statements whose plan is worth capturing. EXPLAIN runs them through the
+# planner again, after they have already run, so DDL and INSERTs are left out
+_EXPLAINABLE = ("SELECT", "UPDATE", "DELETE")
+_SAVEPOINT = "slow_query_explain"
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"\?|%\(\w+\)s|%s|:\w+|\$\d+")
+# A parenthesised run of placeholders, e.g. an expanded IN list
+_PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Normalize a statement so that executions differing only in literal
+    values, placeholder style or IN-list length share one fingerprint.
+    """
+    normalized = _STRING.sub("?", statement)
+    normalized = _NUMBER.sub("?", normalized)
+    normalized = _PLACEHOLDER.sub("?", normalized)
+    normalized = _PLACEHOLDER_LIST.sub("(?...)", normalized)
+    return " ".join(normalized.split())
+
+
+def _misses_index(plan: List[str]) -> bool:
+    # SQLite reports a full table scan as "SCAN <table>"; index scans name the index
+    return any(
+        line.lstrip("|-` ").startswith("SCAN ") and "INDEX" not in line
+        and "VIRTUAL TABLE" not in line and "CONSTANT ROW" not in line
+        for line in plan
+    )
+
+
+class SlowQuery:
+    """
+    Executions of one statement fingerprint that exceeded SLOW_QUERY_MS.
+    """
+    __slots__ = ("id", "statement", "count", "total_ms", "max_ms", "last_seen", "plan")
+
+    def __init__(self, statement: str):
+        self.id = hashlib.sha1(statement.encode()).hexdigest()[:12]
+        self.statement = statement
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_seen: Optional[datetime] = None
+        self.plan: Optional[List[str]] = None
+
+    def as_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "last_seen": self.last_seen,
+            "plan": self.plan,
+            "full_scan": _misses_index(self.plan or []),
+        }
+
+
+class SlowQueryLog:
+    """
+    Statements slower than SLOW_QUERY_MS, aggregated by fingerprint.
+
+    Every slow execution is logged. The first one of each fingerprint also
+    has its plan captured (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on
+    PostgreSQL) on the same connection, in a savepoint on PostgreSQL, and
+    with the same parameters, so the plan is the one the statement actually
+    got. At most SLOW_QUERY_MAX_FINGERPRINTS are kept; beyond that the one
+    with the least total time is evicted.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queries: Dict[str, SlowQuery] = {}
+
+    def _explain(self, conn, statement: str, parameters) -> Optional[List[str]]:
+        prefix = _EXPLAIN_PREFIX.get(conn.dialect.name)
+        if prefix is None or not statement.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        if isinstance(parameters, list):
+            # executemany: every row runs the same plan
+            parameters = parameters[0] if parameters else ()
+        # A raw DB-API cursor, so the EXPLAIN is neither timed nor logged
+        # itself. It runs in the application's transaction. On PostgreSQL a
+        # failed statement would abort that transaction, so it runs inside a
+        # savepoint there. SQLite's EXPLAIN QUERY PLAN cannot abort it, and
+        # SQLite refuses a savepoint while an UPDATE ... RETURNING still has
+        # rows to hand back.
+        savepoint = conn.dialect.name != "sqlite"
+        cursor = conn.connection.cursor()
+        try:
+            if savepoint:
+                cursor.execute(f"SAVEPOINT {_SAVEPOINT}")
+            try:
+                cursor.execute(prefix + statement, parameters or ())
+                rows = cursor.fetchall()
+            except Exception as exc:
+                if savepoint:
+                    cursor.execute(f"ROLLBACK TO SAVEPOINT {_SAVEPOINT}")
+                return [f"EXPLAIN failed: {exc}"]
+            finally:
+                if savepoint:
+                    cursor.execute(f"RELEASE SAVEPOINT {_SAVEPOINT}")
+        except Exception as exc:
+            return [f"EXPLAIN failed: {exc}"]
+        finally:
+            cursor.close()
+        if conn.dialect.name == "sqlite":
+            # (id, parent, notused, detail): indent children under their parent
+            depth = {0: -1}
+            lines = []
+            for node_id, parent, _, detail in rows:
+                depth[node_id] = depth.get(parent, -1) + 1
+                lines.append("  " * depth[node_id] + detail)
+            return lines
+        return [row[0] for row in rows]
+
+    def record(self, conn, statement: str, parameters, elapsed_ms: float) -> None:
+        key = fingerprint(statement)
+        with self._lock:
+            query = self._queries.get(key)
+            new = query is None
+            if new:
+                if len(self._queries) >= settings.SLOW_QUERY_MAX_FINGERPRINTS:
+                    evicted = min(self._queries, key=lambda k: self._queries[k].total_ms)
+                    del self._queries[evicted]
+                query = self._queries[key] = SlowQuery(key)
+            query.count += 1
+            query.total_ms += elapsed_ms
+            query.max_ms = max(query.max_ms, elapsed_ms)
+            query.last_seen = datetime.utcnow()
+
+        if new and settings.SLOW_QUERY_EXPLAIN:
+            plan = self._explain(conn, statement, parameters)
+            with self._lock:
+                query.plan = plan
+            logger.warning("Slow query [%s] %.1f ms: %s\n%s", query.id, elapsed_ms, key, "\n".join(plan or ()))
+        else:
+            logger.warning("Slow query [%s] %.1f ms", query.id, elapsed_ms)
+
+    def worst(self, limit: int = 20, order_by: str = "total_ms") -> List[dict]:
+        """
+        The recorded fingerprints, worst first by `order_by`: total_ms,
+        max_ms, mean_ms or count.
+        """
+        with self._lock:
+            queries = [query.as_dict() for query in self._queries.values()]
+        return sorted(queries, key=lambda q: q[order_by], reverse=True)[:limit]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._queries.clear()
+
+
+slow_query_log = SlowQueryLog()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, so a statement that fails leaves nothing
+    # behind on the pooled connection (see app.core.metrics)
+    if context is not None and settings.SLOW_QUERY_MS is not None:
+        context._slow_query_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_slow_query_started", None)
+    if started is None:
+        return
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    threshold = settings.SLOW_QUERY_MS
+    if threshold is not None and elapsed_ms >= threshold:
+        try:
+            slow_query_log.record(conn, statement, parameters, elapsed_ms)
+        except Exception:
+            logger.exception("Could not record a slow query")
+
+
+def install(engine: Engine) -> None:
+    """
+    Time every statement `engine` runs and record the slow ones in
+    `slow_query_log`. Safe to call more than once. For an AsyncEngine, pass
+    its `sync_engine`.
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,61 @@
+import threading
+from typing import AsyncGenerator, Optional
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.core.metrics import install as install_metrics
+from app.core.slow_queries import install as install_slow_query_log
+from app.db.session import apply_sqlite_pragmas, engine_options
+
+# Async drivers for the sync URLs we support. aiosqlite/asyncpg are only
+# imported when the async engine is first created, i.e. when DB_ASYNC is on.
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+}
+
+
+def to_async_url(url: str) -> str:
+    """
+    Map a sync database URL to its async driver, e.g. sqlite:// -> sqlite+aiosqlite://.
+    """
+    scheme, rest = url.split("://", 1)
+    return f"{_ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+
+_async_engine: Optional[AsyncEngine] = None
+_async_sessionmaker: Optional[async_sessionmaker] = None
+_lock = threading.Lock()
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    global _async_engine, _async_sessionmaker
+    with _lock:
+        if _async_sessionmaker is None:
+            url = settings.SQLALCHEMY_ASYNC_DATABASE_URL or to_async_url(settings.SQLALCHEMY_DATABASE_URL)
+            kwargs, tune_sqlite = engine_options(url, settings.DB_PROFILE)
+            kwargs.get("connect_args", {}).pop("check_same_thread", None)
+            _async_engine = create_async_engine(url, **kwargs)
+            if tune_sqlite:
+                event.listen(_async_engine.sync_engine, "connect", apply_sqlite_pragmas)
+            install_metrics(_async_engine.sync_engine)
+            install_slow_query_log(_async_engine.sync_engine)
+            _async_sessionmaker = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=True)
+        return _async_sessionmaker
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_sessionmaker
+    engine, _async_engine, _async_sessionmaker = _async_engine, None, None
+    if engine is not None:
+        await engine.dispose()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Async counterpart of get_db, used by the routers selected with DB_ASYNC.
+    """
+    async with get_async_sessionmaker()() as db:
+        yield db
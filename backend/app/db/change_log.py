@@ -0,0 +1,74 @@
+from sqlalchemy import column, func, select, table
+
+# SQLite log of the ids of changed sweets, one row per committed insert,
+# update or delete, written by triggers so that every code path (ORM, bulk
+# Core statements, other processes) is covered. Worker processes read it to
+# keep their in-memory state coherent (see app.services.change_feed). The
+# triggers cost every write two extra statements, so init_db installs them
+# only when WEB_CONCURRENCY > 1 and removes them otherwise.
+# AUTOINCREMENT makes ids strictly increasing and never reused, so a reader
+# can tell from a gap that rows it had not read yet were pruned.
+CHANGE_LOG_TABLE = "sweet_changes"
+
+# Rows kept; each write prunes the log back to this many
+CHANGE_LOG_RETENTION = 10000
+
+sweet_changes = table(CHANGE_LOG_TABLE, column("id"), column("sweet_id"))
+
+_LOG = (
+    "INSERT INTO sweet_changes(sweet_id) VALUES (%s); "
+    f"DELETE FROM sweet_changes WHERE id <= last_insert_rowid() - {CHANGE_LOG_RETENTION};"
+)
+
+_TRIGGERS = ("sweet_changes_ai", "sweet_changes_au", "sweet_changes_ad")
+
+_STATEMENTS = (
+    "CREATE TABLE IF NOT EXISTS sweet_changes ("
+    "id INTEGER PRIMARY KEY AUTOINCREMENT, sweet_id INTEGER NOT NULL)",
+
+    "CREATE TRIGGER IF NOT EXISTS sweet_changes_ai AFTER INSERT ON sweets BEGIN "
+    + _LOG % "new.id" + " END",
+
+    "CREATE TRIGGER IF NOT EXISTS sweet_changes_au AFTER UPDATE ON sweets BEGIN "
+    + _LOG % "new.id" + " END",
+
+    "CREATE TRIGGER IF NOT EXISTS sweet_changes_ad AFTER DELETE ON sweets BEGIN "
+    + _LOG % "old.id" + " END",
+)
+
+
+def create_change_log(connection) -> bool:
+    """
+    Create the change log and its triggers if missing. Safe to call
+    repeatedly. Returns False on databases other than SQLite.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+    for statement in _STATEMENTS:
+        connection.exec_driver_sql(statement)
+    return True
+
+
+def drop_change_log(connection) -> None:
+    """
+    Drop the change log and its triggers, if present.
+    """
+    if connection.dialect.name == "sqlite":
+        for trigger in _TRIGGERS:
+            connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {trigger}")
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {CHANGE_LOG_TABLE}")
+
+
+def has_change_log(connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (CHANGE_LOG_TABLE,)
+    ).first() is not None
+
+
+def last_change_id(connection) -> int:
+    """
+    Id of the newest change-log entry, or 0 if the log is empty.
+    """
+    return connection.execute(select(func.max(sweet_changes.c.id))).scalar() or 0
@@ -1,5 +1,21 @@
+from app.core.config import settings
 from app.db.session import engine
 from app.db.base import Base
+from app.db.change_log import create_change_log, drop_change_log
+from app.db.search_index import create_search_index
+from app.models.sweet import Sweet
 
 def init_db():
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so bring indexes of older
+    # databases up to date as well
+    with engine.begin() as connection:
+        for index in Sweet.__table__.indexes:
+            index.create(connection, checkfirst=True)
+        create_search_index(connection)
+        # Only other workers read the change log; a single process would
+        # just pay for its triggers on every write
+        if settings.WEB_CONCURRENCY > 1:
+            create_change_log(connection)
+        else:
+            drop_change_log(connection)
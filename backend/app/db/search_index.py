@@ -0,0 +1,67 @@
+import logging
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# SQLite FTS5 index over sweets.name. It is an external-content table: it
+# stores only the trigram index and reads names back from `sweets`.
+# Triggers keep it in sync with every insert, delete and rename, whichever
+# code path issues them.
+FTS_TABLE = "sweets_fts"
+
+_STATEMENTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS sweets_fts USING fts5("
+    "name, content='sweets', content_rowid='id', tokenize='trigram')",
+
+    "CREATE TRIGGER IF NOT EXISTS sweets_fts_ai AFTER INSERT ON sweets BEGIN "
+    "INSERT INTO sweets_fts(rowid, name) VALUES (new.id, new.name); END",
+
+    "CREATE TRIGGER IF NOT EXISTS sweets_fts_ad AFTER DELETE ON sweets BEGIN "
+    "INSERT INTO sweets_fts(sweets_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+
+    "CREATE TRIGGER IF NOT EXISTS sweets_fts_au AFTER UPDATE OF name ON sweets BEGIN "
+    "INSERT INTO sweets_fts(sweets_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+    "INSERT INTO sweets_fts(rowid, name) VALUES (new.id, new.name); END",
+)
+
+
+def create_search_index(connection) -> bool:
+    """
+    Create the FTS index and its triggers if missing. Safe to call repeatedly.
+
+    A freshly created index is backfilled from the existing rows. Returns
+    False on other databases or SQLite builds without FTS5 trigram support;
+    search then falls back to plain LIKE filtering.
+    """
+    if connection.dialect.name != "sqlite":
+        return False
+
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first()
+    try:
+        for statement in _STATEMENTS:
+            connection.exec_driver_sql(statement)
+    except OperationalError as exc:
+        logger.warning("Full-text search index unavailable: %s", exc)
+        return False
+
+    if not exists:
+        connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def drop_search_index(connection) -> None:
+    """
+    Drop the FTS index. Its triggers go away with the `sweets` table.
+    """
+    if connection.dialect.name == "sqlite":
+        connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+
+def has_search_index(connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    return connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).first() is not None
@@ -1,14 +1,61 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import install as install_metrics
+from app.core.slow_queries import install as install_slow_query_log
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers proceed while a purchase holds the write lock, and
+    # synchronous=NORMAL only fsyncs at checkpoints (still crash-safe in WAL).
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    # A negative cache_size is a budget in KiB rather than in pages
+    cursor.execute(f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def engine_options(url: str, profile: str):
+    """
+    Return (create_engine kwargs, whether to apply the SQLite pragmas) for a
+    URL and profile. Shared by the sync and async engines.
+    """
+    is_sqlite = url.startswith("sqlite")
+    in_memory = is_sqlite and (url.split("://", 1)[-1] in ("", "/:memory:") or "mode=memory" in url)
+
+    kwargs = {}
+    if is_sqlite:
+        # check_same_thread=False is needed only for SQLite. It lets more than one thread
+        # interact with the database in the same connection.
+        kwargs["connect_args"] = {"check_same_thread": False}
+    if profile == "production" and not in_memory:
+        kwargs["pool_size"] = max(2, settings.DB_MAX_CONNECTIONS // max(1, settings.WEB_CONCURRENCY))
+        kwargs["max_overflow"] = 0
+    return kwargs, profile == "production" and is_sqlite and not in_memory
+
+
+def create_db_engine(url: str = None, profile: str = None) -> Engine:
+    """
+    Create an engine for `url` using the given profile (see DB_PROFILE).
+    """
+    url = url or settings.SQLALCHEMY_DATABASE_URL
+    kwargs, tune_sqlite = engine_options(url, profile or settings.DB_PROFILE)
+    engine = create_engine(url, **kwargs)
+    if tune_sqlite:
+        event.listen(engine, "connect", apply_sqlite_pragmas)
+    return engine
+
 
 # Create the SQLAlchemy engine
-# check_same_thread=False is needed only for SQLite. It lets more than one thread
-# interact with the database in the same connection.
-engine = create_engine(
-    settings.SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+engine = create_db_engine()
+install_metrics(engine)
+install_slow_query_log(engine)
 
 # Create a SessionLocal class
 # Each instance of this class will be a database session
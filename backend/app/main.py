@@ -3,7 +3,11 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.core.config import settings
+from app.core.compression import CompressionMiddleware
+from app.core.metrics import MetricsMiddleware, request_metrics
+from app.core.profiling import ProfilingMiddleware, profiler
 
 from app.db.session import engine
 
@@ -12,6 +16,12 @@ from app.db.base import Base
 from app.models import User, Sweet
 from app.api.auth import router as auth_router
 from app.api.sweets import router as sweets_router
+from app.api.auth_async import router as auth_async_router
+from app.api.sweets_async import router as sweets_async_router
+from app.api.admin import router as admin_router
+from app.api.stream import router as stream_router
+from app.api.orders import router as orders_router
+from app.api.analytics import router as analytics_router
 from jose import jwt
 
 
@@ -24,10 +34,42 @@ def create_application() -> FastAPI:
         version=settings.PROJECT_VERSION,
         description="Backend for Sweet Shop Management System",
     )
-    
+    # Per-request latency and SQL statement counts: Server-Timing headers and /metrics
+    if settings.METRICS_ENABLED:
+        application.add_middleware(MetricsMiddleware)
+    if settings.PROFILING_ENABLED:
+        application.add_middleware(ProfilingMiddleware)
+    # Add CORS Middleware
+    application.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
+    )
+    # Outermost, so every other middleware sees the uncompressed body
+    if settings.COMPRESSION_ENABLED:
+        application.add_middleware(
+            CompressionMiddleware,
+            minimum_size=settings.COMPRESSION_MIN_SIZE,
+            gzip_level=settings.GZIP_LEVEL,
+            brotli_quality=settings.BROTLI_QUALITY,
+        )
+
     # Register Routers
-    application.include_router(auth_router, prefix="/auth", tags=["Authentication"])
-    application.include_router(sweets_router, prefix="/api/sweets", tags=["Sweets"])
+    # Static /api/sweets paths that the sweets routers would read as a sweet id
+    application.include_router(stream_router, prefix="/api/sweets", tags=["Sweets"])
+    # DB_ASYNC swaps in the async-engine versions of the auth and sweets routes
+    if settings.DB_ASYNC:
+        application.include_router(auth_async_router, prefix="/auth", tags=["Authentication"])
+        application.include_router(sweets_async_router, prefix="/api/sweets", tags=["Sweets"])
+    else:
+        application.include_router(auth_router, prefix="/auth", tags=["Authentication"])
+        application.include_router(sweets_router, prefix="/api/sweets", tags=["Sweets"])
+    application.include_router(orders_router, prefix="/api/orders", tags=["Orders"])
+    application.include_router(analytics_router, prefix="/api/sweets/analytics", tags=["Analytics"])
+    application.include_router(admin_router, prefix="/api/admin", tags=["Admin"])
 
    
     from fastapi import Depends
@@ -51,25 +93,100 @@ def create_application() -> FastAPI:
         """
         return {"status": "ok", "app_name": settings.PROJECT_NAME}
 
+    if settings.METRICS_ENABLED:
+        @application.get("/metrics", tags=["Health"], include_in_schema=False)
+        def read_metrics():
+            """
+            Request metrics of this worker process, in the Prometheus text format.
+            """
+            return PlainTextResponse(request_metrics.render(), media_type="text/plain; version=0.0.4")
+
+    if settings.PROFILING_ENABLED:
+        from fastapi import HTTPException, status
+        from app.schemas.profile import ProfileStart, ProfileStatus
+
+        # Each worker process has its own profiler; these act on the one serving the request
+        @application.post("/api/admin/profile", response_model=ProfileStatus,
+                          status_code=status.HTTP_202_ACCEPTED, tags=["Admin"])
+        def start_profile(profile_in: ProfileStart, current_user: User = Depends(get_current_active_admin)):
+            """
+            Start sampling stacks for a bounded window, either of the whole
+            process or of a fraction of the requests to one route. Only Admins.
+            """
+            try:
+                profiler.start(
+                    profile_in.seconds, profile_in.interval_ms / 1000,
+                    route=profile_in.route, sample_rate=profile_in.sample_rate,
+                )
+            except RuntimeError as exc:
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc))
+            return profiler.status()
+
+        @application.get("/api/admin/profile", response_model=ProfileStatus, tags=["Admin"])
+        def read_profile_status(current_user: User = Depends(get_current_active_admin)):
+            """
+            Progress of the current or last profile. Only Admins.
+            """
+            profile = profiler.status()
+            if profile is None:
+                raise HTTPException(status_code=404, detail="No profile has been started")
+            return profile
+
+        @application.delete("/api/admin/profile", response_model=ProfileStatus, tags=["Admin"])
+        def stop_profile(current_user: User = Depends(get_current_active_admin)):
+            """
+            End the running profile early, keeping what it sampled. Only Admins.
+            """
+            profiler.stop()
+            return read_profile_status(current_user)
+
+        @application.get("/api/admin/profile/collapsed", tags=["Admin"])
+        def download_profile(current_user: User = Depends(get_current_active_admin)):
+            """
+            The sampled stacks in collapsed format, for flamegraph.pl or
+            speedscope. Available while the profile runs. Only Admins.
+            """
+            if profiler.status() is None:
+                raise HTTPException(status_code=404, detail="No profile has been started")
+            return PlainTextResponse(
+                profiler.collapsed(),
+                headers={"Content-Disposition": 'attachment; filename="profile.collapsed"'},
+            )
+
     return application
 
 app = create_application()
 
 @app.on_event("startup")
 def on_startup():
+    if settings.PURCHASE_WRITE_BEHIND and settings.WEB_CONCURRENCY > 1:
+        # Each worker would sell from its own copy of the stock counters
+        raise RuntimeError("PURCHASE_WRITE_BEHIND cannot be used with WEB_CONCURRENCY > 1")
     from app.db.init_db import init_db
+    from app.db.session import SessionLocal
     init_db()
-    
-# Add CORS Middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+    if settings.PURCHASE_WRITE_BEHIND:
+        from app.services.write_behind import purchase_buffer
+        purchase_buffer.start(SessionLocal)
+    if settings.WEB_CONCURRENCY > 1:
+        from app.services.change_feed import change_feed
+        change_feed.start(SessionLocal)
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    from app.core.security import shutdown_password_pool
+    from app.db.async_session import dispose_async_engine
+    from app.services.change_feed import change_feed
+    from app.services.write_behind import purchase_buffer
+    profiler.stop()
+    change_feed.stop()
+    # Write any purchases still buffered before the process exits
+    purchase_buffer.stop()
+    shutdown_password_pool()
+    await dispose_async_engine()
+
 
 if __name__ == "__main__":
     import uvicorn
-   
+    # Development server; see app.serve for running several workers
     uvicorn.run("app.main:app", host="127.0.0.1", port=8000, reload=True)
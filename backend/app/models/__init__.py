@@ -2,3 +2,7 @@
 from app.db.base import Base # noqa
 from app.models.user import User # noqa
 from app.models.sweet import Sweet # noqa
+from app.models.purchase_journal import PurchaseJournalMark # noqa
+from app.models.order import Order, OrderLine # noqa
+from app.models.rollup import SweetRollup, CategoryRollup # noqa
+from app.models.stock_threshold import StockThreshold # noqa
@@ -0,0 +1,56 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index
+from sqlalchemy.orm import relationship
+from app.db.base import Base
+
+class Order(Base):
+    """
+    Order model: one purchase or checkout. Rows are only ever inserted.
+
+    Attributes:
+        id (int): Primary key.
+        user_id (int): The buyer.
+        total (float): Sum of quantity * unit price over the lines.
+        created_at (datetime): When the purchase was made.
+    """
+    __tablename__ = "orders"
+    __table_args__ = (
+        # "My orders", newest first, paged by id
+        Index("ix_orders_user_id_id", "user_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    total = Column(Float, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    lines = relationship("OrderLine", order_by="OrderLine.id", lazy="raise")
+
+class OrderLine(Base):
+    """
+    OrderLine model: units of one sweet within an order. Rows are only ever inserted.
+
+    sweet_id deliberately has no foreign key: the ledger keeps the sales of
+    sweets that were later deleted.
+
+    Attributes:
+        id (int): Primary key.
+        order_id (int): The order this line belongs to.
+        sweet_id (int): The sweet sold.
+        quantity (int): Units sold.
+        unit_price (float): Price per unit at the time of sale.
+        created_at (datetime): Copy of the order's timestamp, for per-sweet reports.
+    """
+    __tablename__ = "order_lines"
+    __table_args__ = (
+        # Sales of one sweet over a time range
+        Index("ix_order_lines_sweet_id_created_at", "sweet_id", "created_at"),
+        Index("ix_order_lines_order_id", "order_id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    sweet_id = Column(Integer, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    unit_price = Column(Float, nullable=False)
+    created_at = Column(DateTime, nullable=False)
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer
+from app.db.base import Base
+
+class PurchaseJournalMark(Base):
+    """
+    High-water mark of the write-behind purchase journal.
+
+    Attributes:
+        id (int): Primary key; the buffer uses a single row.
+        applied_seq (int): Sequence number of the last journal entry whose
+            decrement has been committed to the sweets table.
+    """
+    __tablename__ = "purchase_journal_marks"
+
+    id = Column(Integer, primary_key=True)
+    applied_seq = Column(Integer, default=0, nullable=False)
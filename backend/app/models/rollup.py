@@ -0,0 +1,45 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from app.db.base import Base
+
+class SweetRollup(Base):
+    """
+    Sales and restock totals of one sweet per hour or day, maintained as
+    purchases and restocks happen.
+
+    Attributes:
+        granularity (str): 'hour' or 'day'.
+        bucket (datetime): Start of the hour or day (UTC).
+        sweet_id (int): The sweet.
+        units_sold (int): Units sold in the bucket.
+        revenue (float): Sum of quantity * unit price sold in the bucket.
+        units_restocked (int): Units added by restocks in the bucket.
+    """
+    __tablename__ = "sweet_rollups"
+
+    granularity = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    sweet_id = Column(Integer, primary_key=True)
+    units_sold = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0.0, nullable=False)
+    units_restocked = Column(Integer, default=0, nullable=False)
+
+class CategoryRollup(Base):
+    """
+    The same totals as SweetRollup, per category.
+
+    Attributes:
+        granularity (str): 'hour' or 'day'.
+        bucket (datetime): Start of the hour or day (UTC).
+        category (str): The category, as it was at the time of the sale.
+        units_sold (int): Units sold in the bucket.
+        revenue (float): Sum of quantity * unit price sold in the bucket.
+        units_restocked (int): Units added by restocks in the bucket.
+    """
+    __tablename__ = "category_rollups"
+
+    granularity = Column(String, primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    category = Column(String, primary_key=True)
+    units_sold = Column(Integer, default=0, nullable=False)
+    revenue = Column(Float, default=0.0, nullable=False)
+    units_restocked = Column(Integer, default=0, nullable=False)
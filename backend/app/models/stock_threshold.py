@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String
+from app.db.base import Base
+
+class StockThreshold(Base):
+    """
+    Low-stock threshold override for one sweet or one category.
+
+    Attributes:
+        id (int): Primary key.
+        sweet_id (int): The sweet it applies to, or None for a category rule.
+        category (str): The category it applies to, or None for a sweet rule.
+        threshold (int): Alert when the quantity is at or below this value.
+    """
+    __tablename__ = "stock_thresholds"
+
+    id = Column(Integer, primary_key=True)
+    sweet_id = Column(Integer, unique=True, nullable=True)
+    category = Column(String, unique=True, nullable=True)
+    threshold = Column(Integer, nullable=False)
@@ -1,6 +1,8 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index, event
 from app.db.base import Base
+from app.db.change_log import drop_change_log
+from app.db.search_index import create_search_index, drop_search_index
 
 class Sweet(Base):
     """
@@ -16,6 +18,13 @@ class Sweet(Base):
         updated_at (datetime): Timestamp when the product was last updated.
     """
     __tablename__ = "sweets"
+    __table_args__ = (
+        # Search filters: category alone, category + price range, price range
+        Index("ix_sweets_category_price", "category", "price"),
+        Index("ix_sweets_price", "price"),
+        # Low-stock report
+        Index("ix_sweets_quantity", "quantity"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
@@ -24,3 +33,11 @@ class Sweet(Base):
     quantity = Column(Integer, default=0, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+# Keep the full-text name index (SQLite only) alongside the table
+event.listen(Sweet.__table__, "after_create", lambda target, connection, **kw: create_search_index(connection))
+event.listen(Sweet.__table__, "before_drop", lambda target, connection, **kw: drop_search_index(connection))
+# The change log for other worker processes is created by init_db when
+# there are several; it goes with the table
+event.listen(Sweet.__table__, "before_drop", lambda target, connection, **kw: drop_change_log(connection))
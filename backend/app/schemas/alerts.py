@@ -0,0 +1,22 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field, model_validator
+
+class LowStockAlertResponse(BaseModel):
+    sweet_id: int
+    name: str
+    category: str
+    quantity: int
+    threshold: int
+    since: datetime
+
+class ThresholdUpdate(BaseModel):
+    sweet_id: Optional[int] = None
+    category: Optional[str] = None
+    threshold: Optional[int] = Field(None, ge=0, description="None removes the override")
+
+    @model_validator(mode="after")
+    def one_target(self):
+        if (self.sweet_id is None) == (self.category is None):
+            raise ValueError("Give exactly one of sweet_id or category")
+        return self
@@ -0,0 +1,19 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class CategoryRevenue(BaseModel):
+    bucket: datetime
+    category: str
+    units_sold: int
+    revenue: float
+    units_restocked: int
+
+    model_config = {"from_attributes": True}
+
+class TopSeller(BaseModel):
+    sweet_id: int
+    # None once the sweet has been deleted
+    name: Optional[str] = None
+    units_sold: int
+    revenue: float
@@ -1,4 +1,38 @@
+from typing import List
 from pydantic import BaseModel, Field
 
 class RestockRequest(BaseModel):
     amount: int = Field(gt=0, description="Amount to restock, must be positive")
+
+class RestockLine(RestockRequest):
+    sweet_id: int
+
+class BulkRestockRequest(BaseModel):
+    items: List[RestockLine] = Field(min_length=1, description="Sweets and amounts delivered")
+
+class RestockLineResult(BaseModel):
+    sweet_id: int
+    amount: int
+    new_quantity: int
+
+class BulkRestockResponse(BaseModel):
+    msg: str
+    items: List[RestockLineResult]
+
+class PurchaseRequest(BaseModel):
+    quantity: int = Field(1, gt=0, description="Units to purchase, must be positive")
+
+class CheckoutLine(PurchaseRequest):
+    sweet_id: int
+
+class CheckoutRequest(BaseModel):
+    items: List[CheckoutLine] = Field(min_length=1, description="Cart lines to purchase together")
+
+class CheckoutLineResult(BaseModel):
+    sweet_id: int
+    quantity: int
+    remaining_quantity: int
+
+class CheckoutResponse(BaseModel):
+    msg: str
+    items: List[CheckoutLineResult]
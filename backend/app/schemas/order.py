@@ -0,0 +1,32 @@
+from typing import List
+from datetime import datetime
+from pydantic import BaseModel
+
+class OrderLineResponse(BaseModel):
+    sweet_id: int
+    quantity: int
+    unit_price: float
+
+    model_config = {"from_attributes": True}
+
+class OrderResponse(BaseModel):
+    id: int
+    total: float
+    created_at: datetime
+    lines: List[OrderLineResponse]
+
+    model_config = {"from_attributes": True}
+
+class SaleResponse(BaseModel):
+    order_id: int
+    quantity: int
+    unit_price: float
+    created_at: datetime
+
+    model_config = {"from_attributes": True}
+
+class SweetSalesResponse(BaseModel):
+    sweet_id: int
+    units: int
+    revenue: float
+    sales: List[SaleResponse]
@@ -0,0 +1,24 @@
+from typing import Optional
+from datetime import datetime
+from pydantic import BaseModel, Field
+from app.core.config import settings
+
+class ProfileStart(BaseModel):
+    seconds: float = Field(30.0, gt=0, le=settings.PROFILE_MAX_SECONDS)
+    interval_ms: float = Field(10.0, ge=1, le=1000, description="Time between stack samples")
+    route: Optional[str] = Field(
+        None, description="Only profile requests to this path template, e.g. /api/sweets/{sweet_id}"
+    )
+    sample_rate: float = Field(1.0, gt=0, le=1, description="Fraction of matching requests to profile")
+
+class ProfileStatus(BaseModel):
+    mode: str
+    route: Optional[str] = None
+    sample_rate: float
+    interval_ms: float
+    started_at: datetime
+    ends_at: datetime
+    running: bool
+    samples: int
+    requests: Optional[int] = None
+    stacks: int
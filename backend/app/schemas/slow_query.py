@@ -0,0 +1,14 @@
+from typing import List, Optional
+from datetime import datetime
+from pydantic import BaseModel
+
+class SlowQueryResponse(BaseModel):
+    id: str
+    statement: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    last_seen: datetime
+    plan: Optional[List[str]] = None
+    full_scan: bool
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class SweetBase(BaseModel):
@@ -23,3 +23,14 @@ class SweetResponse(SweetBase):
     updated_at: datetime
 
     model_config = {"from_attributes": True}
+
+class SweetImportError(BaseModel):
+    line: int
+    error: str
+
+class SweetImportResponse(BaseModel):
+    msg: str
+    created: int
+    updated: int
+    failed: int
+    errors: List[SweetImportError]
@@ -0,0 +1,60 @@
+"""
+Production entry point: serve the API from several worker processes.
+
+Run from the backend directory:
+
+    python -m app.serve --workers 4 --host 0.0.0.0 --port 8000
+
+Workers default to WEB_CONCURRENCY, else one per CPU core. Uvicorn's
+supervisor restarts workers that die. Every worker sees WEB_CONCURRENCY set
+to the worker count, so each takes its share of DB_MAX_CONNECTIONS and
+follows the sweet change log to keep its in-memory caches coherent with the
+others (see app.services.change_feed). DB_PROFILE defaults to "production"
+here: concurrent writers need SQLite's WAL mode and busy timeout.
+"""
+import argparse
+import os
+
+
+def default_workers() -> int:
+    return int(os.environ.get("WEB_CONCURRENCY") or os.cpu_count() or 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=default_workers())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    # Set before the settings are read, here and in every worker
+    os.environ["WEB_CONCURRENCY"] = str(args.workers)
+    os.environ.setdefault("DB_PROFILE", "production")
+
+    import uvicorn
+    from app.core.config import settings
+
+    if settings.PURCHASE_WRITE_BEHIND and args.workers > 1:
+        parser.error("PURCHASE_WRITE_BEHIND keeps stock in one process; run it with --workers 1")
+
+    # Create the schema once, rather than in every worker at the same time
+    from app.db.init_db import init_db
+    from app.db.session import engine
+    init_db()
+    engine.dispose()
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        proxy_headers=True,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+import threading
+from datetime import datetime
+from typing import Dict, List, NamedTuple, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.stock_threshold import StockThreshold
+from app.models.sweet import Sweet
+from app.services.events import CatalogReloaded, StockChanged, SweetRemoved, event_bus
+
+
+class LowStockAlert(NamedTuple):
+    sweet_id: int
+    name: str
+    category: str
+    quantity: int
+    threshold: int
+    # When the sweet first dropped to its threshold
+    since: datetime
+
+
+class LowStockDetector:
+    """
+    Current low-stock alerts, kept in memory from stock change events.
+
+    A sweet is alerting while its quantity is at or below its threshold: its
+    own override, else its category's, else LOW_STOCK_THRESHOLD. On first use
+    the detector loads the overrides and the sweets already at or below the
+    highest threshold, with one query each; after that, reads never touch
+    the database and only events change the alerts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._levels: Dict[int, StockChanged] = {}
+        self._alerts: Dict[int, LowStockAlert] = {}
+        self._sweet_thresholds: Dict[int, int] = {}
+        self._category_thresholds: Dict[str, int] = {}
+        # Highest threshold the loaded sweets cover; None until loaded
+        self._covered: Optional[int] = None
+
+    def threshold(self, sweet_id: int, category: str) -> int:
+        if sweet_id in self._sweet_thresholds:
+            return self._sweet_thresholds[sweet_id]
+        return self._category_thresholds.get(category, settings.LOW_STOCK_THRESHOLD)
+
+    def _max_threshold(self) -> int:
+        return max(
+            [settings.LOW_STOCK_THRESHOLD]
+            + list(self._sweet_thresholds.values())
+            + list(self._category_thresholds.values())
+        )
+
+    def _evaluate(self, level: StockChanged) -> None:
+        threshold = self.threshold(level.sweet_id, level.category)
+        if level.quantity > threshold:
+            self._alerts.pop(level.sweet_id, None)
+            return
+        current = self._alerts.get(level.sweet_id)
+        since = current.since if current else level.updated_at
+        self._alerts[level.sweet_id] = LowStockAlert(
+            level.sweet_id, level.name, level.category, level.quantity, threshold, since
+        )
+
+    def _track(self, level: StockChanged) -> None:
+        known = self._levels.get(level.sweet_id)
+        # Commits can be published out of order; keep the newest
+        if known is not None and level.updated_at < known.updated_at:
+            return
+        self._levels[level.sweet_id] = level
+        self._evaluate(level)
+
+    def handle(self, event: StockChanged) -> None:
+        with self._lock:
+            self._track(event)
+
+    def handle_removed(self, event: SweetRemoved) -> None:
+        with self._lock:
+            self._levels.pop(event.sweet_id, None)
+            self._alerts.pop(event.sweet_id, None)
+
+    def handle_reloaded(self, event: CatalogReloaded) -> None:
+        self.invalidate()
+
+    def _load(self, db: Session) -> None:
+        with self._lock:
+            if self._covered is not None:
+                return
+        overrides = db.execute(select(StockThreshold)).scalars().all()
+        with self._lock:
+            self._sweet_thresholds = {t.sweet_id: t.threshold for t in overrides if t.sweet_id is not None}
+            self._category_thresholds = {t.category: t.threshold for t in overrides if t.category is not None}
+            # Events seen before the load were checked against the default threshold
+            for level in self._levels.values():
+                self._evaluate(level)
+        self._cover(db, self._max_threshold())
+
+    def _cover(self, db: Session, up_to: int) -> None:
+        rows = db.execute(
+            select(Sweet.id, Sweet.name, Sweet.category, Sweet.quantity, Sweet.updated_at)
+            .where(Sweet.quantity <= up_to)
+        ).all()
+        with self._lock:
+            for row in rows:
+                if row.id not in self._levels:
+                    self._track(StockChanged(*row, reason="load"))
+            self._covered = max(self._covered or 0, up_to)
+
+    def alerts(self, db: Session) -> List[LowStockAlert]:
+        """
+        Sweets currently at or below their threshold, emptiest first.
+        """
+        self._load(db)
+        with self._lock:
+            return sorted(self._alerts.values(), key=lambda a: (a.quantity, a.sweet_id))
+
+    def set_threshold(
+        self,
+        db: Session,
+        threshold: Optional[int],
+        sweet_id: Optional[int] = None,
+        category: Optional[str] = None,
+    ) -> None:
+        """
+        Store (or with threshold None, remove) the override for a sweet or a
+        category, and re-evaluate the alerts it affects.
+        """
+        self._load(db)
+        column = StockThreshold.sweet_id if sweet_id is not None else StockThreshold.category
+        key = sweet_id if sweet_id is not None else category
+        row = db.execute(select(StockThreshold).where(column == key)).scalar_one_or_none()
+        if threshold is None:
+            if row is not None:
+                db.delete(row)
+        elif row is None:
+            db.add(StockThreshold(sweet_id=sweet_id, category=category, threshold=threshold))
+        else:
+            row.threshold = threshold
+        db.commit()
+
+        with self._lock:
+            overrides = self._sweet_thresholds if sweet_id is not None else self._category_thresholds
+            if threshold is None:
+                overrides.pop(key, None)
+            else:
+                overrides[key] = threshold
+            for level in self._levels.values():
+                self._evaluate(level)
+            up_to = self._max_threshold()
+            covered = self._covered or 0
+        # A raised threshold can reach sweets that were above every old one
+        if up_to > covered:
+            self._cover(db, up_to)
+
+    def invalidate(self) -> None:
+        """
+        Forget everything; the next read reloads from the database.
+        """
+        with self._lock:
+            self._levels.clear()
+            self._alerts.clear()
+            self._sweet_thresholds.clear()
+            self._category_thresholds.clear()
+            self._covered = None
+
+
+low_stock_detector = LowStockDetector()
+event_bus.subscribe(StockChanged, low_stock_detector.handle)
+event_bus.subscribe(SweetRemoved, low_stock_detector.handle_removed)
+event_bus.subscribe(CatalogReloaded, low_stock_detector.handle_reloaded)
@@ -0,0 +1,131 @@
+import asyncio
+import json
+import threading
+from typing import Optional, Set
+from app.core.config import settings
+from app.services.events import CatalogReloaded, StockChanged, SweetRemoved, event_bus
+
+
+class TooManyClients(Exception):
+    """
+    Raised when SSE_MAX_CLIENTS streams are already open.
+    """
+
+
+class StreamClient:
+    """
+    One open stream: a bounded queue of encoded messages on its event loop.
+    `None` in the queue ends the stream.
+    """
+    __slots__ = ("loop", "queue", "dropped")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, size: int):
+        self.loop = loop
+        # Room for at least the final `dropped` message and the end marker
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(size, 2))
+        self.dropped = False
+
+
+def _message(event: str, data: dict) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class StockBroadcaster:
+    """
+    Fans stock events out to every open Server-Sent Events stream.
+
+    Each event is encoded once and handed to every client's bounded queue.
+    A client whose queue is full has fallen behind: its queue is emptied and
+    it receives a final `dropped` message, so one slow consumer never holds
+    memory or delays the others. Clients reconnect and refetch the catalog.
+    Events can be published from any thread; delivery always happens on the
+    client's own event loop.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Set[StreamClient] = set()
+        self.dropped = 0
+
+    def connect(self) -> StreamClient:
+        """
+        Register a stream; call from the event loop that will read it.
+        """
+        client = StreamClient(asyncio.get_running_loop(), settings.SSE_QUEUE_SIZE)
+        with self._lock:
+            if len(self._clients) >= settings.SSE_MAX_CLIENTS:
+                raise TooManyClients()
+            self._clients.add(client)
+        return client
+
+    def disconnect(self, client: StreamClient) -> None:
+        with self._lock:
+            self._clients.discard(client)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"clients": len(self._clients), "dropped": self.dropped}
+
+    def _deliver(self, client: StreamClient, message: bytes) -> None:
+        if client.dropped:
+            return
+        try:
+            client.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            client.dropped = True
+            while not client.queue.empty():
+                client.queue.get_nowait()
+            client.queue.put_nowait(_message("dropped", {"reason": "slow consumer"}))
+            client.queue.put_nowait(None)
+            self.disconnect(client)
+            with self._lock:
+                self.dropped += 1
+
+    def broadcast(self, message: bytes) -> None:
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.loop.call_soon_threadsafe(self._deliver, client, message)
+            except RuntimeError:
+                # The client's loop is closed; it is gone
+                self.disconnect(client)
+
+    def on_stock_changed(self, event: StockChanged) -> None:
+        self.broadcast(_message("stock", {
+            "sweet_id": event.sweet_id,
+            "quantity": event.quantity,
+            "reason": event.reason,
+            "updated_at": event.updated_at.isoformat(),
+        }))
+
+    def on_sweet_removed(self, event: SweetRemoved) -> None:
+        self.broadcast(_message("removed", {"sweet_id": event.sweet_id}))
+
+    def on_catalog_reloaded(self, event: CatalogReloaded) -> None:
+        self.broadcast(_message("reload", {}))
+
+
+async def stream_messages(client: StreamClient, heartbeat: Optional[float] = None):
+    """
+    Yield a client's messages, with a keep-alive comment when idle, until
+    the stream is dropped. The caller disconnects the client afterwards.
+    """
+    heartbeat = heartbeat if heartbeat is not None else settings.SSE_HEARTBEAT_SECONDS
+    # Sent first so the response headers go out immediately
+    yield f"retry: {settings.SSE_RETRY_MS}\n\n".encode()
+    while True:
+        try:
+            message = await asyncio.wait_for(client.queue.get(), heartbeat)
+        except asyncio.TimeoutError:
+            yield b": keep-alive\n\n"
+            continue
+        if message is None:
+            return
+        yield message
+
+
+stock_broadcaster = StockBroadcaster()
+event_bus.subscribe(StockChanged, stock_broadcaster.on_stock_changed)
+event_bus.subscribe(SweetRemoved, stock_broadcaster.on_sweet_removed)
+event_bus.subscribe(CatalogReloaded, stock_broadcaster.on_catalog_reloaded)
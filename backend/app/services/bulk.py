@@ -0,0 +1,166 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+from pydantic import ValidationError
+from sqlalchemy import bindparam, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.sweet import Sweet
+from app.schemas.sweet import SweetCreate
+
+IMPORT_FIELDS = ("name", "category", "price", "quantity")
+EXPORT_FIELDS = ("id", "name", "category", "price", "quantity", "created_at", "updated_at")
+# Row errors reported back to the caller; later ones are only counted
+MAX_REPORTED_ERRORS = 100
+
+_sweets = Sweet.__table__
+
+
+class ImportResult:
+    """
+    Running totals of a bulk import.
+    """
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+
+def _read_csv(stream: IO[str]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    reader = csv.DictReader(stream)
+    for row in reader:
+        yield reader.line_num, row, None
+
+
+def _read_ndjson(stream: IO[str]) -> Iterator[Tuple[int, Optional[dict], Optional[str]]]:
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield line_num, None, f"Invalid JSON: {exc}"
+            continue
+        if not isinstance(row, dict):
+            yield line_num, None, "Expected a JSON object"
+            continue
+        yield line_num, row, None
+
+
+def _upsert_chunk(db: Session, chunk: Dict[str, dict], result: ImportResult) -> None:
+    existing = set(db.execute(select(Sweet.name).where(Sweet.name.in_(chunk))).scalars())
+    now = datetime.utcnow()
+
+    updates = [
+        {"b_name": name, "b_category": row["category"], "b_price": row["price"],
+         "b_quantity": row["quantity"], "b_updated_at": now}
+        for name, row in chunk.items() if name in existing
+    ]
+    inserts = [row for name, row in chunk.items() if name not in existing]
+
+    # Core statements with a parameter list run as a single executemany
+    if updates:
+        db.execute(
+            update(_sweets)
+            .where(_sweets.c.name == bindparam("b_name"))
+            .values(
+                category=bindparam("b_category"),
+                price=bindparam("b_price"),
+                quantity=bindparam("b_quantity"),
+                updated_at=bindparam("b_updated_at"),
+            ),
+            updates,
+        )
+    if inserts:
+        db.execute(insert(_sweets), inserts)
+    db.commit()
+
+    result.updated += len(updates)
+    result.created += len(inserts)
+
+
+def import_sweets(db: Session, stream: IO[str], fmt: str, chunk_size: int) -> ImportResult:
+    """
+    Upsert sweets by name from a CSV or NDJSON text stream.
+
+    Rows are validated against SweetCreate and written `chunk_size` at a time,
+    each chunk in its own short transaction, so memory use stays flat and
+    purchases can interleave with a long import. Invalid rows are skipped and
+    reported. Within a chunk, the last row for a name wins.
+    """
+    result = ImportResult()
+    rows = _read_ndjson(stream) if fmt == "ndjson" else _read_csv(stream)
+    chunk: Dict[str, dict] = {}
+
+    for line_num, raw, error in rows:
+        if error is None:
+            try:
+                sweet = SweetCreate.model_validate(raw)
+            except ValidationError as exc:
+                error = "; ".join(
+                    f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in exc.errors()
+                )
+        if error is not None:
+            result.add_error(line_num, error)
+            continue
+
+        chunk[sweet.name] = sweet.model_dump(include=set(IMPORT_FIELDS))
+        if len(chunk) >= chunk_size:
+            _upsert_chunk(db, chunk, result)
+            chunk = {}
+
+    if chunk:
+        _upsert_chunk(db, chunk, result)
+    return result
+
+
+def fetch_batch(db: Session, after_id: int, batch_size: int) -> list:
+    """
+    The next `batch_size` rows after `after_id`, as plain column tuples.
+    """
+    columns = [getattr(Sweet, field) for field in EXPORT_FIELDS]
+    return db.execute(
+        select(*columns).where(Sweet.id > after_id).order_by(Sweet.id).limit(batch_size)
+    ).all()
+
+
+def format_rows(rows: list, fmt: str, header: bool = False) -> str:
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps({field: (value.isoformat() if isinstance(value, datetime) else value)
+                        for field, value in zip(EXPORT_FIELDS, row)}) + "\n"
+            for row in rows
+        )
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_FIELDS)
+    writer.writerows(
+        [value.isoformat() if isinstance(value, datetime) else value for value in row]
+        for row in rows
+    )
+    return buffer.getvalue()
+
+
+def export_sweets(db: Session, fmt: str, batch_size: int) -> Iterator[str]:
+    """
+    Yield the whole catalog in `fmt`, reading it in keyset batches of
+    `batch_size` so the table is never held in memory at once.
+    """
+    if fmt == "csv":
+        yield format_rows([], fmt, header=True)
+    after_id = 0
+    while True:
+        rows = fetch_batch(db, after_id, batch_size)
+        if not rows:
+            return
+        yield format_rows(rows, fmt)
+        after_id = rows[-1][0]
@@ -0,0 +1,276 @@
+import bisect
+import secrets
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence, Tuple
+import orjson
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.change_log import last_change_id
+from app.models.sweet import Sweet
+from app.schemas.sweet import SweetResponse
+
+_FIELDS = ("id", "name", "category", "price", "quantity", "created_at", "updated_at")
+
+# Keys in SweetResponse order, so rendered rows match SweetRecord.json exactly
+_JSON_KEYS = tuple(SweetResponse.model_fields)
+
+# What a listing selects: plain rows for render_rows, no ORM objects
+SWEET_COLUMNS = tuple(getattr(Sweet, key) for key in _JSON_KEYS)
+
+
+class SweetRecord:
+    """
+    Immutable cached copy of a sweet plus its pre-serialized JSON body.
+    """
+    __slots__ = _FIELDS + ("json",)
+
+    def __init__(self, id, name, category, price, quantity, created_at, updated_at):
+        self.id = id
+        self.name = name
+        self.category = category
+        self.price = price
+        self.quantity = quantity
+        self.created_at = created_at
+        self.updated_at = updated_at
+        # Same encoder as the response_model path, so cached and uncached
+        # responses are byte-for-byte identical
+        self.json = SweetResponse.model_validate(self).model_dump_json().encode()
+
+    @classmethod
+    def from_sweet(cls, sweet: Sweet) -> "SweetRecord":
+        return cls(*(getattr(sweet, field) for field in _FIELDS))
+
+    def with_stock(self, quantity: int, updated_at: datetime) -> "SweetRecord":
+        return SweetRecord(self.id, self.name, self.category, self.price,
+                           quantity, self.created_at, updated_at)
+
+
+class CatalogCache:
+    """
+    Process-local snapshot of the whole catalog, ordered by id.
+
+    The snapshot is loaded on the first read and then kept current by the
+    write routes: single-row changes are written through (`store`,
+    `update_stock`, `remove`) and anything else calls `invalidate`, which
+    forces a reload on the next read. `version` increases with every change.
+
+    While the change feed follows a change log shared with other worker
+    processes (see app.services.change_feed), catalog ETags come from that
+    log instead, and pages are only served once the snapshot has applied
+    every entry committed so far.
+
+    Catalogs larger than CATALOG_CACHE_MAX_ROWS are not cached; reads then
+    receive None and go to the database.
+    """
+
+    def __init__(self):
+        self.version = 0
+        # Distinguishes versions of this process from those of earlier runs
+        self.epoch = secrets.token_hex(4)
+        self._lock = threading.Lock()
+        self._ids: Optional[List[int]] = None
+        self._records: List[SweetRecord] = []
+        # Version at which the catalog was found too large to cache
+        self._oversized_at: Optional[int] = None
+        # Newest change-log entry applied, while following a shared log
+        self._log_id: Optional[int] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._ids is not None
+
+    def etag(self, db: Session) -> str:
+        """
+        Validator for any response derived from the whole catalog. With a
+        shared change log every worker derives the same one from it;
+        otherwise it is this process's own version.
+        """
+        if self._log_id is None:
+            return f'W/"catalog-{self.epoch}-{self.version}"'
+        return f'W/"catalog-log-{last_change_id(db.connection())}"'
+
+    def follow(self, log_id: Optional[int]) -> None:
+        """
+        Start tracking the change log from entry `log_id`, or stop with None.
+        """
+        with self._lock:
+            self._log_id = log_id
+
+    def _load(self, db: Session) -> bool:
+        with self._lock:
+            if self._ids is not None:
+                return True
+            if not settings.CATALOG_CACHE_ENABLED or self._oversized_at == self.version:
+                return False
+            version = self.version
+
+        rows = db.execute(
+            select(*(getattr(Sweet, field) for field in _FIELDS))
+            .order_by(Sweet.id)
+            .limit(settings.CATALOG_CACHE_MAX_ROWS + 1)
+        ).all()
+
+        with self._lock:
+            if len(rows) > settings.CATALOG_CACHE_MAX_ROWS:
+                self._oversized_at = version
+                return False
+            records = [SweetRecord(*row) for row in rows]
+            # A write that landed while we were reading makes this copy stale;
+            # serve it to this request only and let the next read reload.
+            if self.version == version and self._ids is None:
+                self._records = records
+                self._ids = [record.id for record in records]
+            else:
+                return False
+        return True
+
+    def page(
+        self, db: Session, skip: int = 0, limit: int = 100, after_id: Optional[int] = None
+    ) -> Optional[List[SweetRecord]]:
+        """
+        Return a page of records ordered by id, or None if the cache is unavailable.
+        """
+        if not self._load(db):
+            return None
+        log_id = self._log_id
+        if log_id is not None and log_id < last_change_id(db.connection()):
+            # Behind other workers' writes: the page would be older than the
+            # shared ETag it is sent with
+            return None
+        with self._lock:
+            if self._ids is None:
+                return None
+            start = bisect.bisect_right(self._ids, after_id) if after_id is not None else skip
+            return self._records[start:start + max(limit, 0)]
+
+    def get(self, db: Session, sweet_id: int) -> Tuple[bool, Optional[SweetRecord]]:
+        """
+        Look up one sweet. Returns (available, record); record is None when
+        the cache is available but the sweet does not exist.
+        """
+        if not self._load(db):
+            return False, None
+        with self._lock:
+            if self._ids is None:
+                return False, None
+            i = bisect.bisect_left(self._ids, sweet_id)
+            if i < len(self._ids) and self._ids[i] == sweet_id:
+                return True, self._records[i]
+            return True, None
+
+    def store(self, sweet: Sweet) -> None:
+        """
+        Write a created or updated sweet through to the snapshot.
+        """
+        record = SweetRecord.from_sweet(sweet)
+        with self._lock:
+            self.version += 1
+            if self._ids is None:
+                return
+            i = bisect.bisect_left(self._ids, record.id)
+            if i < len(self._ids) and self._ids[i] == record.id:
+                self._records[i] = record
+            else:
+                self._ids.insert(i, record.id)
+                self._records.insert(i, record)
+
+    def update_stock(self, levels: Iterable) -> None:
+        """
+        Apply committed stock levels (see inventory.StockLevel).
+
+        A level older than the cached record is ignored, so concurrent
+        writers committing out of order cannot roll the cache back.
+        """
+        with self._lock:
+            self.version += 1
+            if self._ids is None:
+                return
+            for level in levels:
+                i = bisect.bisect_left(self._ids, level.sweet_id)
+                if i < len(self._ids) and self._ids[i] == level.sweet_id:
+                    record = self._records[i]
+                    if level.updated_at >= record.updated_at:
+                        self._records[i] = record.with_stock(level.quantity, level.updated_at)
+
+    def refresh(self, rows: Iterable, removed: Iterable[int], log_id: Optional[int] = None) -> None:
+        """
+        Apply sweets committed elsewhere (e.g. by another worker process):
+        current rows, with the SweetRecord fields as attributes, and ids that
+        no longer exist, as of change-log entry `log_id`. Rows no newer than
+        the cached record are skipped, so replaying this process's own writes
+        changes nothing.
+        """
+        with self._lock:
+            if log_id is not None and self._log_id is not None:
+                self._log_id = max(self._log_id, log_id)
+            if self._ids is None:
+                # Makes a load that is in progress discard what it read
+                self.version += 1
+                return
+            changed = False
+            for row in rows:
+                i = bisect.bisect_left(self._ids, row.id)
+                if i < len(self._ids) and self._ids[i] == row.id:
+                    if row.updated_at <= self._records[i].updated_at:
+                        continue
+                    self._records[i] = SweetRecord.from_sweet(row)
+                else:
+                    self._ids.insert(i, row.id)
+                    self._records.insert(i, SweetRecord.from_sweet(row))
+                changed = True
+            for sweet_id in removed:
+                i = bisect.bisect_left(self._ids, sweet_id)
+                if i < len(self._ids) and self._ids[i] == sweet_id:
+                    del self._ids[i]
+                    del self._records[i]
+                    changed = True
+            if changed:
+                self.version += 1
+
+    def remove(self, sweet_id: int) -> None:
+        with self._lock:
+            self.version += 1
+            if self._ids is None:
+                return
+            i = bisect.bisect_left(self._ids, sweet_id)
+            if i < len(self._ids) and self._ids[i] == sweet_id:
+                del self._ids[i]
+                del self._records[i]
+
+    def invalidate(self, log_id: Optional[int] = None) -> None:
+        """
+        Drop the snapshot; the next read reloads it from the database, which
+        includes every change-log entry up to `log_id`.
+        """
+        with self._lock:
+            if log_id is not None and self._log_id is not None:
+                self._log_id = max(self._log_id, log_id)
+            self.version += 1
+            self._ids = None
+            self._records = []
+
+
+def render_list(records: List[SweetRecord]) -> bytes:
+    return b"[" + b",".join(record.json for record in records) + b"]"
+
+
+def render_rows(rows: Sequence[Sequence]) -> bytes:
+    """
+    Serialize rows selected with SWEET_COLUMNS to a SweetResponse JSON array.
+
+    Columns come from the database already typed, so the rows skip both ORM
+    hydration and response-model validation and go straight to orjson.
+    """
+    return orjson.dumps([dict(zip(_JSON_KEYS, row)) for row in rows])
+
+
+def sweet_etag(sweet_id: int, updated_at: datetime) -> str:
+    """
+    Validator for a single sweet; changes whenever the row is written.
+    """
+    return f'W/"sweet-{sweet_id}-{updated_at.timestamp():.6f}"'
+
+
+catalog_cache = CatalogCache()
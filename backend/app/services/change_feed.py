@@ -0,0 +1,161 @@
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Optional, Union
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.change_log import has_change_log, last_change_id, sweet_changes
+from app.models.sweet import Sweet
+from app.services.catalog import SWEET_COLUMNS, catalog_cache
+from app.services.events import CatalogReloaded, StockChanged, SweetRemoved, event_bus
+
+logger = logging.getLogger(__name__)
+
+# More distinct sweets than this in one poll are cheaper to reload wholesale
+_MAX_REFRESH = 1000
+
+# `_seen` value of a sweet this process knows was deleted
+_REMOVED = "removed"
+
+
+class ChangeFeed:
+    """
+    Keeps this process coherent with sweets changed by other processes
+    sharing the database, e.g. the workers started by app.serve.
+
+    Every committed change to `sweets` is appended to the change log by
+    triggers (app.db.change_log). The feed reads the entries after the last
+    one it saw, fetches the changed rows, refreshes the catalog cache and
+    publishes the changes on the local event bus as StockChanged (reason
+    'sync') or SweetRemoved, so alerts and live streams follow them too.
+    Changes this process made itself are recognised from its own events and
+    not published twice. When the log was pruned past the last entry seen, or
+    too much changed at once, the feed starts over: the catalog cache is
+    invalidated and CatalogReloaded published.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Newest updated_at published for each sweet, or _REMOVED
+        self._seen: Dict[int, Union[datetime, str]] = {}
+        self._last_id = 0
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._session_factory is not None
+
+    def start(
+        self,
+        session_factory: Callable[[], Session],
+        interval: Optional[float] = None,
+        background: bool = True,
+    ) -> bool:
+        """
+        Follow the change log from its current end; with `background`, poll
+        every `interval` seconds from a daemon thread. Returns False when the
+        database has no change log (it is SQLite only).
+        """
+        with session_factory() as db:
+            if not has_change_log(db.connection()):
+                logger.warning("No sweet change log in this database; worker caches will not be synced")
+                return False
+            self._last_id = last_change_id(db.connection())
+        self._session_factory = session_factory
+        catalog_cache.follow(self._last_id)
+        event_bus.subscribe(StockChanged, self._track)
+        event_bus.subscribe(SweetRemoved, self._track_removed)
+        if background:
+            interval = interval if interval is not None else settings.CACHE_SYNC_INTERVAL
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name="sweet-change-feed", daemon=True
+            )
+            self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        if not self.enabled:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        event_bus.unsubscribe(StockChanged, self._track)
+        event_bus.unsubscribe(SweetRemoved, self._track_removed)
+        catalog_cache.follow(None)
+        self._session_factory = None
+        with self._lock:
+            self._seen.clear()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Sweet change feed poll failed; retrying next interval")
+
+    def _track(self, event: StockChanged) -> None:
+        with self._lock:
+            seen = self._seen.get(event.sweet_id)
+            if seen is None or seen == _REMOVED or event.updated_at > seen:
+                self._seen[event.sweet_id] = event.updated_at
+
+    def _track_removed(self, event: SweetRemoved) -> None:
+        with self._lock:
+            self._seen[event.sweet_id] = _REMOVED
+
+    def _resync(self, last_id: int) -> None:
+        with self._lock:
+            self._seen.clear()
+            self._last_id = last_id
+        catalog_cache.invalidate(last_id)
+        event_bus.publish(CatalogReloaded())
+
+    def poll(self) -> int:
+        """
+        Apply the changes logged since the last poll. Returns how many log
+        entries were read.
+        """
+        with self._session_factory() as db:
+            entries = db.execute(
+                select(sweet_changes.c.id, sweet_changes.c.sweet_id)
+                .where(sweet_changes.c.id > self._last_id)
+                .order_by(sweet_changes.c.id)
+            ).all()
+            if not entries:
+                return 0
+            last_id = entries[-1].id
+            sweet_ids = {entry.sweet_id for entry in entries}
+            if entries[0].id != self._last_id + 1 or len(sweet_ids) > _MAX_REFRESH:
+                self._resync(last_id)
+                return len(entries)
+            rows = db.execute(select(*SWEET_COLUMNS).where(Sweet.id.in_(sweet_ids))).all()
+
+        removed = sweet_ids - {row.id for row in rows}
+        catalog_cache.refresh(rows, removed, last_id)
+
+        changed, deleted = [], []
+        with self._lock:
+            for row in rows:
+                seen = self._seen.get(row.id)
+                if seen is None or seen == _REMOVED or row.updated_at > seen:
+                    self._seen[row.id] = row.updated_at
+                    changed.append(row)
+            for sweet_id in removed:
+                if self._seen.get(sweet_id) != _REMOVED:
+                    self._seen[sweet_id] = _REMOVED
+                    deleted.append(sweet_id)
+            self._last_id = last_id
+
+        for row in changed:
+            event_bus.publish(StockChanged.from_sweet(row, "sync"))
+        for sweet_id in deleted:
+            event_bus.publish(SweetRemoved(sweet_id))
+        return len(entries)
+
+
+change_feed = ChangeFeed()
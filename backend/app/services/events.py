@@ -0,0 +1,83 @@
+import logging
+import threading
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Type
+from app.models.sweet import Sweet
+
+logger = logging.getLogger(__name__)
+
+
+class StockChanged(NamedTuple):
+    """
+    A sweet's stock or details were committed. `reason` is one of 'create',
+    'update', 'purchase' or 'restock', or 'sync' for a change committed by
+    another process (see app.services.change_feed).
+    """
+    sweet_id: int
+    name: str
+    category: str
+    quantity: int
+    updated_at: datetime
+    reason: str
+
+    @classmethod
+    def from_sweet(cls, sweet: Sweet, reason: str) -> "StockChanged":
+        return cls(sweet.id, sweet.name, sweet.category, sweet.quantity, sweet.updated_at, reason)
+
+
+class SweetRemoved(NamedTuple):
+    """
+    A sweet was deleted.
+    """
+    sweet_id: int
+
+
+class CatalogReloaded(NamedTuple):
+    """
+    Many sweets changed at once (e.g. a bulk import); subscribers holding
+    per-sweet state should rebuild it.
+    """
+
+
+class EventBus:
+    """
+    Synchronous in-process publish/subscribe, keyed by event class.
+
+    Handlers run in the publisher's thread, after the change is committed,
+    and must be quick. A failing handler is logged and does not affect the
+    publisher or the other handlers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._handlers: Dict[Type, List[Callable]] = defaultdict(list)
+
+    def subscribe(self, event_type: Type, handler: Callable) -> None:
+        with self._lock:
+            self._handlers[event_type] = self._handlers[event_type] + [handler]
+
+    def unsubscribe(self, event_type: Type, handler: Callable) -> None:
+        with self._lock:
+            self._handlers[event_type] = [h for h in self._handlers[event_type] if h != handler]
+
+    def publish(self, event) -> None:
+        # Handler lists are replaced, never mutated, so no lock is needed to read
+        for handler in self._handlers.get(type(event), ()):
+            try:
+                handler(event)
+            except Exception:
+                logger.exception("Event handler %r failed for %r", handler, event)
+
+
+def publish_levels(levels: Iterable, reason: str) -> None:
+    """
+    Publish a StockChanged for each committed inventory.StockLevel.
+    """
+    for level in levels:
+        event_bus.publish(StockChanged(
+            level.sweet_id, level.name, level.category, level.quantity, level.updated_at, reason
+        ))
+
+
+event_bus = EventBus()
@@ -0,0 +1,133 @@
+from datetime import datetime
+from typing import Dict, NamedTuple
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+from app.models.sweet import Sweet
+
+
+class SweetNotFound(Exception):
+    """
+    Raised when a stock operation targets a sweet that does not exist.
+    """
+
+
+class OutOfStock(Exception):
+    """
+    Raised when a sweet does not have enough units left for a purchase.
+    """
+
+
+class StockLevel(NamedTuple):
+    """
+    Stock of a sweet right after a change, as written to the database.
+    """
+    sweet_id: int
+    quantity: int
+    updated_at: datetime
+    name: str
+    category: str
+
+
+# Columns read back into a StockLevel by every stock write
+STOCK_COLUMNS = (Sweet.id, Sweet.quantity, Sweet.updated_at, Sweet.name, Sweet.category)
+
+
+def _ensure_exists(db: Session, sweet_id: int) -> None:
+    if db.execute(select(Sweet.id).where(Sweet.id == sweet_id)).first() is None:
+        raise SweetNotFound(sweet_id)
+
+
+def purchase(db: Session, sweet_id: int, quantity: int = 1) -> StockLevel:
+    """
+    Take `quantity` units of a sweet and return its new stock level.
+
+    The stock check and the decrement are a single conditional UPDATE, so the
+    database serializes concurrent buyers and the quantity can never go below
+    zero. The caller owns the transaction and is expected to commit.
+    """
+    stmt = (
+        update(Sweet)
+        .where(Sweet.id == sweet_id, Sweet.quantity >= quantity)
+        .values(quantity=Sweet.quantity - quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+    if db.get_bind().dialect.update_returning:
+        row = db.execute(stmt.returning(*STOCK_COLUMNS)).first()
+    else:
+        # Older SQLite builds have no RETURNING; the row is still locked by our
+        # UPDATE so reading it back inside the same transaction is safe.
+        row = None
+        if db.execute(stmt).rowcount:
+            row = db.execute(select(*STOCK_COLUMNS).where(Sweet.id == sweet_id)).first()
+
+    if row is None:
+        _ensure_exists(db, sweet_id)
+        raise OutOfStock(sweet_id)
+    return StockLevel(*row)
+
+
+def checkout(db: Session, lines: Dict[int, int]) -> Dict[int, StockLevel]:
+    """
+    Take several sweets at once, all or nothing.
+
+    `lines` maps sweet id to the units wanted. Every line is applied by one
+    conditional UPDATE using a CASE on the id; if any line cannot be served
+    nothing should be kept, so the caller must roll back on error.
+    Returns the new stock level per sweet id.
+    """
+    amounts = case(lines, value=Sweet.id)
+    stmt = (
+        update(Sweet)
+        .where(Sweet.id.in_(lines), Sweet.quantity >= amounts)
+        .values(quantity=Sweet.quantity - amounts)
+        .execution_options(synchronize_session=False)
+    )
+
+    if db.get_bind().dialect.update_returning:
+        rows = db.execute(stmt.returning(*STOCK_COLUMNS)).all()
+    else:
+        # Without RETURNING we cannot tell which rows matched, so a short
+        # rowcount reports every line as failed.
+        rows = []
+        if db.execute(stmt).rowcount == len(lines):
+            rows = db.execute(select(*STOCK_COLUMNS).where(Sweet.id.in_(lines))).all()
+    levels = {row[0]: StockLevel(*row) for row in rows}
+
+    if len(levels) != len(lines):
+        failed = [sweet_id for sweet_id in lines if sweet_id not in levels]
+        existing = set(db.execute(select(Sweet.id).where(Sweet.id.in_(failed))).scalars())
+        missing = [sweet_id for sweet_id in failed if sweet_id not in existing]
+        if missing:
+            raise SweetNotFound(*missing)
+        raise OutOfStock(*failed)
+    return levels
+
+
+def restock(db: Session, lines: Dict[int, int]) -> Dict[int, StockLevel]:
+    """
+    Add stock to several sweets at once, all or nothing.
+
+    `lines` maps sweet id to the units delivered. The increments are one
+    UPDATE using a CASE on the id, so they cannot lose concurrent purchases
+    the way a read-modify-write would. If any sweet does not exist the
+    caller must roll back. Returns the new stock level per sweet id.
+    """
+    amounts = case(lines, value=Sweet.id)
+    stmt = (
+        update(Sweet)
+        .where(Sweet.id.in_(lines))
+        .values(quantity=Sweet.quantity + amounts)
+        .execution_options(synchronize_session=False)
+    )
+
+    if db.get_bind().dialect.update_returning:
+        rows = db.execute(stmt.returning(*STOCK_COLUMNS)).all()
+    else:
+        db.execute(stmt)
+        rows = db.execute(select(*STOCK_COLUMNS).where(Sweet.id.in_(lines))).all()
+    levels = {row[0]: StockLevel(*row) for row in rows}
+
+    if len(levels) != len(lines):
+        raise SweetNotFound(*(sweet_id for sweet_id in lines if sweet_id not in levels))
+    return levels
@@ -0,0 +1,117 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.orm import Session, selectinload
+from app.core.dates import as_utc
+from app.models.order import Order, OrderLine
+from app.models.sweet import Sweet
+from app.services import rollups
+
+_orders = Order.__table__
+_order_lines = OrderLine.__table__
+
+
+class OrderDraft(NamedTuple):
+    """
+    An order not written yet. Lines are (sweet_id, quantity, unit_price).
+    """
+    user_id: int
+    lines: List[Tuple[int, int, float]]
+    created_at: datetime
+
+
+def draft_order(db: Session, user_id: int, lines: Dict[int, int]) -> OrderDraft:
+    """
+    Price `lines` (sweet id -> units) at the sweets' current prices.
+    """
+    prices = dict(db.execute(select(Sweet.id, Sweet.price).where(Sweet.id.in_(lines))).all())
+    return OrderDraft(
+        user_id,
+        [(sweet_id, quantity, prices[sweet_id]) for sweet_id, quantity in lines.items()],
+        datetime.utcnow(),
+    )
+
+
+def record_orders(db: Session, drafts: Iterable[OrderDraft]) -> None:
+    """
+    Append orders and their lines, with one multi-row INSERT per table
+    however many orders there are, and count them in the sales rollups.
+    The caller commits.
+    """
+    drafts = list(drafts)
+    if not drafts:
+        return
+    rows = [
+        {"user_id": draft.user_id, "total": sum(q * p for _, q, p in draft.lines),
+         "created_at": draft.created_at}
+        for draft in drafts
+    ]
+    if db.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+        order_ids = db.execute(
+            insert(_orders).returning(_orders.c.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+    else:
+        order_ids = [db.execute(insert(_orders).values(row)).inserted_primary_key[0] for row in rows]
+
+    db.execute(insert(_order_lines), [
+        {"order_id": order_id, "sweet_id": sweet_id, "quantity": quantity,
+         "unit_price": unit_price, "created_at": draft.created_at}
+        for order_id, draft in zip(order_ids, drafts)
+        for sweet_id, quantity, unit_price in draft.lines
+    ])
+    rollups.record_sales(db, (
+        (draft.created_at, sweet_id, quantity, unit_price)
+        for draft in drafts
+        for sweet_id, quantity, unit_price in draft.lines
+    ))
+
+
+def user_orders(db: Session, user_id: int, before_id: Optional[int], limit: int) -> List[Order]:
+    """
+    A page of one user's orders, newest first, with their lines.
+    """
+    query = select(Order).where(Order.user_id == user_id)
+    if before_id is not None:
+        query = query.where(Order.id < before_id)
+    query = query.order_by(Order.id.desc()).limit(limit).options(selectinload(Order.lines))
+    return list(db.execute(query).scalars())
+
+
+def _sales_filter(sweet_id: int, start: Optional[datetime], end: Optional[datetime]) -> list:
+    conditions = [OrderLine.sweet_id == sweet_id]
+    start, end = as_utc(start), as_utc(end)
+    if start is not None:
+        conditions.append(OrderLine.created_at >= start)
+    if end is not None:
+        conditions.append(OrderLine.created_at < end)
+    return conditions
+
+
+def sweet_sales(
+    db: Session,
+    sweet_id: int,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    before: Optional[Tuple[datetime, int]] = None,
+    limit: int = 50,
+) -> Tuple[int, float, List[OrderLine]]:
+    """
+    Units and revenue of a sweet in [start, end), and a page of its sales,
+    newest first. Both queries are range scans of the (sweet_id, created_at)
+    index; `before` is the (created_at, id) of the last sale already seen.
+    """
+    conditions = _sales_filter(sweet_id, start, end)
+    units, revenue = db.execute(
+        select(
+            func.coalesce(func.sum(OrderLine.quantity), 0),
+            func.coalesce(func.sum(OrderLine.quantity * OrderLine.unit_price), 0.0),
+        ).where(*conditions)
+    ).one()
+
+    query = select(OrderLine).where(*conditions)
+    if before is not None:
+        query = query.where(tuple_(OrderLine.created_at, OrderLine.id) < tuple_(*before))
+    sales = db.execute(
+        query.order_by(OrderLine.created_at.desc(), OrderLine.id.desc()).limit(limit)
+    ).scalars().all()
+    return units, revenue, list(sales)
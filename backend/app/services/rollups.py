@@ -0,0 +1,148 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import and_, func, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.rollup import CategoryRollup, SweetRollup
+from app.models.sweet import Sweet
+
+GRANULARITIES = ("hour", "day")
+_COUNTERS = ("units_sold", "revenue", "units_restocked")
+_UPSERT_DIALECTS = {"sqlite": sqlite, "postgresql": postgresql}
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _upsert(db: Session, model, keys: Tuple[str, ...], totals: Dict[tuple, list]) -> None:
+    """
+    Add `totals` (key values -> counter deltas) onto the rollup rows.
+    """
+    if not totals:
+        return
+    table = model.__table__
+    rows = [
+        {**dict(zip(keys, key)), **dict(zip(_COUNTERS, deltas))}
+        for key, deltas in totals.items()
+    ]
+    dialect = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: table.c[name] + stmt.excluded[name] for name in _COUNTERS},
+        )
+        db.execute(stmt, rows)
+        return
+    for row in rows:
+        matched = db.execute(
+            update(table)
+            .where(and_(*(table.c[k] == row[k] for k in keys)))
+            .values({name: table.c[name] + row[name] for name in _COUNTERS})
+        ).rowcount
+        if not matched:
+            db.execute(table.insert().values(row))
+
+
+def _apply(db: Session, events: Iterable[Tuple[datetime, int, int, float, int]]) -> None:
+    """
+    Fold (at, sweet_id, units_sold, revenue, units_restocked) events into
+    every rollup, with one multi-row upsert per table.
+    """
+    events = list(events)
+    if not events:
+        return
+    sweet_ids = {event[1] for event in events}
+    categories = dict(db.execute(select(Sweet.id, Sweet.category).where(Sweet.id.in_(sweet_ids))).all())
+
+    by_sweet: Dict[tuple, list] = {}
+    by_category: Dict[tuple, list] = {}
+    for at, sweet_id, *deltas in events:
+        for granularity in GRANULARITIES:
+            bucket = bucket_start(at, granularity)
+            keyed = [(by_sweet, (granularity, bucket, sweet_id))]
+            if sweet_id in categories:
+                keyed.append((by_category, (granularity, bucket, categories[sweet_id])))
+            for totals, key in keyed:
+                current = totals.setdefault(key, [0, 0.0, 0])
+                for i, delta in enumerate(deltas):
+                    current[i] += delta
+
+    _upsert(db, SweetRollup, ("granularity", "bucket", "sweet_id"), by_sweet)
+    _upsert(db, CategoryRollup, ("granularity", "bucket", "category"), by_category)
+
+
+def record_sales(db: Session, sales: Iterable[Tuple[datetime, int, int, float]]) -> None:
+    """
+    Count (at, sweet_id, quantity, unit_price) sales in the rollups. The caller commits.
+    """
+    _apply(db, ((at, sweet_id, quantity, quantity * price, 0) for at, sweet_id, quantity, price in sales))
+
+
+def record_restock(db: Session, lines: Dict[int, int], at: Optional[datetime] = None) -> None:
+    """
+    Count restocked units (sweet id -> units) in the rollups. The caller commits.
+    """
+    at = at or datetime.utcnow()
+    _apply(db, ((at, sweet_id, 0, 0.0, amount) for sweet_id, amount in lines.items()))
+
+
+def category_revenue(
+    db: Session,
+    granularity: str,
+    start: datetime,
+    end: datetime,
+    category: Optional[str] = None,
+) -> List[CategoryRollup]:
+    """
+    Per-category totals for each bucket in [start, end). Reads one row per
+    bucket and category, however many orders there were.
+    """
+    query = select(CategoryRollup).where(
+        CategoryRollup.granularity == granularity,
+        CategoryRollup.bucket >= bucket_start(start, granularity),
+        CategoryRollup.bucket < end,
+    )
+    if category:
+        query = query.where(CategoryRollup.category == category)
+    return list(db.execute(query.order_by(CategoryRollup.bucket, CategoryRollup.category)).scalars())
+
+
+def top_sellers(
+    db: Session, granularity: str, start: datetime, end: datetime, limit: int = 10
+) -> list:
+    """
+    Best-selling sweets by units over the buckets in [start, end), as
+    (sweet_id, name, units_sold, revenue) rows.
+    """
+    units = func.sum(SweetRollup.units_sold).label("units_sold")
+    totals = (
+        select(SweetRollup.sweet_id, units, func.sum(SweetRollup.revenue).label("revenue"))
+        .where(
+            SweetRollup.granularity == granularity,
+            SweetRollup.bucket >= bucket_start(start, granularity),
+            SweetRollup.bucket < end,
+        )
+        .group_by(SweetRollup.sweet_id)
+        .having(units > 0)
+        .order_by(units.desc(), SweetRollup.sweet_id)
+        .limit(limit)
+        .subquery()
+    )
+    return db.execute(
+        select(totals.c.sweet_id, Sweet.name, totals.c.units_sold, totals.c.revenue)
+        .outerjoin(Sweet, Sweet.id == totals.c.sweet_id)
+        .order_by(totals.c.units_sold.desc(), totals.c.sweet_id)
+    ).all()
+
+
+def low_stock(db: Session, threshold: int, limit: int = 50) -> List[Sweet]:
+    """
+    Sweets with at most `threshold` units left, emptiest first.
+    """
+    return list(db.execute(
+        select(Sweet).where(Sweet.quantity <= threshold).order_by(Sweet.quantity, Sweet.id).limit(limit)
+    ).scalars())
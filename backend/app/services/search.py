@@ -0,0 +1,75 @@
+from typing import Dict, List, Optional
+from sqlalchemy import case, column, table
+from sqlalchemy.engine import Engine, Row
+from sqlalchemy.orm import Session
+from app.db.search_index import FTS_TABLE, has_search_index
+from app.models.sweet import Sweet
+from app.services.catalog import SWEET_COLUMNS
+
+# Trigram matching needs at least three characters; shorter terms use LIKE
+MIN_FTS_TERM_LENGTH = 3
+
+_fts = table(FTS_TABLE, column("rowid"), column("rank"), column(FTS_TABLE))
+
+# Whether each engine's database has the FTS index, looked up once per engine
+_fts_available: Dict[Engine, bool] = {}
+
+
+def _fts_enabled(db: Session) -> bool:
+    bind = db.get_bind()
+    if bind not in _fts_available:
+        with bind.connect() as connection:
+            _fts_available[bind] = has_search_index(connection)
+    return _fts_available[bind]
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_sweets(
+    db: Session,
+    q: Optional[str] = None,
+    category: Optional[str] = None,
+    price_min: Optional[float] = None,
+    price_max: Optional[float] = None,
+    skip: int = 0,
+    limit: int = 50,
+) -> List[Row]:
+    """
+    Return one page of sweets matching the filters, best matches first, as
+    SWEET_COLUMNS rows (see catalog.render_rows).
+
+    Name matching is case-insensitive and partial. On SQLite it runs against
+    the FTS5 trigram index ranked by bm25; elsewhere, and for terms shorter
+    than a trigram, it falls back to LIKE with prefix matches ranked first.
+    Category and price filters are served by the composite indexes on Sweet.
+    """
+    query = db.query(*SWEET_COLUMNS)
+
+    if category:
+        query = query.filter(Sweet.category == category)
+    if price_min is not None:
+        query = query.filter(Sweet.price >= price_min)
+    if price_max is not None:
+        query = query.filter(Sweet.price <= price_max)
+
+    term = (q or "").strip()
+    if term and len(term) >= MIN_FTS_TERM_LENGTH and _fts_enabled(db):
+        phrase = '"' + term.replace('"', '""') + '"'
+        query = (
+            query.join(_fts, _fts.c.rowid == Sweet.id)
+            .filter(_fts.c[FTS_TABLE].op("MATCH")(phrase))
+            .order_by(_fts.c.rank, Sweet.id)
+        )
+    elif term:
+        escaped = _escape_like(term)
+        prefix_first = case((Sweet.name.ilike(f"{escaped}%", escape="\\"), 0), else_=1)
+        query = (
+            query.filter(Sweet.name.ilike(f"%{escaped}%", escape="\\"))
+            .order_by(prefix_first, Sweet.name, Sweet.id)
+        )
+    else:
+        query = query.order_by(Sweet.id)
+
+    return query.offset(skip).limit(limit).all()
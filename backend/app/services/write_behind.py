@@ -0,0 +1,345 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional
+from sqlalchemy import case, select, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.purchase_journal import PurchaseJournalMark
+from app.models.sweet import Sweet
+from app.services.catalog import catalog_cache
+from app.services.events import publish_levels
+from app.services.inventory import STOCK_COLUMNS, OutOfStock, StockLevel, SweetNotFound
+from app.services.orders import OrderDraft, record_orders
+
+logger = logging.getLogger(__name__)
+
+_MARK_ID = 1
+
+
+class _Entry(NamedTuple):
+    seq: int
+    sweet_id: int
+    quantity: int
+    # Sequence number of the first entry of the same reservation
+    order_seq: int
+    # 0 when the reservation was made without a buyer
+    user_id: int
+    unit_price: float
+    created_at: datetime
+
+
+def _format_entry(entry: _Entry) -> str:
+    return (f"{entry.seq} {entry.sweet_id} {entry.quantity} {entry.order_seq} "
+            f"{entry.user_id} {entry.unit_price!r} {entry.created_at.isoformat()}\n")
+
+
+def _parse_entry(parts: List[str]) -> _Entry:
+    return _Entry(*(int(part) for part in parts[:5]), float(parts[5]), datetime.fromisoformat(parts[6]))
+
+
+def _drafts(entries: Iterable[_Entry]) -> List[OrderDraft]:
+    """
+    Group the entries of each reservation with a buyer into an order.
+    """
+    drafts: Dict[int, OrderDraft] = {}
+    for entry in entries:
+        if not entry.user_id:
+            continue
+        if entry.order_seq not in drafts:
+            drafts[entry.order_seq] = OrderDraft(entry.user_id, [], entry.created_at)
+        drafts[entry.order_seq].lines.append((entry.sweet_id, entry.quantity, entry.unit_price))
+    return list(drafts.values())
+
+
+def _read_journal(path: str) -> List[_Entry]:
+    """
+    Journal entries up to the first torn line.
+    """
+    entries = []
+    try:
+        journal = open(path, encoding="utf-8")
+    except FileNotFoundError:
+        return entries
+    with journal:
+        for line in journal:
+            parts = line.split()
+            # A crash mid-write leaves a partial last line; it was never
+            # acknowledged, so it is dropped
+            if not line.endswith("\n") or len(parts) != len(_Entry._fields):
+                break
+            entries.append(_parse_entry(parts))
+    return entries
+
+
+def _apply(db: Session, decrements: Dict[int, int], drafts: List[OrderDraft], seq: int) -> List[StockLevel]:
+    """
+    Write coalesced decrements and their orders, and advance the journal
+    mark, in one transaction.
+    """
+    amounts = case(decrements, value=Sweet.id)
+    # Reservations never exceed the counters, so the clamp only matters when an
+    # admin lowered the quantity underneath pending purchases
+    stmt = (
+        update(Sweet)
+        .where(Sweet.id.in_(decrements))
+        .values(quantity=case((Sweet.quantity > amounts, Sweet.quantity - amounts), else_=0))
+        .execution_options(synchronize_session=False)
+    )
+    if db.get_bind().dialect.update_returning:
+        rows = db.execute(stmt.returning(*STOCK_COLUMNS)).all()
+    else:
+        db.execute(stmt)
+        rows = db.execute(select(*STOCK_COLUMNS).where(Sweet.id.in_(decrements))).all()
+    record_orders(db, drafts)
+
+    mark = db.get(PurchaseJournalMark, _MARK_ID)
+    if mark is None:
+        db.add(PurchaseJournalMark(id=_MARK_ID, applied_seq=seq))
+    else:
+        mark.applied_seq = max(mark.applied_seq, seq)
+    db.commit()
+    return [StockLevel(*row) for row in rows]
+
+
+def recover(db: Session, journal_path: str) -> int:
+    """
+    Apply journaled purchases that never reached the database, then empty
+    the journal. Safe to run any number of times. Returns the last sequence
+    number in use.
+    """
+    mark = db.get(PurchaseJournalMark, _MARK_ID)
+    applied_seq = mark.applied_seq if mark else 0
+
+    entries = _read_journal(journal_path)
+    last_seq = max([applied_seq] + [entry.seq for entry in entries])
+    unapplied = [entry for entry in entries if entry.seq > applied_seq]
+
+    if unapplied:
+        logger.warning("Replaying %d journaled purchase(s) not yet written", len(unapplied))
+        decrements: Dict[int, int] = {}
+        for entry in unapplied:
+            decrements[entry.sweet_id] = decrements.get(entry.sweet_id, 0) + entry.quantity
+        _apply(db, decrements, _drafts(unapplied), last_seq)
+    if os.path.exists(journal_path):
+        open(journal_path, "w").close()
+    return last_seq
+
+
+class PurchaseBuffer:
+    """
+    Write-behind stock for purchases and checkouts.
+
+    Each sweet gets an in-memory counter, seeded from the database on its first
+    purchase. A purchase is checked and taken from the counter under a lock and
+    appended to a journal file before it is acknowledged; a background thread
+    then writes the accumulated decrements as one UPDATE, and the orders as one
+    INSERT per table, per flush. A flash sale costs one write transaction per
+    interval instead of one per purchase. Orders are priced when reserved.
+
+    Durability: an acknowledged purchase is in the journal. The journal is
+    flushed to the OS on every purchase, so it survives a crash of this
+    process; with WRITE_BEHIND_FSYNC it also survives a power loss. Each flush
+    records the last journal sequence number it applied in the same
+    transaction as the decrements, and `recover` (run by `start`) replays
+    only the newer entries, so a crash at any point neither loses nor doubles
+    a purchase. After the commit the journal is atomically replaced by the
+    entries made since, so it never holds more than about one interval.
+    Until a flush, the database, the catalog cache and other processes see
+    the old quantities. The buffer is process-local: run a single worker
+    when it is enabled.
+
+    Other stock writers (restock, update, import, delete) write the database
+    directly and then call `forget`, so the counter is reseeded from the new
+    value minus the purchases still pending.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Held for a whole flush, and while seeding or forgetting counters, so
+        # a seed never reads the database between a flush's commit and its
+        # bookkeeping
+        self._flush_lock = threading.Lock()
+        self._stock: Dict[int, int] = {}
+        self._prices: Dict[int, float] = {}
+        self._pending: Dict[int, int] = {}
+        self._entries: List[_Entry] = []
+        self._seq = 0
+        self._journal = None
+        self._journal_path: Optional[str] = None
+        self._fsync = False
+        self._session_factory: Optional[Callable[[], Session]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self._journal is not None
+
+    def start(
+        self,
+        session_factory: Callable[[], Session],
+        journal_path: Optional[str] = None,
+        interval: Optional[float] = None,
+        background: bool = True,
+    ) -> None:
+        """
+        Recover the journal and start buffering; with `background`, flush
+        every `interval` seconds from a daemon thread.
+        """
+        journal_path = journal_path or settings.WRITE_BEHIND_JOURNAL
+        with session_factory() as db:
+            self._seq = recover(db, journal_path)
+        self._session_factory = session_factory
+        self._fsync = settings.WRITE_BEHIND_FSYNC
+        self._journal_path = journal_path
+        self._journal = open(journal_path, "a", encoding="utf-8")
+        if background:
+            interval = interval if interval is not None else settings.WRITE_BEHIND_FLUSH_INTERVAL
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, args=(interval,), name="purchase-write-behind", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop the flusher, write everything still pending and close the journal.
+        """
+        if not self.enabled:
+            return
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+        with self._lock:
+            self._journal.close()
+            self._journal = None
+            self._stock.clear()
+            self._prices.clear()
+            self._pending.clear()
+            self._entries.clear()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Write-behind flush failed; retrying next interval")
+
+    def _seed(self, sweet_ids: List[int]) -> None:
+        with self._flush_lock:
+            with self._session_factory() as db:
+                rows = {
+                    sweet_id: (quantity, price)
+                    for sweet_id, quantity, price in db.execute(
+                        select(Sweet.id, Sweet.quantity, Sweet.price).where(Sweet.id.in_(sweet_ids))
+                    )
+                }
+            missing = [sweet_id for sweet_id in sweet_ids if sweet_id not in rows]
+            if missing:
+                raise SweetNotFound(*missing)
+            with self._lock:
+                for sweet_id, (quantity, price) in rows.items():
+                    if sweet_id not in self._stock:
+                        self._stock[sweet_id] = quantity - self._pending.get(sweet_id, 0)
+                        self._prices[sweet_id] = price
+
+    def _rewrite_journal(self) -> None:
+        # Called with _lock held, once everything but `_entries` is applied.
+        # The replace is atomic: a crash leaves either the old journal, whose
+        # extra entries recovery skips by sequence number, or the new one.
+        temp_path = self._journal_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as journal:
+            journal.writelines(_format_entry(entry) for entry in self._entries)
+            journal.flush()
+            if self._fsync:
+                os.fsync(journal.fileno())
+        self._journal.close()
+        os.replace(temp_path, self._journal_path)
+        self._journal = open(self._journal_path, "a", encoding="utf-8")
+
+    def reserve_many(self, lines: Dict[int, int], user_id: Optional[int] = None) -> Dict[int, int]:
+        """
+        Take several sweets at once, all or nothing, and return the remaining
+        stock per sweet id. Raises SweetNotFound or OutOfStock. With a
+        `user_id`, the reservation is recorded as that user's order.
+        """
+        while True:
+            with self._lock:
+                unseeded = [sweet_id for sweet_id in lines if sweet_id not in self._stock]
+                if not unseeded:
+                    failed = [sweet_id for sweet_id, quantity in lines.items()
+                              if self._stock[sweet_id] < quantity]
+                    if failed:
+                        raise OutOfStock(*failed)
+                    order_seq = self._seq + 1
+                    created_at = datetime.utcnow()
+                    for sweet_id, quantity in lines.items():
+                        self._seq += 1
+                        entry = _Entry(self._seq, sweet_id, quantity, order_seq, user_id or 0,
+                                       self._prices[sweet_id], created_at)
+                        self._journal.write(_format_entry(entry))
+                        self._entries.append(entry)
+                        self._stock[sweet_id] -= quantity
+                        self._pending[sweet_id] = self._pending.get(sweet_id, 0) + quantity
+                    self._journal.flush()
+                    if self._fsync:
+                        os.fsync(self._journal.fileno())
+                    return {sweet_id: self._stock[sweet_id] for sweet_id in lines}
+            # A concurrent `forget` can drop a counter again; loop until all are seeded
+            self._seed(unseeded)
+
+    def reserve(self, sweet_id: int, quantity: int = 1, user_id: Optional[int] = None) -> int:
+        """
+        Take `quantity` units of a sweet and return its remaining stock.
+        """
+        return self.reserve_many({sweet_id: quantity}, user_id)[sweet_id]
+
+    def forget(self, sweet_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        Drop the counters of sweets whose stock was written elsewhere (all
+        counters when `sweet_ids` is None); they are reseeded on next use.
+        """
+        with self._flush_lock, self._lock:
+            if sweet_ids is None:
+                self._stock.clear()
+                self._prices.clear()
+            else:
+                for sweet_id in sweet_ids:
+                    self._stock.pop(sweet_id, None)
+                    self._prices.pop(sweet_id, None)
+
+    def flush(self) -> int:
+        """
+        Write all pending purchases in one transaction. Returns the number of
+        sweets written.
+        """
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                pending, self._pending = self._pending, {}
+                entries, self._entries = self._entries, []
+                seq = self._seq
+            try:
+                with self._session_factory() as db:
+                    levels = _apply(db, pending, _drafts(entries), seq)
+            except Exception:
+                with self._lock:
+                    for sweet_id, quantity in pending.items():
+                        self._pending[sweet_id] = self._pending.get(sweet_id, 0) + quantity
+                    self._entries[:0] = entries
+                raise
+            catalog_cache.update_stock(levels)
+            publish_levels(levels, "purchase")
+            with self._lock:
+                # Entries up to `seq` are in the database; keep only the ones
+                # reserved since the snapshot
+                self._rewrite_journal()
+            return len(pending)
+
+
+purchase_buffer = PurchaseBuffer()
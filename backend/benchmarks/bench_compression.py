@@ -0,0 +1,83 @@
+"""
+Response compression benchmark: bytes on the wire vs. CPU per response.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_compression
+
+Renders catalog pages of 100, 1000 and 10000 sweets exactly as read_sweets
+does, then compresses each with gzip and (when the brotli package is
+installed) Brotli at several levels, the way CompressionMiddleware would.
+Times are CPU milliseconds per response on one core.
+"""
+import argparse
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from app.services.catalog import render_rows
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PAGE_SIZES = (100, 1000, 10000)
+CATEGORIES = ("Chocolate", "Toffee", "Fudge", "Gummies", "Hard Candy", "Marshmallow", "Licorice")
+
+
+def catalog_page(size: int) -> bytes:
+    created = datetime(2026, 1, 1)
+    rows = [
+        # SweetResponse order: name, category, price, quantity, id, created_at, updated_at
+        (f"Sweet {i} {CATEGORIES[i * 7 % len(CATEGORIES)].lower()} bar", CATEGORIES[i % len(CATEGORIES)],
+         round(0.5 + (i * 37 % 400) / 20, 2), i * 13 % 250, i + 1,
+         created + timedelta(seconds=i), created + timedelta(seconds=i * 3, microseconds=i * 7919 % 10**6))
+        for i in range(size)
+    ]
+    return render_rows(rows)
+
+
+def gzip_codec(level: int):
+    def compress(body: bytes) -> bytes:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress(body) + compressor.flush()
+    return compress
+
+
+def brotli_codec(quality: int):
+    return lambda body: brotli.compress(body, quality=quality)
+
+
+def cpu_ms(fn, body: bytes, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        fn(body)
+        timings.append(time.process_time() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    codecs = {f"gzip-{level}": gzip_codec(level) for level in (1, 6, 9)}
+    if brotli is not None:
+        codecs.update({f"br-{quality}": brotli_codec(quality) for quality in (1, 4, 6, 11)})
+    else:
+        print("brotli is not installed; showing gzip only")
+
+    print(f"{'page':>6} {'codec':>8} {'bytes':>10} {'ratio':>7} {'cpu ms':>8}")
+    for size in PAGE_SIZES:
+        body = catalog_page(size)
+        print(f"{size:>6} {'identity':>8} {len(body):>10} {1:>7.2f} {0:>8.2f}")
+        for name, compress in codecs.items():
+            compressed = compress(body)
+            ratio = len(body) / len(compressed)
+            print(f"{size:>6} {name:>8} {len(compressed):>10} {ratio:>7.2f} {cpu_ms(compress, body, args.repeat):>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Login throughput benchmark: bcrypt on threads vs. the hashing process pool.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_login --logins 64 --rounds 12
+
+Each configuration verifies the same password `--logins` times concurrently
+through `verify_password_async`, the call made by POST /auth/token. Thread
+mode is capped by the GIL; pool mode should scale with the number of cores
+until it runs out of them.
+"""
+import argparse
+import asyncio
+import os
+import time
+
+from app.core import security
+from app.core.config import settings
+
+
+async def _verify_many(hashed: str, logins: int) -> None:
+    await asyncio.gather(*(
+        security.verify_password_async("bench-password", hashed) for _ in range(logins)
+    ))
+
+
+def run(workers: int, hashed: str, logins: int) -> float:
+    settings.PASSWORD_HASH_WORKERS = workers
+    try:
+        # Warm-up so process start-up is not part of the measurement
+        asyncio.run(_verify_many(hashed, max(workers, 1)))
+        started = time.perf_counter()
+        asyncio.run(_verify_many(hashed, logins))
+        return logins / (time.perf_counter() - started)
+    finally:
+        security.shutdown_password_pool()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=settings.BCRYPT_ROUNDS)
+    args = parser.parse_args()
+
+    hashed = security.get_password_hash("bench-password", rounds=args.rounds)
+    cores = os.cpu_count() or 1
+    print(f"bcrypt rounds={args.rounds}, cores={cores}")
+
+    print(f"threads   : {run(0, hashed, args.logins):7.1f} logins/s")
+    workers = 1
+    while workers <= cores:
+        print(f"pool x{workers:<3}: {run(workers, hashed, args.logins):7.1f} logins/s")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Deep-page latency benchmark: OFFSET/LIMIT vs. keyset (cursor) pagination.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_pagination --rows 1000000 --page-size 100
+
+Builds a throwaway SQLite catalog with `--rows` sweets, then fetches one page
+at increasing depths using the exact queries `read_sweets` issues for the
+`skip` and the `cursor` parameters.
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models import Sweet
+
+
+def build_catalog(path: str, rows: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    # Raw executemany: the ORM would take minutes for a million rows
+    now = datetime.utcnow().isoformat(sep=" ")
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany(
+            "INSERT INTO sweets (name, category, price, quantity, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"Sweet {i}", f"Category {i % 50}", 1.0 + i % 20, 100, now, now) for i in range(rows)),
+        )
+    conn.close()
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    print(f"Seeding {args.rows} sweets...")
+    build_catalog(path, args.rows)
+
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+
+    print(f"{'depth':>10} {'offset ms':>10} {'keyset ms':>10}")
+    with Session() as db:
+        base = db.query(Sweet).order_by(Sweet.id)
+        for fraction in (0, 0.01, 0.1, 0.5, 0.9, 0.99):
+            depth = int(args.rows * fraction)
+            # The row before the page; ids start at 1 and have no gaps here
+            last_id = depth
+
+            offset_ms = best_of(lambda: base.offset(depth).limit(args.page_size).all())
+            keyset_ms = best_of(lambda: base.filter(Sweet.id > last_id).limit(args.page_size).all())
+            db.expunge_all()
+            print(f"{depth:>10} {offset_ms:>10.2f} {keyset_ms:>10.2f}")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Purchase throughput benchmark: legacy read-modify-write vs. conditional UPDATE.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_purchase --threads 16 --stock 2000
+
+Each strategy gets a fresh SQLite file with one hot sweet and the same number
+of threads hammering it until the stock is gone. The report shows purchases
+per second and how many units were sold beyond the available stock.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.models import Sweet
+from app.services import inventory
+
+
+def legacy_purchase(db, sweet_id: int) -> bool:
+    # The pre-engine implementation: SELECT, check in Python, decrement, commit.
+    sweet = db.query(Sweet).filter(Sweet.id == sweet_id).first()
+    if sweet.quantity <= 0:
+        return False
+    sweet.quantity -= 1
+    db.add(sweet)
+    db.commit()
+    return True
+
+
+def atomic_purchase(db, sweet_id: int) -> bool:
+    try:
+        inventory.purchase(db, sweet_id, 1)
+    except inventory.OutOfStock:
+        db.rollback()
+        return False
+    db.commit()
+    return True
+
+
+def run(strategy, threads: int, stock: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        sweet = Sweet(name="Hot Sweet", category="Bench", price=1.0, quantity=stock)
+        db.add(sweet)
+        db.commit()
+        sweet_id = sweet.id
+
+    sold = [0] * threads
+    errors = [0] * threads
+
+    def worker(i: int):
+        with Session() as db:
+            # Stop after a few empty reads; the legacy path may still "sell".
+            misses = 0
+            while misses < 3:
+                try:
+                    if strategy(db, sweet_id):
+                        sold[i] += 1
+                        misses = 0
+                    else:
+                        misses += 1
+                except OperationalError:
+                    db.rollback()
+                    errors[i] += 1
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+
+    with Session() as db:
+        final = db.query(Sweet.quantity).filter(Sweet.id == sweet_id).scalar()
+    engine.dispose()
+
+    total = sum(sold)
+    return {
+        "sold": total,
+        "oversold": total - (stock - final),
+        "final_quantity": final,
+        "lock_errors": sum(errors),
+        "purchases_per_second": total / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--stock", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, strategy in (("legacy", legacy_purchase), ("atomic", atomic_purchase)):
+        result = run(strategy, args.threads, args.stock)
+        print(
+            f"{name:>7}: {result['purchases_per_second']:8.1f} purchases/s  "
+            f"sold={result['sold']} oversold={result['oversold']} "
+            f"final={result['final_quantity']} lock_errors={result['lock_errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Catalog page serialization benchmark: ORM + response model vs. column rows + orjson.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_serialization --rows 10000
+
+Builds a throwaway SQLite catalog, then times fetching and encoding one page
+of 100, 1000 and 10000 sweets the ways a list route can produce its body:
+
+  orm+dump_json   ORM objects validated through List[SweetResponse] and
+                  dumped by pydantic (FastAPI's own response_model path)
+  orm+json        the same, dumped to Python and encoded by the stdlib
+  orm+orjson      the same, encoded by orjson (an ORJSONResponse default)
+  rows+orjson     SWEET_COLUMNS rows encoded by render_rows (read_sweets
+                  and search_sweets without the catalog cache)
+"""
+import argparse
+import json
+import os
+import tempfile
+from typing import List
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models import Sweet
+from app.schemas.sweet import SweetResponse
+from app.services.catalog import SWEET_COLUMNS, render_rows
+from benchmarks.bench_pagination import best_of, build_catalog
+
+PAGE_SIZES = (100, 1000, 10000)
+
+_adapter = TypeAdapter(List[SweetResponse])
+
+
+def orm_page(db, size: int):
+    sweets = db.query(Sweet).order_by(Sweet.id).limit(size).all()
+    # A fresh identity map per request, as each request has its own session
+    db.expunge_all()
+    return _adapter.validate_python(sweets, from_attributes=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=max(PAGE_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    print(f"Seeding {args.rows} sweets...")
+    build_catalog(path, args.rows)
+
+    engine = create_engine(f"sqlite:///{path}")
+    Session = sessionmaker(bind=engine)
+
+    strategies = {
+        "orm+dump_json": lambda db, size: _adapter.dump_json(orm_page(db, size)),
+        "orm+json": lambda db, size: json.dumps(
+            _adapter.dump_python(orm_page(db, size), mode="json")
+        ).encode(),
+        "orm+orjson": lambda db, size: orjson.dumps(_adapter.dump_python(orm_page(db, size), mode="json")),
+        "rows+orjson": lambda db, size: render_rows(
+            db.execute(select(*SWEET_COLUMNS).order_by(Sweet.id).limit(size)).all()
+        ),
+    }
+
+    print(f"{'page':>6} " + " ".join(f"{name + ' ms':>16}" for name in strategies))
+    with Session() as db:
+        for size in PAGE_SIZES:
+            if size > args.rows:
+                break
+            timings = [
+                best_of(lambda: encode(db, size), args.repeat) for encode in strategies.values()
+            ]
+            print(f"{size:>6} " + " ".join(f"{ms:>16.2f}" for ms in timings))
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Mixed read/purchase load against the default and production engine profiles.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_sqlite_profile --threads 16 --seconds 5 --write-ratio 0.1
+
+For each profile a fresh SQLite file is seeded with `--sweets` rows. Then
+`--threads` threads loop for `--seconds`: most iterations read a catalog page,
+and `--write-ratio` of them purchase one unit through the inventory engine.
+The report shows operations per second and lock errors.
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.db.base import Base
+from app.db.session import create_db_engine
+from app.models import Sweet
+from app.services import inventory
+
+
+def run(profile: str, args) -> dict:
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = create_db_engine(f"sqlite:///{path}", profile=profile)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    with Session() as db:
+        db.add_all(
+            Sweet(name=f"Sweet {i}", category="Bench", price=1.0, quantity=1_000_000)
+            for i in range(args.sweets)
+        )
+        db.commit()
+
+    counts = {"reads": 0, "purchases": 0, "lock_errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(seed: int):
+        rng = random.Random(seed)
+        local = {"reads": 0, "purchases": 0, "lock_errors": 0}
+        while time.perf_counter() < deadline:
+            with Session() as db:
+                try:
+                    if rng.random() < args.write_ratio:
+                        inventory.purchase(db, rng.randint(1, args.sweets), 1)
+                        db.commit()
+                        local["purchases"] += 1
+                    else:
+                        offset = rng.randint(0, max(args.sweets - 50, 0))
+                        db.query(Sweet).order_by(Sweet.id).offset(offset).limit(50).all()
+                        local["reads"] += 1
+                except OperationalError:
+                    db.rollback()
+                    local["lock_errors"] += 1
+        with lock:
+            for key, value in local.items():
+                counts[key] += value
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+
+    counts["ops_per_second"] = (counts["reads"] + counts["purchases"]) / elapsed
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--sweets", type=int, default=1000)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    for profile in ("default", "production"):
+        result = run(profile, args)
+        print(
+            f"{profile:>10}: {result['ops_per_second']:8.1f} ops/s  "
+            f"reads={result['reads']} purchases={result['purchases']} "
+            f"lock_errors={result['lock_errors']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
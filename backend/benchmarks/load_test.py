@@ -0,0 +1,312 @@
+"""
+API load test: requests/second and tail latency under concurrent clients.
+
+Run from the backend directory:
+
+    python -m benchmarks.load_test --mix mixed --clients 32 --duration 30
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --sweets 100000 --mix browse
+    python -m benchmarks.load_test --compare before.json after.json
+
+By default it seeds a throwaway SQLite database with `seed_db.seed_synthetic`
+(--sweets, --users) and drives `create_application()` in-process through
+httpx's ASGI transport: the numbers include routing, auth, validation,
+serialization and the database, but no network. With --url it drives a
+running server instead (e.g. `python -m app.serve`), seeded beforehand with
+`python seed_db.py --sweets N --users M`; --sweets must then match N.
+
+Each client repeatedly picks an operation at random, weighted by the mix,
+and sends it as soon as the previous response arrives. Operations: list (a
+keyset page of 100), search, detail, purchase, restock (as the admin) and
+login. Per operation and overall, the run reports requests, errors,
+requests/second and p50/p95/p99/max latency in milliseconds, and writes
+them as JSON to --out together with the commit, settings and arguments.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+
+MIXES = {
+    "browse": {"list": 40, "search": 30, "detail": 30},
+    "shop": {"list": 25, "search": 15, "detail": 30, "purchase": 25, "login": 5},
+    "stock": {"list": 30, "detail": 30, "purchase": 20, "restock": 20},
+    "login": {"login": 100},
+    "mixed": {"list": 25, "search": 20, "detail": 25, "purchase": 15, "restock": 10, "login": 5},
+}
+
+SEARCH_TERMS = ("choc", "caramel", "mint truffle", "berry", "honey bar", "salted", "lollipop", "zz")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    """
+    A named mix, or weights like "list=50,purchase=50".
+    """
+    if value in MIXES:
+        return MIXES[value]
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS or not weight.isdigit():
+            raise argparse.ArgumentTypeError(f"invalid mix entry {part!r}")
+        mix[name] = int(weight)
+    return mix
+
+
+class Context:
+    """
+    What the operations need: tokens, the sweet id range and credentials.
+    """
+
+    def __init__(self, sweets: int, users: int, user_tokens: List[str], admin_token: str):
+        self.sweets = sweets
+        self.users = users
+        self.user_tokens = user_tokens
+        self.admin_token = admin_token
+
+    def user(self, rng: random.Random) -> dict:
+        return {"Authorization": f"Bearer {rng.choice(self.user_tokens)}"}
+
+    def admin(self) -> dict:
+        return {"Authorization": f"Bearer {self.admin_token}"}
+
+    def sweet_id(self, rng: random.Random) -> int:
+        return rng.randint(1, self.sweets)
+
+
+async def op_list(client, ctx, rng):
+    from app.core.pagination import encode_cursor
+    after = rng.randint(0, max(ctx.sweets - 100, 0))
+    return await client.get(f"/api/sweets/?limit=100&cursor={encode_cursor(after)}", headers=ctx.user(rng))
+
+
+async def op_search(client, ctx, rng):
+    params = {"q": rng.choice(SEARCH_TERMS)}
+    if rng.random() < 0.3:
+        params["price_max"] = 10
+    return await client.get("/api/sweets/search", params=params, headers=ctx.user(rng))
+
+
+async def op_detail(client, ctx, rng):
+    return await client.get(f"/api/sweets/{ctx.sweet_id(rng)}", headers=ctx.user(rng))
+
+
+async def op_purchase(client, ctx, rng):
+    return await client.post(f"/api/sweets/{ctx.sweet_id(rng)}/purchase", headers=ctx.user(rng))
+
+
+async def op_restock(client, ctx, rng):
+    return await client.post(
+        f"/api/sweets/{ctx.sweet_id(rng)}/restock", json={"amount": 10}, headers=ctx.admin()
+    )
+
+
+async def op_login(client, ctx, rng):
+    from seed_db import SYNTHETIC_PASSWORD
+    email = f"user{rng.randrange(ctx.users)}@load.test"
+    return await client.post("/auth/token", json={"username": email, "password": SYNTHETIC_PASSWORD})
+
+
+OPERATIONS = {
+    "list": op_list,
+    "search": op_search,
+    "detail": op_detail,
+    "purchase": op_purchase,
+    "restock": op_restock,
+    "login": op_login,
+}
+
+
+async def login(client, email: str, password: str) -> str:
+    response = await client.post("/auth/token", json={"username": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def percentile(ordered: List[float], p: float) -> float:
+    # Nearest-rank percentile of an already sorted list
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / seconds, 1) if seconds else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+async def run_clients(client, ctx, mix: Dict[str, int], clients: int, seconds: float, seed: int):
+    names, weights = list(mix), list(mix.values())
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    deadline = time.perf_counter() + seconds
+
+    async def worker(n: int):
+        rng = random.Random(seed * 1000 + n)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await OPERATIONS[name](client, ctx, rng)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies[name].append(time.perf_counter() - started)
+            if failed:
+                errors[name] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(n) for n in range(clients)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def load(args, client) -> dict:
+    from seed_db import ADMIN_EMAIL, ADMIN_PASSWORD, SYNTHETIC_PASSWORD
+
+    # A few distinct customers, logged in once up front
+    user_tokens = [
+        await login(client, f"user{i}@load.test", SYNTHETIC_PASSWORD) for i in range(min(args.users, 8))
+    ]
+    ctx = Context(args.sweets, args.users, user_tokens, await login(client, ADMIN_EMAIL, ADMIN_PASSWORD))
+
+    if args.warmup:
+        await run_clients(client, ctx, args.mix, args.clients, args.warmup, args.seed + 1)
+    latencies, errors, seconds = await run_clients(client, ctx, args.mix, args.clients, args.duration, args.seed)
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    return {
+        "operations": {
+            name: summarize(latencies[name], errors[name], seconds) for name in args.mix if latencies[name]
+        },
+        "total": summarize(all_latencies, sum(errors.values()), seconds),
+    }
+
+
+async def run_in_process(args) -> dict:
+    from app.main import create_application, on_shutdown, on_startup
+    from app.db.session import SessionLocal
+    from seed_db import seed_synthetic
+
+    on_startup()
+    with SessionLocal() as db:
+        seed_synthetic(db, args.sweets, args.users)
+    transport = httpx.ASGITransport(app=create_application())
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            return await load(args, client)
+    finally:
+        await on_shutdown()
+
+
+async def run_remote(args) -> dict:
+    limits = httpx.Limits(max_connections=args.clients)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        return await load(args, client)
+
+
+def git_commit() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                                capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit.stdout.strip(), "dirty": bool(status.stdout.strip())}
+
+
+def print_report(report: dict) -> None:
+    print(f"{'operation':>10} {'requests':>9} {'errors':>7} {'req/s':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    rows = list(report["operations"].items()) + [("total", report["total"])]
+    for name, stats in rows:
+        print(f"{name:>10} {stats['requests']:>9} {stats['errors']:>7} {stats['rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f} {stats['max_ms']:>8.2f}")
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    print(f"{before.get('commit') or before_path} -> {after.get('commit') or after_path}")
+    print(f"{'operation':>10} {'metric':>7} {'before':>10} {'after':>10} {'change':>8}")
+    rows = [(name, stats, before["operations"].get(name)) for name, stats in after["operations"].items()]
+    rows.append(("total", after["total"], before["total"]))
+    for name, new, old in rows:
+        if old is None:
+            continue
+        for metric in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            change = (new[metric] - old[metric]) / old[metric] * 100 if old[metric] else 0.0
+            print(f"{name:>10} {metric:>7} {old[metric]:>10.2f} {new[metric]:>10.2f} {change:>+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mix", type=parse_mix, default="mixed",
+                        help=f"one of {', '.join(MIXES)}, or weights like list=50,purchase=50")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before the run")
+    parser.add_argument("--sweets", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--url", help="drive a running server instead of an in-process app")
+    parser.add_argument("--out", default="load_test.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="compare two result files instead of running")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.url is None:
+        # Settings and engines are created on import, so point them at a
+        # throwaway database before any app module is loaded
+        path = os.path.join(tempfile.mkdtemp(), "load.db")
+        os.environ["SQLALCHEMY_DATABASE_URL"] = f"sqlite:///{path}"
+        os.environ.setdefault("DB_PROFILE", "production")
+        print(f"Seeding {args.sweets} sweets and {args.users} users...")
+
+    results = asyncio.run(run_in_process(args) if args.url is None else run_remote(args))
+
+    from app.core.config import settings
+    report = {
+        **git_commit(),
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "target": args.url or "in-process",
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "args": {key: value for key, value in vars(args).items() if key != "compare"},
+        # Only known for the in-process app; a server has its own environment
+        "settings": None if args.url else {
+            key: getattr(settings, key)
+            for key in ("DB_PROFILE", "DB_ASYNC", "CATALOG_CACHE_ENABLED", "PURCHASE_WRITE_BEHIND",
+                        "COMPRESSION_ENABLED", "WEB_CONCURRENCY", "BCRYPT_ROUNDS")
+        },
+        **results,
+    }
+    print_report(report)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,48 @@
+import argparse
+from datetime import datetime
+from sqlalchemy import insert
 from app.db.session import SessionLocal
 from app.models.sweet import Sweet
 from app.models.user import User
 from app.core.security import get_password_hash
 
+ADMIN_EMAIL = "admin@sweetshop.com"
+ADMIN_PASSWORD = "admin123"
+
+# Synthetic customers are user{i}@load.test, all with this password
+SYNTHETIC_PASSWORD = "loadtest123"
+
+FLAVOURS = ("Dark", "Milk", "Caramel", "Toffee", "Mint", "Berry", "Lemon", "Honey",
+            "Vanilla", "Hazelnut", "Coconut", "Cherry", "Salted", "Cinnamon", "Orange", "Raspberry")
+SHAPES = ("Bar", "Drop", "Truffle", "Bonbon", "Chew", "Twist", "Swirl", "Crunch", "Fudge", "Lollipop")
+CATEGORIES = ("Chocolate", "Candy", "Cake", "Gummy", "Toffee", "Licorice", "Marshmallow", "Hard Candy")
+
+def _ensure_admin(db):
+    admin = db.query(User).filter(User.email == ADMIN_EMAIL).first()
+    if not admin:
+        admin = User(
+            name="Admin User",
+            email=ADMIN_EMAIL,
+            password_hash=get_password_hash(ADMIN_PASSWORD),
+            role="ADMIN"
+        )
+        db.add(admin)
+        print(f"Created Admin: {ADMIN_EMAIL} / {ADMIN_PASSWORD}")
+    return admin
+
 def seed():
     db = SessionLocal()
-    
+
     # Check if data exists
     if db.query(Sweet).count() > 0:
         print("Sweets already exist. Skipping seed.")
         return
 
     print("Seeding database...")
-    
+
     # Create Admin User if not exists
-    admin_email = "admin@sweetshop.com"
-    admin = db.query(User).filter(User.email == admin_email).first()
-    if not admin:
-        admin = User(
-            name="Admin User",
-            email=admin_email,
-            password_hash=get_password_hash("admin123"),
-            role="ADMIN"
-        )
-        db.add(admin)
-        print(f"Created Admin: {admin_email} / admin123")
-    
+    _ensure_admin(db)
+
     # Create Sweets
     sweets = [
         Sweet(name="Dark Heaven Chocolate", category="Chocolate", price=5.99, quantity=50),
@@ -34,13 +51,58 @@ def seed():
         Sweet(name="Gummy Bears", category="Candy", price=3.00, quantity=200),
         Sweet(name="Hazelnut Truffle", category="Chocolate", price=8.50, quantity=40),
     ]
-    
+
     for s in sweets:
         db.add(s)
-    
+
     db.commit()
     print(f"Added {len(sweets)} sweets.")
     db.close()
 
+def synthetic_name(i: int) -> str:
+    return f"{FLAVOURS[i % len(FLAVOURS)]} {SHAPES[i // len(FLAVOURS) % len(SHAPES)]} {i}"
+
+def seed_synthetic(db, sweets: int, users: int, quantity: int = 1_000_000, chunk_size: int = 5000):
+    """
+    Add `sweets` generated sweets and `users` customers (user{i}@load.test)
+    plus the admin, for load testing.
+
+    Rows go in with Core executemany, one chunk per transaction. All the
+    customers share a single password hash: hashing each one with bcrypt
+    would take minutes.
+    """
+    _ensure_admin(db)
+    db.commit()
+
+    now = datetime.utcnow()
+    for start in range(0, sweets, chunk_size):
+        db.execute(insert(Sweet), [
+            {"name": synthetic_name(i), "category": CATEGORIES[i % len(CATEGORIES)],
+             "price": round(0.5 + (i * 37 % 400) / 20, 2), "quantity": quantity,
+             "created_at": now, "updated_at": now}
+            for i in range(start, min(start + chunk_size, sweets))
+        ])
+        db.commit()
+
+    password_hash = get_password_hash(SYNTHETIC_PASSWORD)
+    for start in range(0, users, chunk_size):
+        db.execute(insert(User), [
+            {"name": f"Load User {i}", "email": f"user{i}@load.test",
+             "password_hash": password_hash, "role": "USER"}
+            for i in range(start, min(start + chunk_size, users))
+        ])
+        db.commit()
+    print(f"Added {sweets} sweets and {users} users ({SYNTHETIC_PASSWORD}).")
+
 if __name__ == "__main__":
-    seed()
+    parser = argparse.ArgumentParser(description="Seed the database with demo or synthetic data.")
+    parser.add_argument("--sweets", type=int, default=0, help="Generate this many sweets instead of the demo set")
+    parser.add_argument("--users", type=int, default=0, help="Generate this many customers")
+    args = parser.parse_args()
+    if args.sweets or args.users:
+        from app.db.init_db import init_db
+        init_db()
+        with SessionLocal() as session:
+            seed_synthetic(session, args.sweets, args.users)
+    else:
+        seed()
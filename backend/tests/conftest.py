@@ -5,11 +5,19 @@ from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
 
 from app.main import app
+from app.core.config import settings
 from app.db.base import Base
 from app.db.session import get_db
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash, token_cache
+from app.core.deps import user_cache
+from app.services.catalog import catalog_cache
+from app.services.alerts import low_stock_detector
 from app.models.user import User
 
+# Hash passwords in threads: spawning the bcrypt process pool for every
+# TestClient would dominate the suite's runtime (see test_password_pool.py)
+settings.PASSWORD_HASH_WORKERS = 0
+
 # Use a separate SQLite database for testing to avoid affecting the development DB
 SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///./test.db"
 
@@ -36,6 +44,19 @@ def db() -> Generator:
     # Teardown
     session.close()
     Base.metadata.drop_all(bind=engine_test)
+    # Ids are reused by the next test's fresh tables
+    user_cache.clear()
+    token_cache.clear()
+    catalog_cache.invalidate()
+    low_stock_detector.invalidate()
+
+@pytest.fixture(scope="function")
+def session_factory(db):
+    """
+    Fixture that returns the test sessionmaker, for tests that need
+    several independent sessions (e.g. one per thread).
+    """
+    return TestingSessionLocal
 
 @pytest.fixture(scope="function")
 def client(db) -> Generator:
@@ -94,3 +115,16 @@ def admin_user_token_headers(client, db) -> Dict[str, str]:
     login_res = client.post("/auth/token", json={"username": user_in.email, "password": password})
     token = login_res.json()["access_token"]
     return {"Authorization": f"Bearer {token}"}
+
+@pytest.fixture(scope="function")
+def create_sweet(client, admin_user_token_headers):
+    """
+    Fixture returning a factory that adds a sweet through the API as the
+    admin and returns its id.
+    """
+    def create(name: str = "Test Sweet", category: str = "Candy", price: float = 1.0, quantity: int = 10) -> int:
+        payload = {"name": name, "category": category, "price": price, "quantity": quantity}
+        response = client.post("/api/sweets", json=payload, headers=admin_user_token_headers)
+        assert response.status_code == 201, response.text
+        return response.json()["id"]
+    return create
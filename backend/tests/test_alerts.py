@@ -0,0 +1,111 @@
+from fastapi import status
+from sqlalchemy import event
+
+from app.models.sweet import Sweet
+from app.services.alerts import low_stock_detector
+from app.services.events import EventBus, StockChanged
+
+
+def _alerts(client, headers):
+    return {a["sweet_id"]: a for a in client.get("/api/admin/alerts", headers=headers).json()}
+
+
+def test_alerts_follow_stock_changes(
+    client, db, normal_user_token_headers, admin_user_token_headers, create_sweet
+):
+    """Purchases raise alerts and restocks clear them; alert reads never query sweets."""
+    sweet_id = create_sweet("Popular", quantity=7)
+    assert _alerts(client, admin_user_token_headers) == {}
+
+    reads = []
+    def record(conn, cursor, statement, *args):
+        if "sweets" in statement:
+            reads.append(statement)
+
+    def alerts():
+        event.listen(db.get_bind(), "before_cursor_execute", record)
+        try:
+            return _alerts(client, admin_user_token_headers)
+        finally:
+            event.remove(db.get_bind(), "before_cursor_execute", record)
+
+    client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 2}, headers=normal_user_token_headers)
+    alert = alerts()[sweet_id]
+    client.post(f"/api/sweets/{sweet_id}/restock", json={"amount": 10}, headers=admin_user_token_headers)
+
+    assert (alert["quantity"], alert["threshold"]) == (5, 5)
+    assert alerts() == {}
+    assert reads == []
+
+
+def test_existing_low_stock_is_loaded_once(client, db, admin_user_token_headers):
+    """Sweets already low before any event are found on first read."""
+    db.add(Sweet(name="Forgotten", category="Alerts", price=1.0, quantity=0))
+    db.commit()
+
+    alerts = _alerts(client, admin_user_token_headers)
+    assert [a["name"] for a in alerts.values()] == ["Forgotten"]
+
+
+def test_thresholds_per_sweet_and_category(client, admin_user_token_headers, create_sweet):
+    """Sweet overrides beat category overrides, which beat the default."""
+    gum = create_sweet("Gum", quantity=20, category="Chewy")
+    toffee = create_sweet("Toffee", quantity=20, category="Chewy")
+    fudge = create_sweet("Fudge", quantity=8, category="Chocolate")
+
+    res = client.put("/api/admin/alerts/thresholds", json={"category": "Chewy", "threshold": 25},
+                     headers=admin_user_token_headers)
+    assert set(a["sweet_id"] for a in res.json()) == {gum, toffee}
+
+    res = client.put("/api/admin/alerts/thresholds", json={"sweet_id": gum, "threshold": 10},
+                     headers=admin_user_token_headers)
+    assert [a["sweet_id"] for a in res.json()] == [toffee]
+
+    client.put("/api/admin/alerts/thresholds", json={"category": "Chocolate", "threshold": 8},
+               headers=admin_user_token_headers)
+    client.put("/api/admin/alerts/thresholds", json={"category": "Chewy", "threshold": None},
+               headers=admin_user_token_headers)
+    assert set(_alerts(client, admin_user_token_headers)) == {fudge}
+
+    res = client.put("/api/admin/alerts/thresholds", json={"sweet_id": gum, "category": "Chewy", "threshold": 1},
+                     headers=admin_user_token_headers)
+    assert res.status_code == 422
+
+
+def test_stored_thresholds_apply_to_events_seen_before_loading(
+    client, normal_user_token_headers, admin_user_token_headers, create_sweet
+):
+    """An event that arrives before the overrides are loaded is checked again against them."""
+    sweet_id = create_sweet("Early Bird", quantity=30)
+    client.put("/api/admin/alerts/thresholds", json={"sweet_id": sweet_id, "threshold": 20},
+               headers=admin_user_token_headers)
+    low_stock_detector.invalidate()
+
+    client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 15}, headers=normal_user_token_headers)
+    alert = _alerts(client, admin_user_token_headers)[sweet_id]
+    assert (alert["quantity"], alert["threshold"]) == (15, 20)
+
+
+def test_deleted_sweets_stop_alerting(client, normal_user_token_headers, admin_user_token_headers, create_sweet):
+    """Deleting a sweet removes its alert; alerts are admin only."""
+    sweet_id = create_sweet("Gone", quantity=1)
+    assert sweet_id in _alerts(client, admin_user_token_headers)
+    client.delete(f"/api/sweets/{sweet_id}", headers=admin_user_token_headers)
+    assert _alerts(client, admin_user_token_headers) == {}
+
+    res = client.get("/api/admin/alerts", headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_failing_handler_does_not_stop_others():
+    """A broken subscriber is isolated from the publisher and other handlers."""
+    bus = EventBus()
+    seen = []
+    def broken(event):
+        raise RuntimeError("boom")
+    bus.subscribe(StockChanged, broken)
+    bus.subscribe(StockChanged, seen.append)
+
+    event = StockChanged(1, "Fudge", "Chocolate", 0, None, "purchase")
+    bus.publish(event)
+    assert seen == [event]
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import status
+
+from app.models.rollup import SweetRollup
+from app.services import orders, rollups
+
+
+def test_rollups_follow_purchases_and_restocks(
+    client, normal_user_token_headers, admin_user_token_headers, create_sweet
+):
+    """Revenue per category and top sellers come from the maintained rollups."""
+    fudge = create_sweet("Fudge", category="Chocolate", price=2.0)
+    truffle = create_sweet("Truffle", category="Chocolate", price=3.0)
+    gum = create_sweet("Gum", category="Chewy", price=0.5)
+
+    client.post(f"/api/sweets/{fudge}/purchase", json={"quantity": 4}, headers=normal_user_token_headers)
+    client.post("/api/sweets/checkout", json={"items": [{"sweet_id": truffle}, {"sweet_id": gum, "quantity": 2}]},
+                headers=normal_user_token_headers)
+    client.post("/api/sweets/restock", json={"items": [{"sweet_id": gum, "amount": 10}]}, headers=admin_user_token_headers)
+    client.post(f"/api/sweets/{fudge}/restock", json={"amount": 5}, headers=admin_user_token_headers)
+
+    res = client.get("/api/sweets/analytics/revenue", headers=admin_user_token_headers)
+    assert res.status_code == status.HTTP_200_OK
+    by_category = {row["category"]: row for row in res.json()}
+    assert by_category["Chocolate"]["units_sold"] == 5
+    assert by_category["Chocolate"]["revenue"] == 11.0
+    assert by_category["Chocolate"]["units_restocked"] == 5
+    assert (by_category["Chewy"]["revenue"], by_category["Chewy"]["units_restocked"]) == (1.0, 10)
+
+    res = client.get("/api/sweets/analytics/top-sellers?granularity=hour&limit=2", headers=admin_user_token_headers)
+    assert [(row["name"], row["units_sold"]) for row in res.json()] == [("Fudge", 4), ("Gum", 2)]
+
+
+def test_aware_range_parameters_are_converted_to_utc(
+    client, normal_user_token_headers, admin_user_token_headers, create_sweet
+):
+    """Z-suffixed and offset timestamps are compared as UTC instants."""
+    fudge = create_sweet("Fudge", category="Chocolate")
+    client.post(f"/api/sweets/{fudge}/purchase", headers=normal_user_token_headers)
+    url = "/api/sweets/analytics/revenue"
+
+    day_ago = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+    res = client.get(url, params={"start": day_ago}, headers=admin_user_token_headers)
+    assert res.status_code == status.HTTP_200_OK
+    assert [row["units_sold"] for row in res.json()] == [1]
+
+    # Two hours ago, written in UTC+5: its wall-clock time is three hours ahead
+    two_hours_ago = datetime.now(timezone(timedelta(hours=5))) - timedelta(hours=2)
+    res = client.get(url, params={"granularity": "hour", "start": two_hours_ago.isoformat()},
+                     headers=admin_user_token_headers)
+    assert [row["units_sold"] for row in res.json()] == [1]
+
+
+def test_sales_are_bucketed_by_hour_and_day(db, session_factory):
+    """A sale counts once in its hour bucket and once in its day bucket."""
+    from app.models.sweet import Sweet
+    sweet = Sweet(name="Nougat", category="Classic", price=1.0, quantity=10)
+    db.add(sweet)
+    db.commit()
+
+    drafts = [
+        orders.OrderDraft(1, [(sweet.id, 1, 1.0)], datetime(2026, 3, 1, 9, 15)),
+        orders.OrderDraft(1, [(sweet.id, 2, 1.0)], datetime(2026, 3, 1, 9, 45)),
+        orders.OrderDraft(1, [(sweet.id, 3, 1.0)], datetime(2026, 3, 1, 17, 5)),
+    ]
+    orders.record_orders(db, drafts)
+    db.commit()
+
+    rows = db.query(SweetRollup).order_by(SweetRollup.granularity, SweetRollup.bucket).all()
+    assert [(r.granularity, r.bucket.hour, r.units_sold) for r in rows] == [
+        ("day", 0, 6), ("hour", 9, 3), ("hour", 17, 3),
+    ]
+    hourly = rollups.category_revenue(db, "hour", datetime(2026, 3, 1, 9, 30), datetime(2026, 3, 1, 12))
+    assert [(r.bucket.hour, r.units_sold) for r in hourly] == [(9, 3)]
+
+
+def test_low_stock_and_admin_only(client, normal_user_token_headers, admin_user_token_headers, create_sweet):
+    """Low stock lists the emptiest sweets first; analytics are admin only."""
+    create_sweet("Plenty", category="Tests", quantity=100)
+    low = create_sweet("Low", category="Tests", quantity=3)
+    empty = create_sweet("Empty", category="Tests", quantity=0)
+
+    res = client.get("/api/sweets/analytics/low-stock?threshold=5", headers=admin_user_token_headers)
+    assert [s["id"] for s in res.json()] == [empty, low]
+
+    for path in ("revenue", "top-sellers", "low-stock"):
+        res = client.get(f"/api/sweets/analytics/{path}", headers=normal_user_token_headers)
+        assert res.status_code == status.HTTP_403_FORBIDDEN
+    res = client.get("/api/sweets/analytics/revenue?start=2026-01-02T00:00:00&end=2026-01-01T00:00:00",
+                     headers=admin_user_token_headers)
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
@@ -0,0 +1,144 @@
+import asyncio
+
+import pytest
+from fastapi import status
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.async_session import get_async_db, to_async_url
+from app.db.session import get_db
+
+ASYNC_TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+
+@pytest.fixture(scope="function")
+def async_client(db, session_factory, monkeypatch):
+    """
+    TestClient for an application built with DB_ASYNC, sharing the test
+    database file with the `db` fixture.
+    """
+    pytest.importorskip("aiosqlite")
+    monkeypatch.setattr(settings, "DB_ASYNC", True)
+    from app.main import create_application
+    application = create_application()
+
+    engine = create_async_engine(ASYNC_TEST_DATABASE_URL)
+    AsyncTestingSessionLocal = async_sessionmaker(engine, autoflush=False)
+
+    async def override_get_async_db():
+        async with AsyncTestingSessionLocal() as session:
+            yield session
+
+    def override_get_db():
+        with session_factory() as session:
+            yield session
+
+    application.dependency_overrides[get_async_db] = override_get_async_db
+    # Routes without an async version still use sync sessions
+    application.dependency_overrides[get_db] = override_get_db
+    with TestClient(application) as c:
+        yield c
+    asyncio.run(engine.dispose())
+
+def _login(client, email, password="password123"):
+    res = client.post("/auth/token", json={"username": email, "password": password})
+    return {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+def test_to_async_url():
+    """Sync URLs map to their async drivers."""
+    assert to_async_url("sqlite:///./sweet_shop.db") == "sqlite+aiosqlite:///./sweet_shop.db"
+    assert to_async_url("postgresql://u:p@host/db") == "postgresql+asyncpg://u:p@host/db"
+
+def test_async_routes_end_to_end(async_client, db):
+    """Register, login, catalog and purchases work on the async engine."""
+    from app.core.security import get_password_hash
+    from app.models.user import User
+    db.add(User(name="Admin", email="admin@async.com", password_hash=get_password_hash("adminpass"), role="ADMIN"))
+    db.commit()
+    admin = _login(async_client, "admin@async.com", "adminpass")
+
+    res = async_client.post("/auth/register", json={"name": "Async", "email": "async@example.com", "password": "password123"})
+    assert res.status_code == status.HTTP_201_CREATED
+    user = _login(async_client, "async@example.com")
+
+    created = async_client.post("/api/sweets", json={"name": "Async Fudge", "category": "Async", "price": 2.0, "quantity": 5}, headers=admin)
+    assert created.status_code == status.HTTP_201_CREATED
+    sweet_id = created.json()["id"]
+
+    res = async_client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 2}, headers=user)
+    assert res.json()["remaining_quantity"] == 3
+    res = async_client.post("/api/sweets/checkout", json={"items": [{"sweet_id": sweet_id, "quantity": 4}]}, headers=user)
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    assert async_client.get(f"/api/sweets/{sweet_id}", headers=user).json()["quantity"] == 3
+    assert [s["name"] for s in async_client.get("/api/sweets/search?q=fudge", headers=user).json()] == ["Async Fudge"]
+    assert async_client.get("/api/sweets/999999", headers=user).status_code == status.HTTP_404_NOT_FOUND
+    assert async_client.post(f"/api/sweets/{sweet_id}/restock", json={"amount": 1}, headers=user).status_code == status.HTTP_403_FORBIDDEN
+
+def test_async_bulk_import_and_export(async_client, db):
+    """Bulk import and the streaming export work on the async engine."""
+    from app.core.security import get_password_hash
+    from app.models.user import User
+    db.add(User(name="Admin", email="bulk@async.com", password_hash=get_password_hash("adminpass"), role="ADMIN"))
+    db.commit()
+    admin = _login(async_client, "bulk@async.com", "adminpass")
+
+    body = b"name,category,price,quantity\nAsync Toffee,Async,1.5,4\n"
+    res = async_client.post("/api/sweets/import", files={"file": ("sweets.csv", body)}, headers=admin)
+    assert res.json()["created"] == 1
+
+    res = async_client.get("/api/sweets/export?format=ndjson", headers=admin)
+    assert res.status_code == status.HTTP_200_OK
+    assert "Async Toffee" in res.text
+
+def _on_event_loop():
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+def test_import_and_write_behind_purchases_run_off_the_event_loop(async_client, db, session_factory,
+                                                                 monkeypatch, tmp_path):
+    """CPU-bound imports and buffered purchases do not block the event loop."""
+    from app.api import sweets as sweets_api, sweets_async
+    from app.core.security import get_password_hash
+    from app.models.sweet import Sweet
+    from app.models.user import User
+    from app.services import bulk
+    from app.services.write_behind import PurchaseBuffer
+    db.add(User(name="Admin", email="loop@async.com", password_hash=get_password_hash("adminpass"), role="ADMIN"))
+    sweet = Sweet(name="Loop Fudge", category="Async", price=1.0, quantity=5)
+    db.add(sweet)
+    db.commit()
+    admin = _login(async_client, "loop@async.com", "adminpass")
+
+    on_loop = []
+    import_sweets = bulk.import_sweets
+    def spy_import(*args):
+        on_loop.append(("import", _on_event_loop()))
+        return import_sweets(*args)
+    monkeypatch.setattr(bulk, "import_sweets", spy_import)
+
+    buffer = PurchaseBuffer()
+    buffer.start(session_factory, journal_path=str(tmp_path / "purchases.log"), background=False)
+    reserve_many = buffer.reserve_many
+    def spy_reserve(*args):
+        on_loop.append(("reserve", _on_event_loop()))
+        return reserve_many(*args)
+    monkeypatch.setattr(buffer, "reserve_many", spy_reserve)
+    monkeypatch.setattr(sweets_api, "purchase_buffer", buffer)
+    monkeypatch.setattr(sweets_async, "purchase_buffer", buffer)
+    try:
+        body = b"name,category,price,quantity\nLoop Toffee,Async,1.5,4\n"
+        assert async_client.post("/api/sweets/import", files={"file": ("sweets.csv", body)},
+                                 headers=admin).json()["created"] == 1
+        res = async_client.post(f"/api/sweets/{sweet.id}/purchase", json={"quantity": 2}, headers=admin)
+        assert res.json()["remaining_quantity"] == 3
+        res = async_client.post("/api/sweets/checkout", json={"items": [{"sweet_id": sweet.id, "quantity": 9}]},
+                                headers=admin)
+        assert res.status_code == status.HTTP_400_BAD_REQUEST
+    finally:
+        buffer.stop()
+
+    assert on_loop == [("import", False), ("reserve", False), ("reserve", False)]
@@ -0,0 +1,84 @@
+import json
+from fastapi import status
+from app.core.config import settings
+
+
+def _import(client, headers, content, filename="sweets.csv", **params):
+    return client.post(
+        "/api/sweets/import",
+        files={"file": (filename, content.encode())},
+        params=params,
+        headers=headers,
+    )
+
+
+def test_import_csv_creates_and_updates_by_name(client, admin_user_token_headers, normal_user_token_headers):
+    """CSV import inserts new names and updates existing ones."""
+    client.post("/api/sweets", json={"name": "Fudge", "category": "Old", "price": 1.0, "quantity": 1},
+                headers=admin_user_token_headers)
+    # Warm the catalog cache so the import has to invalidate it
+    client.get("/api/sweets", headers=normal_user_token_headers)
+
+    csv_body = "name,category,price,quantity\nFudge,Chocolate,2.5,30\nToffee,Caramel,1.25,12\n"
+    res = _import(client, admin_user_token_headers, csv_body)
+
+    assert res.status_code == status.HTTP_200_OK
+    data = res.json()
+    assert (data["created"], data["updated"], data["failed"]) == (1, 1, 0)
+
+    sweets = {s["name"]: s for s in client.get("/api/sweets", headers=normal_user_token_headers).json()}
+    assert sweets["Fudge"]["category"] == "Chocolate"
+    assert sweets["Fudge"]["quantity"] == 30
+    assert sweets["Toffee"]["price"] == 1.25
+
+
+def test_import_reports_invalid_rows(client, admin_user_token_headers):
+    """Invalid rows are skipped and reported with their line numbers."""
+    ndjson_body = "\n".join([
+        json.dumps({"name": "Gum", "category": "Chewy", "price": 0.5, "quantity": 5}),
+        json.dumps({"name": "Bad", "category": "Chewy", "price": "free", "quantity": 5}),
+        "not json",
+    ])
+    res = _import(client, admin_user_token_headers, ndjson_body, filename="sweets.ndjson")
+
+    data = res.json()
+    assert data["created"] == 1
+    assert data["failed"] == 2
+    assert [e["line"] for e in data["errors"]] == [2, 3]
+
+
+def test_import_commits_in_chunks(client, admin_user_token_headers, normal_user_token_headers, monkeypatch):
+    """Imports larger than one chunk are fully written."""
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    rows = "".join(f"Sweet {i},Bulk,1.0,{i}\n" for i in range(5))
+    res = _import(client, admin_user_token_headers, "name,category,price,quantity\n" + rows)
+
+    assert res.json()["created"] == 5
+    listed = client.get("/api/sweets", headers=normal_user_token_headers).json()
+    assert len([s for s in listed if s["category"] == "Bulk"]) == 5
+
+
+def test_export_streams_catalog(client, admin_user_token_headers, monkeypatch):
+    """Export returns every sweet, across several batches, in both formats."""
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    for i in range(3):
+        client.post("/api/sweets", json={"name": f"Export {i}", "category": "Out", "price": 1.0, "quantity": i},
+                    headers=admin_user_token_headers)
+
+    res = client.get("/api/sweets/export", headers=admin_user_token_headers)
+    assert res.status_code == status.HTTP_200_OK
+    assert res.headers["content-type"].startswith("text/csv")
+    lines = res.text.strip().splitlines()
+    assert lines[0].startswith("id,name,category")
+    assert len(lines) == 4
+
+    res = client.get("/api/sweets/export", params={"format": "ndjson"}, headers=admin_user_token_headers)
+    names = [json.loads(line)["name"] for line in res.text.splitlines()]
+    assert names == ["Export 0", "Export 1", "Export 2"]
+
+
+def test_bulk_routes_require_admin(client, normal_user_token_headers):
+    """Normal users cannot import or export."""
+    assert _import(client, normal_user_token_headers, "name\n").status_code == status.HTTP_403_FORBIDDEN
+    res = client.get("/api/sweets/export", headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_403_FORBIDDEN
@@ -0,0 +1,104 @@
+from fastapi import status
+from sqlalchemy import event
+
+from typing import List
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.models.sweet import Sweet
+from app.schemas.sweet import SweetResponse
+from app.services.catalog import SWEET_COLUMNS, catalog_cache, render_rows
+
+class _SweetQueries:
+    """Counts statements touching the sweets table while active."""
+    def __init__(self, db):
+        self.engine = db.get_bind()
+        self.count = 0
+
+    def _count(self, conn, cursor, statement, parameters, context, executemany):
+        if "sweets" in statement:
+            self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+def test_reads_are_served_from_memory(client, db, admin_user_token_headers, create_sweet):
+    """Once warm, list and detail reads do not query the sweets table."""
+    sweet_id = create_sweet("Cached Bonbon")
+    client.get("/api/sweets", headers=admin_user_token_headers)
+
+    with _SweetQueries(db) as queries:
+        listing = client.get("/api/sweets", headers=admin_user_token_headers)
+        detail = client.get(f"/api/sweets/{sweet_id}", headers=admin_user_token_headers)
+        missing = client.get("/api/sweets/999999", headers=admin_user_token_headers)
+
+    assert queries.count == 0
+    assert [s["name"] for s in listing.json()] == ["Cached Bonbon"]
+    assert detail.json()["name"] == "Cached Bonbon"
+    assert missing.status_code == status.HTTP_404_NOT_FOUND
+
+def test_writes_go_through_to_the_cache(
+    client, normal_user_token_headers, admin_user_token_headers, create_sweet
+):
+    """Purchases, restocks, updates and deletes are visible in cached reads."""
+    kept = create_sweet("Kept", quantity=5)
+    dropped = create_sweet("Dropped")
+    client.get("/api/sweets", headers=normal_user_token_headers)
+    assert catalog_cache.loaded
+
+    client.post(f"/api/sweets/{kept}/purchase", json={"quantity": 2}, headers=normal_user_token_headers)
+    client.post(f"/api/sweets/{kept}/restock", json={"amount": 10}, headers=admin_user_token_headers)
+    client.put(f"/api/sweets/{kept}", json={"name": "Kept Renamed"}, headers=admin_user_token_headers)
+    added = create_sweet("Added")
+    client.delete(f"/api/sweets/{dropped}", headers=admin_user_token_headers)
+
+    listing = client.get("/api/sweets", headers=normal_user_token_headers).json()
+    assert [(s["id"], s["name"], s["quantity"]) for s in listing] == [(kept, "Kept Renamed", 13), (added, "Added", 10)]
+    assert client.get(f"/api/sweets/{dropped}", headers=normal_user_token_headers).status_code == status.HTTP_404_NOT_FOUND
+
+def test_cached_and_uncached_responses_match(client, admin_user_token_headers, monkeypatch, create_sweet):
+    """The cache returns exactly what the database path returns."""
+    sweet_id = create_sweet("Twin")
+    cached_list = client.get("/api/sweets?limit=10", headers=admin_user_token_headers)
+    cached_detail = client.get(f"/api/sweets/{sweet_id}", headers=admin_user_token_headers)
+
+    monkeypatch.setattr(settings, "CATALOG_CACHE_ENABLED", False)
+    catalog_cache.invalidate()
+    assert client.get("/api/sweets?limit=10", headers=admin_user_token_headers).content == cached_list.content
+    assert client.get(f"/api/sweets/{sweet_id}", headers=admin_user_token_headers).json() == cached_detail.json()
+    assert not catalog_cache.loaded
+
+def test_out_of_range_paging_is_rejected_on_both_paths(client, admin_user_token_headers, monkeypatch, create_sweet):
+    """Negative skip and non-positive limit get a 422 whether or not the cache serves the page."""
+    for name in ("One", "Two", "Three"):
+        create_sweet(name)
+    for enabled in (True, False):
+        monkeypatch.setattr(settings, "CATALOG_CACHE_ENABLED", enabled)
+        catalog_cache.invalidate()
+        for query in ("skip=-2", "limit=-1", "limit=0"):
+            response = client.get(f"/api/sweets?{query}", headers=admin_user_token_headers)
+            assert response.status_code == 422, query
+        assert [s["name"] for s in client.get("/api/sweets?skip=1&limit=1", headers=admin_user_token_headers).json()] == ["Two"]
+
+def test_rendered_rows_match_the_response_model(client, db, create_sweet):
+    """Column rows serialize to the same bytes as validated SweetResponse objects."""
+    create_sweet("Crème \"Brûlée\" ☃")
+    create_sweet("Plain")
+    rows = db.execute(select(*SWEET_COLUMNS).order_by(Sweet.id)).all()
+    adapter = TypeAdapter(List[SweetResponse])
+    assert render_rows(rows) == adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+def test_oversized_catalog_is_not_cached(client, admin_user_token_headers, monkeypatch, create_sweet):
+    """Catalogs above CATALOG_CACHE_MAX_ROWS are read from the database."""
+    monkeypatch.setattr(settings, "CATALOG_CACHE_MAX_ROWS", 1)
+    create_sweet("One")
+    create_sweet("Two")
+
+    response = client.get("/api/sweets", headers=admin_user_token_headers)
+    assert len(response.json()) == 2
+    assert not catalog_cache.loaded
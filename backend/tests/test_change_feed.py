@@ -0,0 +1,156 @@
+import pytest
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db import init_db as init_db_module
+from app.db.change_log import create_change_log, has_change_log
+from app.main import on_startup
+from app.services.catalog import CatalogCache, catalog_cache
+from app.services.change_feed import ChangeFeed
+from app.services.events import CatalogReloaded, StockChanged, SweetRemoved, event_bus
+
+
+@pytest.fixture
+def feed(db, session_factory):
+    # init_db installs the log only for several workers; the test tables come from create_all
+    with db.get_bind().begin() as connection:
+        create_change_log(connection)
+    feed = ChangeFeed()
+    assert feed.start(session_factory, background=False)
+    yield feed
+    feed.stop()
+
+
+@pytest.fixture
+def published():
+    events = []
+    for event_type in (StockChanged, SweetRemoved, CatalogReloaded):
+        event_bus.subscribe(event_type, events.append)
+    yield events
+    for event_type in (StockChanged, SweetRemoved, CatalogReloaded):
+        event_bus.unsubscribe(event_type, events.append)
+
+
+def _elsewhere(session_factory, statement, **params):
+    """Commit a write the way another worker would: nothing in this process is told."""
+    with session_factory() as other:
+        other.execute(text(statement), params)
+        other.commit()
+
+
+def test_changes_from_other_workers_reach_the_cache(
+    client, session_factory, feed, published, normal_user_token_headers, create_sweet
+):
+    """Stock changed in another process is served and published after a poll."""
+    sweet_id = create_sweet("Shared Fudge")
+    client.get("/api/sweets", headers=normal_user_token_headers)
+    feed.poll()
+    published.clear()
+
+    _elsewhere(session_factory, "UPDATE sweets SET quantity = 3, updated_at = :now WHERE id = :id",
+               now="2099-01-01 00:00:00", id=sweet_id)
+    assert client.get(f"/api/sweets/{sweet_id}", headers=normal_user_token_headers).json()["quantity"] == 10
+
+    assert feed.poll() == 1
+    assert client.get(f"/api/sweets/{sweet_id}", headers=normal_user_token_headers).json()["quantity"] == 3
+    assert client.get("/api/sweets", headers=normal_user_token_headers).json()[0]["quantity"] == 3
+    assert [(e.sweet_id, e.quantity, e.reason) for e in published] == [(sweet_id, 3, "sync")]
+
+
+def test_deletes_from_other_workers_reach_the_cache(
+    client, session_factory, feed, published, normal_user_token_headers, create_sweet
+):
+    """A sweet deleted in another process disappears after a poll."""
+    sweet_id = create_sweet("Doomed Drop")
+    client.get(f"/api/sweets/{sweet_id}", headers=normal_user_token_headers)
+    feed.poll()
+    published.clear()
+
+    _elsewhere(session_factory, "DELETE FROM sweets WHERE id = :id", id=sweet_id)
+    feed.poll()
+    assert client.get(f"/api/sweets/{sweet_id}", headers=normal_user_token_headers).status_code == 404
+    assert published == [SweetRemoved(sweet_id)]
+
+
+def test_own_writes_are_not_republished(client, feed, published, admin_user_token_headers, create_sweet):
+    """Changes this process already published are recognised in the log."""
+    sweet_id = create_sweet("Local Lolly")
+    client.get("/api/sweets", headers=admin_user_token_headers)
+    client.post(f"/api/sweets/{sweet_id}/restock", json={"amount": 5}, headers=admin_user_token_headers)
+    client.delete(f"/api/sweets/{sweet_id}", headers=admin_user_token_headers)
+    published.clear()
+    version = catalog_cache.version
+
+    assert feed.poll() == 3
+    assert published == []
+    assert catalog_cache.version == version
+
+
+def test_pruned_log_forces_a_reload(client, session_factory, feed, published, create_sweet):
+    """Entries lost before they were read make the feed start over."""
+    sweet_id = create_sweet("Lost Licorice")
+    _elsewhere(session_factory, "DELETE FROM sweet_changes")
+    _elsewhere(session_factory, "UPDATE sweets SET quantity = 1 WHERE id = :id", id=sweet_id)
+    published.clear()
+
+    feed.poll()
+    assert published == [CatalogReloaded()]
+    assert not catalog_cache.loaded
+    # Following entries are read normally again
+    _elsewhere(session_factory, "UPDATE sweets SET quantity = 2 WHERE id = :id", id=sweet_id)
+    assert feed.poll() == 1
+
+
+
+def test_catalog_etag_is_shared_by_workers(client, session_factory, feed, normal_user_token_headers, create_sweet):
+    """Workers derive the same catalog ETag from the log and never send it with an older page."""
+    create_sweet("Shared Sherbet")
+    first = client.get("/api/sweets", headers=normal_user_token_headers)
+    other_worker = CatalogCache()
+    other_worker.follow(0)
+    with session_factory() as db:
+        assert other_worker.etag(db) == first.headers["ETag"]
+
+    _elsewhere(session_factory, "UPDATE sweets SET quantity = 3")
+    # Not polled yet: the new ETag comes with the new stock, read from the database
+    changed = client.get("/api/sweets", headers={**normal_user_token_headers, "If-None-Match": first.headers["ETag"]})
+    assert changed.status_code == 200
+    assert changed.json()[0]["quantity"] == 3
+
+    feed.poll()
+    cached = client.get("/api/sweets", headers={**normal_user_token_headers, "If-None-Match": changed.headers["ETag"]})
+    assert cached.status_code == 304
+
+def test_write_behind_is_refused_with_several_workers(monkeypatch):
+    """Buffered stock lives in one process, so multi-worker startup fails."""
+    monkeypatch.setattr(settings, "PURCHASE_WRITE_BEHIND", True)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    with pytest.raises(RuntimeError):
+        on_startup()
+
+
+def test_change_log_is_only_installed_for_several_workers(db, monkeypatch):
+    """A single worker gets no change-log triggers, and loses any left from a multi-worker run."""
+    engine = db.get_bind()
+    monkeypatch.setattr(init_db_module, "engine", engine)
+
+    def triggers():
+        with engine.connect() as connection:
+            return connection.exec_driver_sql(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'sweet_changes_%'"
+            ).scalar()
+
+    init_db_module.init_db()
+    assert triggers() == 0
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 2)
+    init_db_module.init_db()
+    with engine.connect() as connection:
+        assert has_change_log(connection)
+    assert triggers() == 3
+
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 1)
+    init_db_module.init_db()
+    with engine.connect() as connection:
+        assert not has_change_log(connection)
+    assert triggers() == 0
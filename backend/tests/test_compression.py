@@ -0,0 +1,66 @@
+import gzip
+
+import pytest
+
+from app.models.sweet import Sweet
+
+def _stock_catalog(db, count=20):
+    db.add_all([Sweet(name=f"Compressible {i}", category="Toffee", price=1.5, quantity=10) for i in range(count)])
+    db.commit()
+
+def test_large_responses_are_gzipped(client, db, normal_user_token_headers):
+    """Catalog pages above the size threshold are sent gzip-encoded."""
+    _stock_catalog(db)
+    headers = {**normal_user_token_headers, "Accept-Encoding": "gzip"}
+    response = client.get("/api/sweets", headers=headers)
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert len(response.json()) == 20
+
+def test_small_and_unaccepted_responses_are_not_compressed(client, db, normal_user_token_headers):
+    """Tiny bodies, and clients that do not accept gzip, get identity responses."""
+    _stock_catalog(db)
+    assert "content-encoding" not in client.get("/health", headers={"Accept-Encoding": "gzip"}).headers
+    identity = client.get("/api/sweets", headers={**normal_user_token_headers, "Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert len(identity.json()) == 20
+
+def test_gzip_body_round_trips(client, db, normal_user_token_headers):
+    """The encoded body decompresses to the identity body."""
+    _stock_catalog(db)
+    plain = client.get("/api/sweets", headers={**normal_user_token_headers, "Accept-Encoding": "identity"})
+    with client.stream("GET", "/api/sweets", headers={**normal_user_token_headers, "Accept-Encoding": "gzip"}) as response:
+        raw = b"".join(response.iter_raw())
+    assert len(raw) < len(plain.content)
+    assert gzip.decompress(raw) == plain.content
+
+def test_brotli_is_preferred_when_installed(client, db, normal_user_token_headers):
+    """Clients accepting br get Brotli when the package is available."""
+    brotli = pytest.importorskip("brotli")
+    _stock_catalog(db)
+    plain = client.get("/api/sweets", headers={**normal_user_token_headers, "Accept-Encoding": "identity"})
+    with client.stream("GET", "/api/sweets", headers={**normal_user_token_headers, "Accept-Encoding": "gzip, br"}) as response:
+        assert response.headers["content-encoding"] == "br"
+        raw = b"".join(response.iter_raw())
+    assert brotli.decompress(raw) == plain.content
+
+def test_streamed_responses_are_compressed_chunk_by_chunk(client, db, admin_user_token_headers):
+    """A streamed export is gzip-encoded without a Content-Length and decodes to the identity body."""
+    _stock_catalog(db)
+    url = "/api/sweets/export?format=csv"
+    plain = client.get(url, headers={**admin_user_token_headers, "Accept-Encoding": "identity"})
+    with client.stream("GET", url, headers={**admin_user_token_headers, "Accept-Encoding": "gzip;q=1, br;q=0"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        raw = b"".join(response.iter_raw())
+    assert gzip.decompress(raw) == plain.content
+
+def test_applications_built_by_the_factory_are_compressed():
+    """create_application() installs compression and CORS itself, so in-process benchmarks get them too."""
+    from fastapi.testclient import TestClient
+    from app.main import create_application
+
+    client = TestClient(create_application())
+    assert client.get("/openapi.json", headers={"Accept-Encoding": "gzip"}).headers["content-encoding"] == "gzip"
+    response = client.get("/health", headers={"Origin": "http://example.com"})
+    assert "X-Next-Cursor" in response.headers["access-control-expose-headers"]
@@ -0,0 +1,30 @@
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import create_db_engine
+
+def _pragma(engine, name):
+    with engine.connect() as connection:
+        return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+def test_production_profile_tunes_sqlite(tmp_path, monkeypatch):
+    """The production profile switches SQLite to WAL with tuned pragmas."""
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 16)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'prod.db'}", profile="production")
+    try:
+        assert _pragma(engine, "journal_mode") == "wal"
+        assert _pragma(engine, "synchronous") == 1  # NORMAL
+        assert _pragma(engine, "busy_timeout") == settings.SQLITE_BUSY_TIMEOUT_MS
+        assert _pragma(engine, "cache_size") == -settings.SQLITE_CACHE_SIZE_KB
+        assert engine.pool.size() == 4
+    finally:
+        engine.dispose()
+
+def test_default_profile_keeps_driver_defaults(tmp_path):
+    """The default profile leaves SQLite in rollback-journal mode."""
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'dev.db'}", profile="default")
+    try:
+        assert _pragma(engine, "journal_mode") == "delete"
+    finally:
+        engine.dispose()
@@ -0,0 +1,52 @@
+from fastapi import status
+
+def _revalidate(client, url, headers, etag):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+def test_catalog_list_conditional_get(client, normal_user_token_headers, create_sweet):
+    """The list returns 304 until the catalog changes."""
+    sweet_id = create_sweet("Etag Toffee")
+    first = client.get("/api/sweets", headers=normal_user_token_headers)
+    etag = first.headers["ETag"]
+    assert "no-cache" in first.headers["Cache-Control"]
+
+    unchanged = _revalidate(client, "/api/sweets", normal_user_token_headers, etag)
+    assert unchanged.status_code == status.HTTP_304_NOT_MODIFIED
+    assert unchanged.content == b""
+
+    client.post(f"/api/sweets/{sweet_id}/purchase", headers=normal_user_token_headers)
+    changed = _revalidate(client, "/api/sweets", normal_user_token_headers, etag)
+    assert changed.status_code == status.HTTP_200_OK
+    assert changed.headers["ETag"] != etag
+    assert changed.json()[0]["quantity"] == 9
+
+def test_search_conditional_get(client, normal_user_token_headers, create_sweet):
+    """Search results are revalidated against the catalog version."""
+    create_sweet("Etag Toffee")
+    url = "/api/sweets/search?q=toffee"
+    etag = client.get(url, headers=normal_user_token_headers).headers["ETag"]
+
+    assert _revalidate(client, url, normal_user_token_headers, etag).status_code == status.HTTP_304_NOT_MODIFIED
+    create_sweet("Another Toffee")
+    assert _revalidate(client, url, normal_user_token_headers, etag).status_code == status.HTTP_200_OK
+
+def test_detail_conditional_get(client, normal_user_token_headers, admin_user_token_headers, create_sweet):
+    """A sweet's ETag only changes when that sweet changes."""
+    sweet_id = create_sweet("Etag Toffee")
+    other_id = create_sweet("Bystander")
+    url = f"/api/sweets/{sweet_id}"
+    etag = client.get(url, headers=normal_user_token_headers).headers["ETag"]
+
+    client.post(f"/api/sweets/{other_id}/purchase", headers=normal_user_token_headers)
+    assert _revalidate(client, url, normal_user_token_headers, etag).status_code == status.HTTP_304_NOT_MODIFIED
+
+    client.post(f"/api/sweets/{sweet_id}/restock", json={"amount": 5}, headers=admin_user_token_headers)
+    refreshed = _revalidate(client, url, normal_user_token_headers, etag)
+    assert refreshed.status_code == status.HTTP_200_OK
+    assert refreshed.json()["quantity"] == 15
+
+def test_conditional_get_still_requires_auth(client, normal_user_token_headers):
+    """A matching ETag does not bypass authentication."""
+    etag = client.get("/api/sweets", headers=normal_user_token_headers).headers["ETag"]
+    response = client.get("/api/sweets", headers={"If-None-Match": etag})
+    assert response.status_code == status.HTTP_401_UNAUTHORIZED
@@ -75,3 +75,104 @@ def test_restock_non_existent(client, admin_user_token_headers):
     """Restocking a non-existent sweet checks 404."""
     res = client.post("/api/sweets/999999/restock", json={"amount": 10}, headers=admin_user_token_headers)
     assert res.status_code == status.HTTP_404_NOT_FOUND
+
+def test_purchase_multiple_units(client, normal_user_token_headers, admin_user_token_headers):
+    """User can buy several units of a sweet in one request."""
+    create_payload = {"name": "Bulk Bar", "category": "Tests", "price": 1.0, "quantity": 10}
+    create_res = client.post("/api/sweets", json=create_payload, headers=admin_user_token_headers)
+    sweet_id = create_res.json()["id"]
+
+    res = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 4}, headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_200_OK
+    assert res.json()["remaining_quantity"] == 6
+
+def test_purchase_more_than_stock(client, normal_user_token_headers, admin_user_token_headers):
+    """Buying more units than available fails and leaves stock untouched."""
+    create_payload = {"name": "Scarce Bar", "category": "Tests", "price": 1.0, "quantity": 3}
+    create_res = client.post("/api/sweets", json=create_payload, headers=admin_user_token_headers)
+    sweet_id = create_res.json()["id"]
+
+    res = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 4}, headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    get_res = client.get(f"/api/sweets/{sweet_id}", headers=normal_user_token_headers)
+    assert get_res.json()["quantity"] == 3
+
+def test_purchase_non_existent(client, normal_user_token_headers):
+    """Purchasing a non-existent sweet returns 404."""
+    res = client.post("/api/sweets/999999/purchase", headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+
+def test_checkout_cart(client, normal_user_token_headers, admin_user_token_headers):
+    """A multi-item cart is purchased in one request."""
+    ids = []
+    for name, qty in (("Cart A", 5), ("Cart B", 8)):
+        res = client.post("/api/sweets", json={"name": name, "category": "Tests", "price": 1.0, "quantity": qty}, headers=admin_user_token_headers)
+        ids.append(res.json()["id"])
+
+    payload = {"items": [
+        {"sweet_id": ids[0], "quantity": 2},
+        {"sweet_id": ids[1], "quantity": 3},
+        {"sweet_id": ids[0], "quantity": 1},
+    ]}
+    res = client.post("/api/sweets/checkout", json=payload, headers=normal_user_token_headers)
+
+    assert res.status_code == status.HTTP_200_OK
+    remaining = {line["sweet_id"]: line["remaining_quantity"] for line in res.json()["items"]}
+    assert remaining == {ids[0]: 2, ids[1]: 5}
+
+def test_checkout_is_all_or_nothing(client, normal_user_token_headers, admin_user_token_headers):
+    """If one line is out of stock, no line is purchased."""
+    ids = []
+    for name, qty in (("Plenty", 10), ("Scarce", 1)):
+        res = client.post("/api/sweets", json={"name": name, "category": "Tests", "price": 1.0, "quantity": qty}, headers=admin_user_token_headers)
+        ids.append(res.json()["id"])
+
+    payload = {"items": [{"sweet_id": ids[0], "quantity": 5}, {"sweet_id": ids[1], "quantity": 2}]}
+    res = client.post("/api/sweets/checkout", json=payload, headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+    assert str(ids[1]) in res.json()["detail"]
+
+    get_res = client.get(f"/api/sweets/{ids[0]}", headers=normal_user_token_headers)
+    assert get_res.json()["quantity"] == 10
+
+def test_checkout_unknown_sweet(client, normal_user_token_headers):
+    """Checkout with an unknown sweet returns 404."""
+    payload = {"items": [{"sweet_id": 999999, "quantity": 1}]}
+    res = client.post("/api/sweets/checkout", json=payload, headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+
+def test_bulk_restock(client, admin_user_token_headers):
+    """Admin can restock many sweets at once; repeated ids are summed."""
+    ids = [
+        client.post("/api/sweets", json={"name": f"Crate {i}", "category": "Tests", "price": 1.0, "quantity": i},
+                    headers=admin_user_token_headers).json()["id"]
+        for i in range(2)
+    ]
+    payload = {"items": [
+        {"sweet_id": ids[0], "amount": 5},
+        {"sweet_id": ids[1], "amount": 10},
+        {"sweet_id": ids[0], "amount": 1},
+    ]}
+    res = client.post("/api/sweets/restock", json=payload, headers=admin_user_token_headers)
+
+    assert res.status_code == status.HTTP_200_OK
+    assert {i["sweet_id"]: i["new_quantity"] for i in res.json()["items"]} == {ids[0]: 6, ids[1]: 11}
+    assert client.get(f"/api/sweets/{ids[1]}", headers=admin_user_token_headers).json()["quantity"] == 11
+
+def test_bulk_restock_is_all_or_nothing(client, admin_user_token_headers):
+    """An unknown sweet id fails the whole delivery and changes nothing."""
+    sweet_id = client.post("/api/sweets", json={"name": "Crate", "category": "Tests", "price": 1.0, "quantity": 3},
+                           headers=admin_user_token_headers).json()["id"]
+    payload = {"items": [{"sweet_id": sweet_id, "amount": 5}, {"sweet_id": 999999, "amount": 5}]}
+    res = client.post("/api/sweets/restock", json=payload, headers=admin_user_token_headers)
+
+    assert res.status_code == status.HTTP_404_NOT_FOUND
+    assert "999999" in res.json()["detail"]
+    assert client.get(f"/api/sweets/{sweet_id}", headers=admin_user_token_headers).json()["quantity"] == 3
+
+def test_bulk_restock_rejects_non_positive_amounts(client, admin_user_token_headers):
+    """Every line's amount must be positive."""
+    res = client.post("/api/sweets/restock", json={"items": [{"sweet_id": 1, "amount": 0}]},
+                      headers=admin_user_token_headers)
+    assert res.status_code == 422
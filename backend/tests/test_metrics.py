@@ -0,0 +1,80 @@
+import logging
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.metrics import RequestStats, request_metrics
+
+
+@pytest.fixture(autouse=True)
+def instrumented(db):
+    metrics.install(db.get_bind())
+    request_metrics.reset()
+    yield
+    request_metrics.reset()
+
+
+def _timings(response):
+    entries = {}
+    for entry in response.headers["server-timing"].split(", "):
+        name, *params = entry.split(";")
+        entries[name] = dict(param.split("=", 1) for param in params)
+    return entries
+
+
+def test_server_timing_reports_sql_from_sync_routes(client, admin_user_token_headers, create_sweet):
+    """Statements run in threadpool routes are counted against their request."""
+    sweet_id = create_sweet("Timed Toffee")
+    response = client.put(f"/api/sweets/{sweet_id}", json={"price": 2.0}, headers=admin_user_token_headers)
+
+    timings = _timings(response)
+    assert float(timings["app"]["dur"]) > 0
+    assert int(timings["db"]["desc"].strip('"').split()[0]) >= 2
+    assert "jwt" in _timings(client.get("/api/sweets", headers={"Authorization": "Bearer not-a-token"}))
+
+
+def test_metrics_are_labelled_by_route_template(client, normal_user_token_headers):
+    """Histograms use the route's path template and collapse unmatched paths."""
+    client.get("/api/sweets/12345", headers=normal_user_token_headers)
+    client.get("/no/such/path/42")
+
+    body = client.get("/metrics").text
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/api/sweets/{sweet_id}",status="404"} 1' in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert "/no/such/path" not in body
+    assert 'http_request_db_queries_bucket{method="GET",route="/api/sweets/{sweet_id}",le="+Inf"} 1' in body
+
+
+def test_requests_over_the_query_budget_are_flagged(
+    client, admin_user_token_headers, monkeypatch, caplog, create_sweet
+):
+    """Exceeding QUERY_BUDGET logs the most repeated statement and counts the request."""
+    sweet_id = create_sweet("Chatty Chew")
+    monkeypatch.setattr(settings, "QUERY_BUDGET", 1)
+
+    with caplog.at_level(logging.WARNING, logger="app.core.metrics"):
+        client.put(f"/api/sweets/{sweet_id}", json={"price": 2.0}, headers=admin_user_token_headers)
+
+    assert any("budget 1" in record.getMessage() and "most repeated" in record.getMessage()
+               for record in caplog.records)
+    body = client.get("/metrics").text
+    assert 'http_request_query_budget_exceeded_total{method="PUT",route="/api/sweets/{sweet_id}"} 1' in body
+
+
+def test_failed_statements_leave_no_timing_state(db):
+    """A statement that raises is not counted and leaves nothing on the pooled connection."""
+    stats = RequestStats()
+    token = metrics._current.set(stats)
+    try:
+        with db.get_bind().connect() as connection:
+            with pytest.raises(OperationalError):
+                connection.exec_driver_sql("SELECT * FROM no_such_table")
+            connection.exec_driver_sql("SELECT 1")
+            leftovers = dict(connection.info)
+    finally:
+        metrics._current.reset(token)
+    assert stats.queries == 1
+    assert "metrics_started" not in leftovers
@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import status
+
+
+def test_purchases_and_checkouts_are_recorded(
+    client, normal_user_token_headers, admin_user_token_headers, create_sweet
+):
+    """Each purchase or checkout appends one order with its lines."""
+    fudge = create_sweet("Fudge", price=2.0)
+    toffee = create_sweet("Toffee", price=0.5)
+
+    client.post(f"/api/sweets/{fudge}/purchase", json={"quantity": 3}, headers=normal_user_token_headers)
+    client.post("/api/sweets/checkout", json={"items": [{"sweet_id": fudge}, {"sweet_id": toffee, "quantity": 4}]},
+                headers=normal_user_token_headers)
+    # Rejected purchases leave no order
+    client.post(f"/api/sweets/{toffee}/purchase", json={"quantity": 500}, headers=normal_user_token_headers)
+
+    res = client.get("/api/orders", headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_200_OK
+    checkout, purchase = res.json()
+    assert checkout["total"] == 4.0
+    assert [(l["sweet_id"], l["quantity"], l["unit_price"]) for l in checkout["lines"]] == [(fudge, 1, 2.0), (toffee, 4, 0.5)]
+    assert purchase["total"] == 6.0
+
+    # Orders are per user
+    assert client.get("/api/orders", headers=admin_user_token_headers).json() == []
+
+
+def test_my_orders_are_paged_with_a_cursor(client, normal_user_token_headers, create_sweet):
+    """Pages follow X-Next-Cursor, newest first, without overlap."""
+    sweet_id = create_sweet("Gum")
+    for _ in range(5):
+        client.post(f"/api/sweets/{sweet_id}/purchase", headers=normal_user_token_headers)
+
+    first = client.get("/api/orders?limit=3", headers=normal_user_token_headers)
+    second = client.get(f"/api/orders?limit=3&cursor={first.headers['X-Next-Cursor']}", headers=normal_user_token_headers)
+    ids = [o["id"] for o in first.json()] + [o["id"] for o in second.json()]
+
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 5
+    assert "X-Next-Cursor" not in second.headers
+
+
+def test_sales_by_sweet(client, normal_user_token_headers, admin_user_token_headers, create_sweet):
+    """Admins see units, revenue and paged sales of one sweet."""
+    sweet_id = create_sweet("Nougat", price=1.5)
+    other = create_sweet("Other")
+    for quantity in (1, 2, 3):
+        client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": quantity}, headers=normal_user_token_headers)
+    client.post(f"/api/sweets/{other}/purchase", headers=normal_user_token_headers)
+
+    res = client.get(f"/api/orders/sales/{sweet_id}?limit=2", headers=admin_user_token_headers)
+    data = res.json()
+    assert (data["units"], data["revenue"]) == (6, 9.0)
+    assert [s["quantity"] for s in data["sales"]] == [3, 2]
+
+    res = client.get(f"/api/orders/sales/{sweet_id}?limit=2&cursor={res.headers['X-Next-Cursor']}",
+                     headers=admin_user_token_headers)
+    assert [s["quantity"] for s in res.json()["sales"]] == [1]
+
+    res = client.get(f"/api/orders/sales/{sweet_id}?start=2100-01-01T00:00:00", headers=admin_user_token_headers)
+    assert res.json()["units"] == 0
+
+    res = client.get(f"/api/orders/sales/{sweet_id}", headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_403_FORBIDDEN
+
+
+def test_sales_range_with_an_offset_is_converted_to_utc(
+    client, normal_user_token_headers, admin_user_token_headers, create_sweet
+):
+    """A start time written in another timezone covers the same instant as in UTC."""
+    sweet_id = create_sweet()
+    client.post(f"/api/sweets/{sweet_id}/purchase", headers=normal_user_token_headers)
+
+    # Two hours ago, written in UTC+5: its wall-clock time is three hours ahead
+    two_hours_ago = datetime.now(timezone(timedelta(hours=5))) - timedelta(hours=2)
+    res = client.get(f"/api/orders/sales/{sweet_id}", params={"start": two_hours_ago.isoformat()},
+                     headers=admin_user_token_headers)
+    assert res.json()["units"] == 1
+    res = client.get(f"/api/orders/sales/{sweet_id}", params={"end": two_hours_ago.isoformat()},
+                     headers=admin_user_token_headers)
+    assert res.json()["units"] == 0
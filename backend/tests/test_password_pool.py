@@ -0,0 +1,39 @@
+import asyncio
+
+from app.core import security
+from app.core.config import settings
+
+def test_password_hashing_on_process_pool(monkeypatch):
+    """Async hashing round-trips through the worker processes."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+
+    async def scenario():
+        hashed = await security.get_password_hash_async("sugar")
+        return (
+            hashed,
+            await security.verify_password_async("sugar", hashed),
+            await security.verify_password_async("salt", hashed),
+        )
+
+    try:
+        hashed, good, bad = asyncio.run(scenario())
+        assert security._password_pool is not None
+    finally:
+        security.shutdown_password_pool()
+
+    assert hashed.startswith("$2b$04$")
+    assert good is True
+    assert bad is False
+
+def test_password_hashing_without_pool(monkeypatch):
+    """With no workers configured, hashing falls back to the threadpool."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(settings, "BCRYPT_ROUNDS", 4)
+
+    async def scenario():
+        hashed = await security.get_password_hash_async("sugar")
+        return await security.verify_password_async("sugar", hashed)
+
+    assert asyncio.run(scenario()) is True
+    assert security._password_pool is None
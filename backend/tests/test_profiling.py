@@ -0,0 +1,64 @@
+import time
+
+import pytest
+
+from app.core.profiling import profiler, route_pattern
+
+
+@pytest.fixture(autouse=True)
+def stop_profiler():
+    yield
+    profiler.stop()
+
+
+def _burn(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(i * i for i in range(1000))
+
+
+def test_route_pattern_matches_path_templates():
+    """Templates match concrete paths, with or without a trailing slash."""
+    pattern = route_pattern("/api/sweets/{sweet_id}")
+    assert pattern.fullmatch("/api/sweets/42") and pattern.fullmatch("/api/sweets/42/")
+    assert not pattern.fullmatch("/api/sweets/42/purchase")
+
+
+def test_window_profile_collects_collapsed_stacks(client, admin_user_token_headers):
+    """A window profile samples busy threads and serves their collapsed stacks."""
+    response = client.post("/api/admin/profile", json={"seconds": 5, "interval_ms": 1},
+                           headers=admin_user_token_headers)
+    assert response.status_code == 202 and response.json()["mode"] == "window"
+    assert client.post("/api/admin/profile", json={}, headers=admin_user_token_headers).status_code == 409
+
+    _burn(0.3)
+    stopped = client.delete("/api/admin/profile", headers=admin_user_token_headers).json()
+    assert not stopped["running"] and stopped["samples"] > 0
+
+    response = client.get("/api/admin/profile/collapsed", headers=admin_user_token_headers)
+    assert "attachment" in response.headers["content-disposition"]
+    lines = response.text.splitlines()
+    burning = [line for line in lines if "test_profiling.py:_burn" in line]
+    assert burning
+    stack, count = burning[0].rsplit(" ", 1)
+    assert int(count) > 0 and "test_profiling.py:_burn" in stack.split(";")[-1]
+
+
+def test_request_profile_only_counts_matching_requests(client, normal_user_token_headers,
+                                                       admin_user_token_headers):
+    """In request mode only requests to the chosen route are selected."""
+    payload = {"seconds": 5, "route": "/api/sweets/{sweet_id}"}
+    assert client.post("/api/admin/profile", json=payload, headers=admin_user_token_headers).status_code == 202
+
+    client.get("/api/sweets/1", headers=normal_user_token_headers)
+    client.get("/api/sweets/1", headers=normal_user_token_headers)
+    client.get("/health")
+
+    status = client.get("/api/admin/profile", headers=admin_user_token_headers).json()
+    assert status["mode"] == "requests" and status["requests"] == 2 and status["running"]
+
+
+def test_profiling_is_admin_only(client, normal_user_token_headers):
+    """Customers can neither start a profile nor download one."""
+    assert client.post("/api/admin/profile", json={}, headers=normal_user_token_headers).status_code == 403
+    assert client.get("/api/admin/profile/collapsed", headers=normal_user_token_headers).status_code == 403
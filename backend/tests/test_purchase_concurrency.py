@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+from app.models.sweet import Sweet
+from app.services import inventory
+
+def _hammer(session_factory, sweet_id, attempts, results, lock):
+    session = session_factory()
+    bought = 0
+    try:
+        for _ in range(attempts):
+            try:
+                inventory.purchase(session, sweet_id, 1)
+                session.commit()
+                bought += 1
+            except inventory.OutOfStock:
+                session.rollback()
+    finally:
+        session.close()
+    with lock:
+        results.append(bought)
+
+def test_concurrent_purchases_never_oversell(db, session_factory):
+    """Many threads buying the same sweet sell exactly the available stock."""
+    sweet = Sweet(name="Hot Sweet", category="Tests", price=1.0, quantity=50)
+    db.add(sweet)
+    db.commit()
+
+    results, lock = [], threading.Lock()
+    threads = [
+        threading.Thread(target=_hammer, args=(session_factory, sweet.id, 20, results, lock))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sum(results) == 50
+    db.refresh(sweet)
+    assert sweet.quantity == 0
+
+def test_purchase_many_units_is_all_or_nothing(db):
+    """A multi-unit purchase larger than the stock takes nothing."""
+    sweet = Sweet(name="Few Left", category="Tests", price=1.0, quantity=2)
+    db.add(sweet)
+    db.commit()
+
+    with pytest.raises(inventory.OutOfStock):
+        inventory.purchase(db, sweet.id, 3)
+    db.rollback()
+
+    assert inventory.purchase(db, sweet.id, 2).quantity == 0
+    db.commit()
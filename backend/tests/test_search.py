@@ -0,0 +1,48 @@
+from fastapi import status
+
+from app.services import search
+
+def _names(client, headers, query):
+    response = client.get(f"/api/sweets/search?{query}", headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    return [s["name"] for s in response.json()]
+
+def test_search_partial_name_case_insensitive(client, admin_user_token_headers, create_sweet):
+    """Name search matches any part of the name regardless of case."""
+    create_sweet("Dark Chocolate Bar")
+    create_sweet("Milk CHOCOLATE")
+    create_sweet("Gummy Bears")
+
+    assert sorted(_names(client, admin_user_token_headers, "q=chocol")) == ["Dark Chocolate Bar", "Milk CHOCOLATE"]
+
+def test_search_index_follows_updates_and_deletes(client, admin_user_token_headers, create_sweet):
+    """Renamed and deleted sweets are reflected in name search."""
+    renamed = create_sweet("Toffee Crunch")
+    deleted = create_sweet("Toffee Apple")
+
+    client.put(f"/api/sweets/{renamed}", json={"name": "Caramel Crunch"}, headers=admin_user_token_headers)
+    client.delete(f"/api/sweets/{deleted}", headers=admin_user_token_headers)
+
+    assert _names(client, admin_user_token_headers, "q=toffee") == []
+    assert _names(client, admin_user_token_headers, "q=caramel") == ["Caramel Crunch"]
+
+def test_search_filters_and_pagination(client, admin_user_token_headers, create_sweet):
+    """Category and price filters combine with name search; results are paginated."""
+    for i in range(5):
+        create_sweet(f"Lolly {i}", category="Candy", price=float(i))
+    create_sweet("Lolly Cake", category="Cake", price=2.0)
+
+    names = _names(client, admin_user_token_headers, "q=lolly&category=Candy&price_min=1&price_max=3")
+    assert sorted(names) == ["Lolly 1", "Lolly 2", "Lolly 3"]
+
+    assert len(_names(client, admin_user_token_headers, "q=lolly&limit=2")) == 2
+    response = client.get("/api/sweets/search?limit=1000", headers=admin_user_token_headers)
+    assert response.status_code == 422
+
+def test_search_fallback_without_fts(client, admin_user_token_headers, monkeypatch, create_sweet):
+    """Without the FTS index, LIKE matching ranks prefix matches first."""
+    create_sweet("Sour Berry")
+    create_sweet("Berry Blast")
+    monkeypatch.setattr(search, "_fts_enabled", lambda db: False)
+
+    assert _names(client, admin_user_token_headers, "q=berry") == ["Berry Blast", "Sour Berry"]
@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import text
+
+from app.core import slow_queries
+from app.core.config import settings
+from app.core.slow_queries import fingerprint, slow_query_log
+
+
+@pytest.fixture(autouse=True)
+def log_every_statement(db, monkeypatch):
+    slow_queries.install(db.get_bind())
+    monkeypatch.setattr(settings, "SLOW_QUERY_MS", 0.0)
+    slow_query_log.clear()
+    yield
+    slow_query_log.clear()
+
+
+def test_fingerprint_ignores_literals_and_in_list_length():
+    """Statements differing only in values or IN-list length share a fingerprint."""
+    assert fingerprint("SELECT * FROM sweets WHERE id IN (?, ?, ?) AND name = 'Fudge'") == \
+        fingerprint("SELECT *\n  FROM sweets WHERE id IN (?) AND name = 'it''s'")
+    assert fingerprint("SELECT 1 LIMIT 10") == "SELECT ? LIMIT ?"
+
+
+def test_slow_statements_are_ranked_with_their_plan(db):
+    """Repeated statements aggregate under one entry that carries its EXPLAIN plan."""
+    for category in ("Candy", "Cake"):
+        db.execute(text("SELECT id FROM sweets WHERE category = :c ORDER BY price"), {"c": category})
+    db.execute(text("SELECT id FROM sweets WHERE name LIKE :q"), {"q": "%fudge%"})
+
+    by_statement = {query["statement"]: query for query in slow_query_log.worst(limit=500)}
+    indexed = by_statement["SELECT id FROM sweets WHERE category = ? ORDER BY price"]
+    assert indexed["count"] == 2
+    assert any("ix_sweets_category_price" in line for line in indexed["plan"])
+    assert not indexed["full_scan"]
+    assert by_statement["SELECT id FROM sweets WHERE name LIKE ?"]["full_scan"]
+
+
+def test_slow_query_endpoint_is_admin_only(client, normal_user_token_headers, admin_user_token_headers):
+    """Admins can list and clear the slow queries; customers cannot."""
+    assert client.get("/api/admin/slow-queries", headers=normal_user_token_headers).status_code == 403
+
+    client.get("/api/sweets/search?category=Candy", headers=normal_user_token_headers)
+    response = client.get("/api/admin/slow-queries?order_by=count&limit=5", headers=admin_user_token_headers)
+    assert response.status_code == 200
+    counts = [query["count"] for query in response.json()]
+    assert counts and counts == sorted(counts, reverse=True) and len(counts) <= 5
+
+    assert client.delete("/api/admin/slow-queries", headers=admin_user_token_headers).status_code == 204
+    assert slow_query_log.worst() == []
+
+
+def test_failed_explain_leaves_the_transaction_intact(db, monkeypatch, create_sweet):
+    """A plan that cannot be captured neither commits nor breaks the statement's transaction."""
+    sweet_id = create_sweet("Savepoint Swirl")
+    monkeypatch.setitem(slow_queries._EXPLAIN_PREFIX, "sqlite", "EXPLAIN QUERY PLAN NOT SQL ")
+    db.execute(text("UPDATE sweets SET quantity = 0 WHERE id = :id"), {"id": sweet_id})
+    db.execute(text(
+        "INSERT INTO sweets (name, category, price, quantity, created_at, updated_at) "
+        "VALUES ('Plain', 'Candy', 1, 1, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)"
+    ))
+
+    by_statement = {query["statement"]: query for query in slow_query_log.worst(limit=500)}
+    assert by_statement["UPDATE sweets SET quantity = ? WHERE id = ?"]["plan"][0].startswith("EXPLAIN failed")
+    assert all(query["plan"] is None for statement, query in by_statement.items() if statement.startswith("INSERT"))
+    assert db.execute(text("SELECT quantity FROM sweets WHERE id = :id"), {"id": sweet_id}).scalar() == 0
+
+    db.rollback()
+    assert db.execute(text("SELECT quantity FROM sweets WHERE id = :id"), {"id": sweet_id}).scalar() == 10
+
+
+def test_update_returning_gets_a_plan(db, create_sweet):
+    """An UPDATE ... RETURNING still being read is explained, not refused."""
+    sweet_id = create_sweet("Returning Rock")
+    row = db.execute(
+        text("UPDATE sweets SET quantity = quantity - 1 WHERE id = :id AND quantity >= 1 RETURNING quantity"),
+        {"id": sweet_id},
+    ).first()
+    assert row.quantity == 9
+
+    by_statement = {query["statement"]: query for query in slow_query_log.worst(limit=500)}
+    plan = by_statement["UPDATE sweets SET quantity = quantity - ? WHERE id = ? AND quantity >= ? RETURNING quantity"]["plan"]
+    assert plan and not any(line.startswith("EXPLAIN failed") for line in plan)
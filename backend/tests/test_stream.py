@@ -0,0 +1,100 @@
+import asyncio
+import json
+import threading
+from datetime import datetime
+
+from fastapi import status
+
+from app.core.config import settings
+from app.main import app
+from app.services.broadcast import StockBroadcaster, stream_messages
+from app.services.events import StockChanged, event_bus
+
+
+def _event(sweet_id, quantity):
+    return StockChanged(sweet_id, "Fudge", "Chocolate", quantity, datetime(2026, 1, 1), "purchase")
+
+
+def test_events_are_fanned_out_across_threads():
+    """Events published from worker threads reach every client in order."""
+    async def run():
+        broadcaster = StockBroadcaster()
+        clients = [broadcaster.connect() for _ in range(3)]
+        thread = threading.Thread(target=lambda: [broadcaster.on_stock_changed(_event(1, q)) for q in (3, 2)])
+        thread.start()
+        thread.join()
+        received = []
+        for client in clients:
+            messages = [await asyncio.wait_for(client.queue.get(), 1) for _ in range(2)]
+            received.append([json.loads(m.decode().split("data: ")[1])["quantity"] for m in messages])
+        return received
+
+    assert asyncio.run(run()) == [[3, 2]] * 3
+
+
+def test_slow_consumers_are_dropped(monkeypatch):
+    """A client whose queue overflows gets a final message and is removed."""
+    monkeypatch.setattr(settings, "SSE_QUEUE_SIZE", 2)
+
+    async def run():
+        broadcaster = StockBroadcaster()
+        slow = broadcaster.connect()
+        fast = broadcaster.connect()
+        for quantity in range(3):
+            broadcaster.on_stock_changed(_event(1, quantity))
+            await asyncio.sleep(0)
+            # The fast client keeps up
+            await fast.queue.get()
+        messages = [m async for m in stream_messages(slow, heartbeat=1)]
+        return broadcaster.stats(), messages
+
+    stats, messages = asyncio.run(run())
+    assert stats == {"clients": 1, "dropped": 1}
+    assert messages[0].startswith(b"retry:")
+    assert messages[1].startswith(b"event: dropped")
+    assert len(messages) == 2
+
+
+def test_stream_endpoint_pushes_stock_changes(client, normal_user_token_headers):
+    """The endpoint accepts a query token and streams published events."""
+    token = normal_user_token_headers["Authorization"].split()[1]
+
+    async def run():
+        sent = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+            "method": "GET", "scheme": "http", "path": "/api/sweets/stream", "raw_path": b"/api/sweets/stream",
+            "root_path": "", "query_string": f"token={token}".encode(),
+            "headers": [(b"accept-encoding", b"gzip, br")],
+            "server": ("testserver", 80), "client": ("testclient", 50000),
+        }
+        task = asyncio.create_task(app(scope, receive, sent.put))
+        start = await asyncio.wait_for(sent.get(), 5)
+        retry = await asyncio.wait_for(sent.get(), 5)
+        # Routes publish from threadpool threads
+        await asyncio.to_thread(event_bus.publish, _event(42, 7))
+        pushed = await asyncio.wait_for(sent.get(), 5)
+        disconnected.set()
+        await asyncio.wait_for(task, 5)
+        return start, retry, pushed
+
+    start, retry, pushed = asyncio.run(run())
+    assert start["status"] == 200
+    assert dict(start["headers"])[b"content-type"].startswith(b"text/event-stream")
+    # Compression would buffer the stream
+    assert b"content-encoding" not in dict(start["headers"])
+    assert retry["body"].startswith(b"retry:")
+    assert pushed["body"].startswith(b"event: stock\n")
+    assert json.loads(pushed["body"].decode().split("data: ")[1])["sweet_id"] == 42
+
+
+def test_stream_requires_a_token(client):
+    """Without a header or query token the stream is refused."""
+    assert client.get("/api/sweets/stream").status_code == status.HTTP_401_UNAUTHORIZED
+    assert client.get("/api/sweets/stream?token=bogus").status_code == status.HTTP_401_UNAUTHORIZED
@@ -79,3 +79,27 @@ def test_delete_non_existent_sweet(client, admin_user_token_headers):
     """Deleting a non-existent sweet should return 404."""
     response = client.delete("/api/sweets/999999", headers=admin_user_token_headers)
     assert response.status_code == status.HTTP_404_NOT_FOUND
+
+def test_read_sweets_cursor_pagination(client, admin_user_token_headers):
+    """Following X-Next-Cursor walks the catalog without gaps or repeats."""
+    for i in range(5):
+        payload = {"name": f"Paged {i}", "category": "Paging", "price": 1.0, "quantity": 1}
+        client.post("/api/sweets", json=payload, headers=admin_user_token_headers)
+
+    first = client.get("/api/sweets?limit=2", headers=admin_user_token_headers)
+    cursor = first.headers["X-Next-Cursor"]
+
+    # A sweet deleted behind the cursor must not shift the next page
+    client.delete(f"/api/sweets/{first.json()[0]['id']}", headers=admin_user_token_headers)
+
+    second = client.get(f"/api/sweets?limit=2&cursor={cursor}", headers=admin_user_token_headers)
+    third = client.get(f"/api/sweets?limit=2&cursor={second.headers['X-Next-Cursor']}", headers=admin_user_token_headers)
+
+    names = [s["name"] for page in (first, second, third) for s in page.json()]
+    assert names == [f"Paged {i}" for i in range(5)]
+    assert "X-Next-Cursor" not in third.headers
+
+def test_read_sweets_invalid_cursor(client, normal_user_token_headers):
+    """A malformed cursor is rejected with 400."""
+    response = client.get("/api/sweets?cursor=not-a-cursor", headers=normal_user_token_headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
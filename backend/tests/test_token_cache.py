@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+import pytest
+from fastapi import status
+from jose import JWTError
+
+from app.core.security import create_access_token, decode_access_token, token_cache
+
+def test_repeat_decode_hits_cache():
+    """Decoding the same token twice verifies it only once."""
+    token = create_access_token({"sub": "1"})
+    decode_access_token(token)
+    stats = token_cache.stats()
+
+    payload = decode_access_token(token)
+
+    assert payload["sub"] == "1"
+    assert token_cache.stats()["hits"] == stats["hits"] + 1
+    assert token_cache.stats()["misses"] == stats["misses"]
+
+def test_cached_payload_is_not_shared():
+    """Callers get their own copy of the cached payload."""
+    token = create_access_token({"sub": "1"})
+    decode_access_token(token)["sub"] = "tampered"
+    assert decode_access_token(token)["sub"] == "1"
+
+def test_expired_token_is_rejected_and_not_cached():
+    """Expired tokens fail verification and are never cached."""
+    token = create_access_token({"sub": "1"}, expires_delta=timedelta(seconds=-1))
+    with pytest.raises(JWTError):
+        decode_access_token(token)
+    assert token_cache.get(token) is None
+
+def test_admin_cache_stats(client, admin_user_token_headers):
+    """Admins can read the cache counters."""
+    response = client.get("/api/admin/caches", headers=admin_user_token_headers)
+    assert response.status_code == status.HTTP_200_OK
+    assert {"hits", "misses", "size"} <= response.json()["tokens"].keys()
@@ -0,0 +1,45 @@
+from fastapi import status
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.deps import user_cache
+from app.models.user import User
+
+def _register_and_login(client, email="cached@example.com"):
+    client.post("/auth/register", json={"name": "Cached User", "email": email, "password": "password123"})
+    login_res = client.post("/auth/token", json={"username": email, "password": "password123"})
+    return {"Authorization": f"Bearer {login_res.json()['access_token']}"}
+
+def test_repeat_requests_hit_user_cache(client):
+    """The second authenticated request is served from the user cache."""
+    headers = _register_and_login(client)
+
+    client.get("/test/users/me", headers=headers)
+    hits = user_cache.stats()["hits"]
+    response = client.get("/test/users/me", headers=headers)
+
+    assert response.status_code == status.HTTP_200_OK
+    assert user_cache.stats()["hits"] == hits + 1
+
+def test_role_change_invalidates_cache(client, db):
+    """Promoting a user takes effect immediately despite the cache."""
+    headers = _register_and_login(client)
+    assert client.get("/test/admin", headers=headers).status_code == status.HTTP_403_FORBIDDEN
+
+    user = db.query(User).filter(User.email == "cached@example.com").first()
+    user.role = "ADMIN"
+    db.commit()
+
+    assert client.get("/test/admin", headers=headers).status_code == status.HTTP_200_OK
+
+def test_trusted_claims_skip_user_lookup(client, db, monkeypatch):
+    """With trusted claims, read-only routes authenticate without the users table."""
+    headers = _register_and_login(client)
+    monkeypatch.setattr(settings, "AUTH_TRUST_TOKEN_CLAIMS", True)
+
+    # Remove the row behind the ORM's back: only the token can vouch for the user now
+    db.execute(text("DELETE FROM users"))
+    db.commit()
+
+    assert client.get("/api/sweets", headers=headers).status_code == status.HTTP_200_OK
+    assert len(user_cache) == 0
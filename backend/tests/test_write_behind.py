@@ -0,0 +1,182 @@
+import threading
+
+import pytest
+from fastapi import status
+
+from app.api import sweets as sweets_api
+from app.models.order import Order
+from app.models.purchase_journal import PurchaseJournalMark
+from app.models.sweet import Sweet
+from app.services.inventory import OutOfStock, SweetNotFound
+from app.services import write_behind
+from app.services.write_behind import PurchaseBuffer, recover
+
+
+@pytest.fixture(scope="function")
+def journal_path(tmp_path):
+    return str(tmp_path / "purchases.log")
+
+
+@pytest.fixture(scope="function")
+def buffer(session_factory, journal_path):
+    """
+    A started write-behind buffer that only flushes when told to.
+    """
+    buf = PurchaseBuffer()
+    buf.start(session_factory, journal_path=journal_path, background=False)
+    yield buf
+    buf.stop()
+
+
+def _sweet(db, quantity):
+    sweet = Sweet(name="Flash Fudge", category="Sale", price=1.0, quantity=quantity)
+    db.add(sweet)
+    db.commit()
+    return sweet.id
+
+
+def _quantity(session_factory, sweet_id):
+    with session_factory() as s:
+        return s.get(Sweet, sweet_id).quantity
+
+
+def test_purchases_are_coalesced_into_one_flush(buffer, db, session_factory):
+    """Reservations stay in memory until a flush writes them together."""
+    sweet_id = _sweet(db, 10)
+
+    assert [buffer.reserve(sweet_id, 2) for _ in range(3)] == [8, 6, 4]
+    assert _quantity(session_factory, sweet_id) == 10
+
+    assert buffer.flush() == 1
+    assert _quantity(session_factory, sweet_id) == 4
+
+
+def test_reservations_are_checked_against_the_counter(buffer, db):
+    """Missing sweets and short stock are rejected without touching the journal."""
+    sweet_id = _sweet(db, 3)
+
+    with pytest.raises(SweetNotFound):
+        buffer.reserve(999999)
+    with pytest.raises(OutOfStock):
+        buffer.reserve_many({sweet_id: 4})
+    assert buffer.reserve(sweet_id, 3) == 0
+    with pytest.raises(OutOfStock):
+        buffer.reserve(sweet_id)
+
+
+def test_concurrent_reservations_never_oversell(buffer, db, session_factory):
+    """Many threads racing for the last units get exactly the stock."""
+    sweet_id = _sweet(db, 50)
+    sold = []
+
+    def buy():
+        for _ in range(20):
+            try:
+                buffer.reserve(sweet_id)
+                sold.append(1)
+            except OutOfStock:
+                pass
+
+    threads = [threading.Thread(target=buy) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    buffer.flush()
+
+    assert len(sold) == 50
+    assert _quantity(session_factory, sweet_id) == 0
+
+
+def test_flush_drops_applied_entries_while_purchases_continue(buffer, db, session_factory, journal_path,
+                                                             monkeypatch):
+    """A flush leaves only the entries reserved after its snapshot in the journal."""
+    sweet_id = _sweet(db, 20)
+    for _ in range(3):
+        buffer.reserve(sweet_id)
+
+    apply = write_behind._apply
+    def apply_during_a_purchase(*args):
+        levels = apply(*args)
+        buffer.reserve(sweet_id, 2)
+        return levels
+    monkeypatch.setattr(write_behind, "_apply", apply_during_a_purchase)
+    buffer.flush()
+
+    lines = open(journal_path).read().splitlines()
+    assert [line.split()[2] for line in lines] == ["2"]
+    buffer.reserve(sweet_id, 4)
+    assert len(open(journal_path).read().splitlines()) == 2
+
+    monkeypatch.setattr(write_behind, "_apply", apply)
+    buffer.flush()
+    assert open(journal_path).read() == ""
+    assert _quantity(session_factory, sweet_id) == 11
+
+
+def test_crash_recovery_replays_only_unflushed_purchases(db, session_factory, journal_path):
+    """After a crash, journaled purchases are applied exactly once."""
+    sweet_id = _sweet(db, 20)
+    crashed = PurchaseBuffer()
+    crashed.start(session_factory, journal_path=journal_path, background=False)
+    crashed.reserve(sweet_id, 2)
+    crashed.flush()
+    crashed.reserve(sweet_id, 3, user_id=7)
+    crashed.reserve(sweet_id, 4, user_id=7)
+    # Simulate the process dying: no flush, no stop
+    crashed._journal.close()
+
+    assert _quantity(session_factory, sweet_id) == 18
+
+    restarted = PurchaseBuffer()
+    restarted.start(session_factory, journal_path=journal_path, background=False)
+    assert _quantity(session_factory, sweet_id) == 11
+    with session_factory() as s:
+        assert [o.total for o in s.query(Order).filter(Order.user_id == 7).order_by(Order.id)] == [3.0, 4.0]
+    assert restarted.reserve(sweet_id) == 10
+    restarted.stop()
+
+    # Recovery is idempotent and the journal is left empty
+    with session_factory() as s:
+        recover(s, journal_path)
+    assert _quantity(session_factory, sweet_id) == 10
+    assert open(journal_path).read() == ""
+
+
+def test_recovery_ignores_a_torn_last_entry(db, session_factory, journal_path):
+    """A partially written entry was never acknowledged and is dropped."""
+    sweet_id = _sweet(db, 10)
+    with open(journal_path, "w") as journal:
+        journal.write(f"1 {sweet_id} 2 1 0 1.0 2026-01-01T00:00:00\n2 {sweet_id} 5 2 0 1.0")
+
+    with session_factory() as s:
+        assert recover(s, journal_path) == 1
+        assert s.get(PurchaseJournalMark, 1).applied_seq == 1
+    assert _quantity(session_factory, sweet_id) == 8
+
+
+def test_routes_use_the_buffer(client, buffer, monkeypatch, normal_user_token_headers,
+                               admin_user_token_headers, session_factory):
+    """Purchases go through the buffer and restocks reseed its counter."""
+    monkeypatch.setattr(sweets_api, "purchase_buffer", buffer)
+    sweet_id = client.post("/api/sweets", json={"name": "Flash", "category": "Sale", "price": 1.0, "quantity": 10},
+                           headers=admin_user_token_headers).json()["id"]
+
+    res = client.post(f"/api/sweets/{sweet_id}/purchase", json={"quantity": 2}, headers=normal_user_token_headers)
+    assert res.json()["remaining_quantity"] == 8
+    res = client.post("/api/sweets/checkout", json={"items": [{"sweet_id": sweet_id, "quantity": 9}]},
+                      headers=normal_user_token_headers)
+    assert res.status_code == status.HTTP_400_BAD_REQUEST
+
+    # The restock lands in the database while 2 units are still pending
+    res = client.post(f"/api/sweets/{sweet_id}/restock", json={"amount": 5}, headers=admin_user_token_headers)
+    assert res.json()["new_quantity"] == 15
+    res = client.post(f"/api/sweets/{sweet_id}/purchase", headers=normal_user_token_headers)
+    assert res.json()["remaining_quantity"] == 12
+
+    assert client.get("/api/orders", headers=normal_user_token_headers).json() == []
+    buffer.flush()
+    assert _quantity(session_factory, sweet_id) == 12
+    assert client.get(f"/api/sweets/{sweet_id}", headers=normal_user_token_headers).json()["quantity"] == 12
+    orders = client.get("/api/orders", headers=normal_user_token_headers).json()
+    assert [o["lines"][0]["quantity"] for o in orders] == [1, 2]
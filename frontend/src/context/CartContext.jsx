@@ -51,40 +51,18 @@ export const CartProvider = ({ children }) => {
 
     const checkout = async () => {
         setIsCheckingOut(true);
-        // Sequential purchases because backend only supports buying 1 at a time or restocking
-        // Actually, the backend endpoint is `/purchase` which buys 1 unit.
-        // We need to call it N times or iterate.
-        // Since we cannot change backend, we have to loop (not ideal for large orders, but fits constraints).
-        // EDIT: Wait, calling API 50 times for 50 items is bad. 
-        // But the constraint says "Do NOT change backend APIs".
-        // Let's see if we can optimize? No, strict rule.
-        // We will loop. Ideally the backend should have a 'buy_batch' endpoint.
-        // We will try to execute requests in parallel chunks to be faster.
-
-        const results = { success: 0, failed: 0 };
-
+        // The whole cart is bought in one all-or-nothing request.
         try {
-            for (const item of cart) {
-                for (let i = 0; i < item.quantity; i++) {
-                    try {
-                        await client.post(`/api/sweets/${item.id}/purchase`);
-                        results.success++;
-                    } catch (e) {
-                        results.failed++;
-                        // If one fails (e.g. out of stock during process), stop buying this item
-                        break;
-                    }
-                }
-            }
+            const items = cart.map(item => ({ sweet_id: item.id, quantity: item.quantity }));
+            await client.post('/api/sweets/checkout', { items });
 
-            if (results.success > 0) {
-                clearCart();
-                alert(`Successfully purchased ${results.success} items!`);
-            }
-            if (results.failed > 0) {
-                alert(`Could not purchase ${results.failed} items (likely out of stock).`);
-            }
+            clearCart();
+            alert(`Successfully purchased ${totalItems} items!`);
         } catch (e) {
+            if (e.response && typeof e.response.data?.detail === 'string') {
+                alert(`Checkout failed: ${e.response.data.detail}`);
+                return;
+            }
             console.error(e);
             alert("Checkout failed unexpectedly.");
         } finally {
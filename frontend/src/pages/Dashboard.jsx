@@ -1,4 +1,4 @@
-import React, { useEffect, useState } from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import client from '../api/client';
 import { useAuth } from '../auth/AuthContext';
 import { useCart } from '../context/CartContext'; // Import Cart Hook
@@ -138,17 +138,30 @@ const Dashboard = () => {
         return () => clearTimeout(timeout);
     }, [search, categoryFilter]);
 
-    // NOTE: Purchases are now handled by CartContext, but we need to refresh sweets when cart checks out.
-    // Ideally CartContext should trigger a refresh or we poll. 
-    // For simplicity, we can pass a refresh function to context or just poll occasionally?
-    // Let's just poll or rely on manual refresh for now, or better:
-    // We can add a "refresh trigger" to the dependency array if we lifted state up, but that's complex.
-    // Alternatively, just refresh every few seconds? No.
-    // Let's keep it simple: The UI updates optimistically or user refreshes.
-    // BUT, the goal is Inventory Update.
-    // Let's add a refresh trigger that we can pass to CartProvider? No, CartProvider is higher up.
-    // We will just re-fetch sweets when the window gains focus or similar.
-    // Actually, let's keep it simple for this iteration.
+    // Live stock levels pushed by the server, so purchases made elsewhere
+    // (including our own cart checkout) show up without polling.
+    const refetch = useRef(fetchSweets);
+    refetch.current = fetchSweets;
+
+    useEffect(() => {
+        const token = localStorage.getItem('token');
+        if (!token) return;
+        const source = new EventSource(`${client.defaults.baseURL}/api/sweets/stream?token=${encodeURIComponent(token)}`);
+
+        source.addEventListener('stock', (e) => {
+            const { sweet_id, quantity } = JSON.parse(e.data);
+            setSweets(current => current.map(s => s.id === sweet_id ? { ...s, quantity } : s));
+        });
+        source.addEventListener('removed', (e) => {
+            const { sweet_id } = JSON.parse(e.data);
+            setSweets(current => current.filter(s => s.id !== sweet_id));
+        });
+        // Too much changed (or we fell behind): reload the list
+        source.addEventListener('reload', () => refetch.current());
+        source.addEventListener('dropped', () => refetch.current());
+
+        return () => source.close();
+    }, []);
 
     const handleRestock = async (id, amount) => {
         try {